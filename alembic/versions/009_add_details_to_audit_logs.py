@@ -0,0 +1,27 @@
+"""Add details (JSONB) column to audit_logs table
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Add details column (cambios estructurados, p. ej. {"campo": {"old": ..., "new": ...}})
+    op.add_column('audit_logs', sa.Column('details', postgresql.JSONB(), nullable=True))
+
+
+def downgrade() -> None:
+    # Remove details column
+    op.drop_column('audit_logs', 'details')
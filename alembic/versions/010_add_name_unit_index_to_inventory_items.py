@@ -0,0 +1,25 @@
+"""Add composite (business_id, name, unit_of_measure) index to inventory_items
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Índice para encontrar el ítem equivalente (nombre + unidad) en el negocio destino
+    op.create_index('ix_inventory_items_biz_name_unit', 'inventory_items', ['business_id', 'name', 'unit_of_measure'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_inventory_items_biz_name_unit', table_name='inventory_items')
@@ -1,15 +1,27 @@
+import json
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.config.settings import settings
 
+# asyncpg reutiliza las sentencias preparadas por conexión; junto con el caché
+# de compilación de SQLAlchemy (query_cache_size) evita re-planificar consultas frecuentes
+_connect_args = {}
+if settings.DATABASE_URL.startswith("postgresql+asyncpg"):
+    _connect_args["prepared_statement_cache_size"] = settings.DB_PREPARED_STATEMENT_CACHE_SIZE
+
 # Create async engine
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,
     future=True,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    query_cache_size=1200,
+    connect_args=_connect_args,
+    # Columnas JSON: Decimal/datetime se serializan como texto
+    json_serializer=lambda obj: json.dumps(obj, default=str, ensure_ascii=False),
 )
 
 # Create async session factory
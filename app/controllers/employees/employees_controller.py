@@ -1,5 +1,5 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator
 from app.services.employees.employees_service import EmployeesService
 from app.schemas.employees.employee_schema import (
     EmployeeCreateRequest,
@@ -55,6 +55,20 @@ class EmployeesController:
         employees_service = EmployeesService(db)
         return await employees_service.get_all_employees(current_user, skip, limit)
 
+    @staticmethod
+    def stream_employees(
+        skip: int,
+        limit: int,
+        current_user: User,
+        db: AsyncSession,
+    ) -> AsyncIterator[EmployeeResponse]:
+        """
+        Endpoint: GET /employees/stream
+        Itera los empleados del negocio para respuestas en streaming.
+        """
+        employees_service = EmployeesService(db)
+        return employees_service.iter_all_employees(current_user, skip, limit)
+
     @staticmethod
     async def update_employee(
         employee_id: int,
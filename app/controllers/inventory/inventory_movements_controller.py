@@ -3,7 +3,7 @@ Controller para Movimientos de Inventario.
 Capa delgada que delega al servicio de movimientos de inventario.
 """
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 from app.services.inventory.inventory_movements_service import InventoryMovementsService
 from app.schemas.inventory.inventory_movement_schema import (
     MovementResponse,
@@ -56,6 +56,18 @@ class InventoryMovementsController:
             current_user, skip, limit, movement_type
         )
 
+    @staticmethod
+    def stream_movements(
+        skip: int,
+        limit: int,
+        movement_type: Optional[MovementType],
+        current_user: User,
+        db: AsyncSession,
+    ) -> AsyncIterator[MovementResponse]:
+        """Iterar los movimientos del negocio para respuestas en streaming"""
+        movements_service = InventoryMovementsService(db)
+        return movements_service.iter_all_movements(current_user, skip, limit, movement_type)
+
     @staticmethod
     async def revert_movement(
         movement_id: int,
@@ -1,5 +1,5 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import AsyncIterator, List
 from app.services.users.users_service import UsersService
 from app.schemas.users.user_schema import UserResponse
 from app.models.users.user_model import User
@@ -41,3 +41,17 @@ class UsersController:
         """
         users_service = UsersService(db)
         return await users_service.get_all_users(current_user.business_id, skip, limit)
+
+    @staticmethod
+    def stream_users(
+        skip: int,
+        limit: int,
+        current_user: User,
+        db: AsyncSession,
+    ) -> AsyncIterator[UserResponse]:
+        """
+        Endpoint: GET /users/stream
+        Itera los usuarios del negocio para respuestas en streaming.
+        """
+        users_service = UsersService(db)
+        return users_service.iter_all_users(current_user.business_id, skip, limit)
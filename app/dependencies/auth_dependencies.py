@@ -1,8 +1,9 @@
+from typing import AbstractSet
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.config.database import get_db
-from app.utils.security import decode_token
+from app.utils.security import decode_token, TOKEN_TYPE_ACCESS
 from app.repositories.users.users_repository import UsersRepository
 from app.models.users.user_model import User, UserRole
 
@@ -22,7 +23,7 @@ async def get_current_user(
 
     # Decodificar token
     token_data = decode_token(token)
-    if not token_data:
+    if not token_data or token_data.token_type != TOKEN_TYPE_ACCESS:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
@@ -75,3 +76,15 @@ async def require_owner_or_admin(
             detail="Only owners or admins can perform this action",
         )
     return current_user
+
+
+def require_role(user: User, roles: AbstractSet[UserRole], detail: str) -> None:
+    """
+    Lanza 403 con el detalle indicado si el rol del usuario no está en roles.
+    Para validaciones de rol dentro de los servicios.
+    """
+    if user.role not in roles:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=detail,
+        )
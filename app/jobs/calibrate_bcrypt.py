@@ -0,0 +1,74 @@
+"""
+Script para calibrar el costo de bcrypt (BCRYPT_ROUNDS) en el servidor actual.
+
+Mide el tiempo de hashear una contraseña con rounds de 8 a 14 y recomienda el
+mayor valor cuyo p95 quede dentro del presupuesto de latencia (250 ms por defecto).
+Debe ejecutarse en el mismo tipo de máquina donde correrá la API.
+
+Ejemplo:
+python -m app.jobs.calibrate_bcrypt --budget-ms 250 --samples 10
+
+Luego fijar el valor recomendado en el .env:
+BCRYPT_ROUNDS=12
+"""
+import argparse
+import logging
+import math
+import time
+import bcrypt
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+MIN_ROUNDS = 8
+MAX_ROUNDS = 14
+SAMPLE_PASSWORD = b"calibracion-bcrypt-123"
+
+
+def measure_p95_ms(rounds: int, samples: int) -> float:
+    """
+    Hashea SAMPLE_PASSWORD `samples` veces con el costo indicado y retorna el p95 en ms.
+    """
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.hashpw(SAMPLE_PASSWORD, bcrypt.gensalt(rounds=rounds))
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[min(len(timings) - 1, math.ceil(0.95 * len(timings)) - 1)]
+
+
+def calibrate(budget_ms: float, samples: int) -> int:
+    """
+    Retorna el mayor rounds (entre MIN_ROUNDS y MAX_ROUNDS) cuyo p95 no supera el presupuesto.
+    Si ni siquiera MIN_ROUNDS cabe, retorna MIN_ROUNDS.
+    """
+    chosen = MIN_ROUNDS
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        p95 = measure_p95_ms(rounds, samples)
+        logger.info(f"rounds={rounds}: p95={p95:.1f} ms")
+        if p95 > budget_ms:
+            # Cada round adicional duplica el costo: no tiene sentido seguir midiendo
+            break
+        chosen = rounds
+    return chosen
+
+
+def main():
+    """
+    Función principal para ejecutar el script directamente.
+    """
+    parser = argparse.ArgumentParser(description="Calibra BCRYPT_ROUNDS para este servidor")
+    parser.add_argument("--budget-ms", type=float, default=250.0, help="Presupuesto p95 por hash en ms")
+    parser.add_argument("--samples", type=int, default=10, help="Hashes medidos por cada rounds")
+    args = parser.parse_args()
+
+    rounds = calibrate(args.budget_ms, args.samples)
+    logger.info(f"Valor recomendado: BCRYPT_ROUNDS={rounds}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config.settings import settings
 from app.middleware.logging_middleware import LoggingMiddleware
+from app.services.audit import audit_buffer
+from app.utils.security import start_bcrypt_executor, shutdown_bcrypt_executor
 from app.routers.auth import auth_router
 from app.routers.users import users_router
 from app.routers.employees import employees_router
@@ -29,6 +31,7 @@ logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
 )
+logger = logging.getLogger(__name__)
 
 # Crear aplicación FastAPI
 app = FastAPI(
@@ -74,6 +77,31 @@ app.include_router(products_router)
 app.include_router(modifiers_router)
 
 
+@app.on_event("startup")
+async def start_audit_buffer():
+    """Inicia la tarea que vuelca en lote los registros de auditoría."""
+    audit_buffer.start()
+
+
+@app.on_event("startup")
+async def log_security_settings():
+    """Prepara el pool de bcrypt y deja constancia de su configuración."""
+    start_bcrypt_executor()
+    logger.info("bcrypt rounds: %d (%s pool)", settings.BCRYPT_ROUNDS, settings.BCRYPT_EXECUTOR)
+
+
+@app.on_event("shutdown")
+async def drain_audit_buffer():
+    """Drena los registros de auditoría pendientes antes de salir."""
+    await audit_buffer.shutdown()
+
+
+@app.on_event("shutdown")
+async def stop_bcrypt_executor():
+    """Libera el pool de bcrypt."""
+    shutdown_bcrypt_executor()
+
+
 @app.get("/", tags=["Root"])
 async def root():
     """
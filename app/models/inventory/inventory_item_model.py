@@ -2,8 +2,8 @@
 Modelo InventoryItem (Ítem de Inventario).
 Representa un producto/ingrediente en el inventario de un negocio.
 """
-from sqlalchemy import Column, Integer, String, Numeric, Boolean, DateTime, ForeignKey, Text, CheckConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Numeric, Boolean, DateTime, ForeignKey, Text, CheckConstraint, Index, and_
+from sqlalchemy.orm import relationship, query_expression
 from sqlalchemy.sql import func
 from app.config.database import Base
 
@@ -36,10 +36,17 @@ class InventoryItem(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
+    # Calculado por la base de datos en el mismo SELECT (no es una columna física)
+    is_below_min_stock = query_expression(
+        and_(min_stock.isnot(None), quantity_in_stock < min_stock)
+    )
+
     # Constraints
     __table_args__ = (
         CheckConstraint('quantity_in_stock >= 0', name='check_quantity_non_negative'),
         CheckConstraint('unit_price >= 0', name='check_unit_price_non_negative'),
+        # Búsqueda del ítem equivalente en el negocio destino de un traslado
+        Index('ix_inventory_items_biz_name_unit', 'business_id', 'name', 'unit_of_measure'),
     )
 
     # Relationships
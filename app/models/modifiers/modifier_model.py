@@ -4,7 +4,7 @@ Representan grupos de modificadores, modificadores individuales, sus ítems de i
 y la relación con productos.
 """
 from sqlalchemy import Column, Integer, String, Numeric, Boolean, DateTime, ForeignKey, Text, CheckConstraint, UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, query_expression
 from sqlalchemy.sql import func
 from app.config.database import Base
 
@@ -28,6 +28,10 @@ class ModifierGroup(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
+    # Cantidad de modificadores del grupo, calculada por la base de datos en el mismo
+    # SELECT (no es una columna física; se carga con with_expression, ver ModifiersRepository)
+    modifiers_count = query_expression()
+
     # Relationships
     business = relationship("Business", back_populates="modifier_groups")
     modifiers = relationship("Modifier", back_populates="modifier_group", cascade="all, delete-orphan")
@@ -3,7 +3,7 @@ Modelos Product y ProductIngredient.
 Representan productos/recetas y sus ingredientes del inventario.
 """
 from sqlalchemy import Column, Integer, String, Numeric, Boolean, DateTime, ForeignKey, Text, CheckConstraint, UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, query_expression
 from sqlalchemy.sql import func
 from app.config.database import Base
 
@@ -33,6 +33,10 @@ class Product(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
+    # Cantidad de ingredientes, calculada por la base de datos en el mismo SELECT del
+    # listado (no es una columna física; se carga con with_expression, ver ProductsRepository)
+    ingredients_count = query_expression()
+
     # Constraints
     __table_args__ = (
         CheckConstraint('sale_price >= 0', name='check_sale_price_non_negative'),
@@ -8,12 +8,19 @@ from app.config.database import Base
 class UserRole(str, enum.Enum):
     """
     Roles de usuario en el sistema.
+    Cada rol lleva su nivel jerárquico en `level` (mayor valor = más privilegios).
     """
-    OWNER = "owner"
-    ADMIN = "admin"
-    CASHIER = "cashier"
-    WAITER = "waiter"
-    COOK = "cook"
+    OWNER = ("owner", 5)
+    ADMIN = ("admin", 4)
+    CASHIER = ("cashier", 3)
+    WAITER = ("waiter", 2)
+    COOK = ("cook", 1)
+
+    def __new__(cls, value: str, level: int):
+        obj = str.__new__(cls, value)
+        obj._value_ = value
+        obj.level = level
+        return obj
 
 
 class User(Base):
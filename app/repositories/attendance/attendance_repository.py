@@ -1,10 +1,20 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, and_, func, bindparam
 from typing import Optional, List
 from datetime import datetime, date
 from app.models.attendance.attendance_model import Attendance
 
 
+# Consulta de asistencia del día, construida una sola vez y reutilizada con parámetros
+_TODAY_ATTENDANCE_STMT = select(Attendance).where(
+    and_(
+        Attendance.employee_id == bindparam("employee_id"),
+        Attendance.business_id == bindparam("business_id"),
+        Attendance.date == bindparam("today_date"),
+    )
+)
+
+
 class AttendanceRepository:
     """
     Repositorio para operaciones de Attendance en la base de datos.
@@ -29,13 +39,8 @@ class AttendanceRepository:
             Attendance si existe, None en caso contrario
         """
         result = await self.db.execute(
-            select(Attendance).where(
-                and_(
-                    Attendance.employee_id == employee_id,
-                    Attendance.business_id == business_id,
-                    Attendance.date == today_date,
-                )
-            )
+            _TODAY_ATTENDANCE_STMT,
+            {"employee_id": employee_id, "business_id": business_id, "today_date": today_date},
         )
         return result.scalar_one_or_none()
 
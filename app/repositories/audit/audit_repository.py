@@ -1,6 +1,8 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional
+from sqlalchemy import insert
+from typing import Optional, List, Dict, Any
 from app.models.audit.audit_log_model import AuditLog
+from app.config.settings import settings
 
 
 class AuditRepository:
@@ -10,22 +12,55 @@ class AuditRepository:
 
     def __init__(self, db: AsyncSession):
         self.db = db
+        # Si la auditoría está deshabilitada (p. ej. tests), create_log no inserta nada
+        self.enabled = settings.AUDIT_ENABLED
 
     async def create_log(
         self,
         business_id: int,
         action: str,
         user_id: Optional[int] = None,
-    ) -> AuditLog:
+        commit: bool = True,
+        details: Optional[Dict[str, Any]] = None,
+    ) -> Optional[AuditLog]:
         """
         Crea un registro de auditoría.
+
+        Con commit=True (por defecto) también confirma cualquier escritura
+        pendiente en la sesión, de modo que la operación auditada y su
+        registro de auditoría viajan en una sola transacción.
+        Con la auditoría deshabilitada solo confirma y retorna None.
         """
+        if not self.enabled:
+            if commit:
+                await self.db.commit()
+            return None
+
         audit_log = AuditLog(
             business_id=business_id,
             user_id=user_id,
             action=action,
+            details=details,
         )
         self.db.add(audit_log)
-        await self.db.commit()
+        if commit:
+            await self.db.commit()
+        else:
+            await self.db.flush()
         await self.db.refresh(audit_log)
         return audit_log
+
+    async def bulk_create_logs(self, entries: List[Dict[str, Any]], commit: bool = True) -> None:
+        """
+        Inserta varios registros de auditoría con un único INSERT multi-fila.
+
+        Con commit=False no confirma la transacción (la operación auditada y sus
+        registros se confirman juntos). Con la auditoría deshabilitada no inserta nada.
+
+        Args:
+            entries: Diccionarios con business_id, user_id, action y details
+        """
+        if entries and self.enabled:
+            await self.db.execute(insert(AuditLog), entries)
+        if commit:
+            await self.db.commit()
@@ -4,8 +4,10 @@ Repositorio para operaciones de BusinessRelationship en la base de datos.
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import selectinload
 from app.models.business.business_relationship_model import BusinessRelationship
+from app.models.business.business_model import Business
 from app.models.inventory.inventory_enums import RelationshipStatus
 
 
@@ -67,6 +69,46 @@ class BusinessRelationshipsRepository:
         )
         return result.scalar_one_or_none()
 
+    async def get_transfer_context(
+        self,
+        from_business_id: int,
+        to_business_id: int,
+    ) -> Optional[Row]:
+        """
+        Datos para validar un traslado en una sola consulta: nombre del negocio
+        destino y estado de la relación entre ambos negocios (en cualquier dirección).
+
+            SELECT b.name, (SELECT r.status FROM business_relationships r WHERE ...) AS relationship_status
+            FROM business b WHERE b.id = :to_business_id
+
+        Retorna None si el negocio destino no existe; relationship_status es None
+        si no hay relación.
+        """
+        relationship_status = (
+            select(BusinessRelationship.status)
+            .where(
+                or_(
+                    and_(
+                        BusinessRelationship.requester_business_id == from_business_id,
+                        BusinessRelationship.target_business_id == to_business_id,
+                    ),
+                    and_(
+                        BusinessRelationship.requester_business_id == to_business_id,
+                        BusinessRelationship.target_business_id == from_business_id,
+                    ),
+                )
+            )
+            .limit(1)
+            .scalar_subquery()
+        )
+        result = await self.db.execute(
+            select(
+                Business.name,
+                relationship_status.label("relationship_status"),
+            ).where(Business.id == to_business_id)
+        )
+        return result.one_or_none()
+
     async def get_pending_for_business(self, business_id: int) -> List[BusinessRelationship]:
         """Obtener solicitudes de relación pendientes recibidas"""
         result = await self.db.execute(
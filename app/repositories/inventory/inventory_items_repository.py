@@ -2,12 +2,72 @@
 Repositorio para operaciones de InventoryItem en la base de datos.
 TODOS los queries filtran por business_id (multi-tenant).
 """
-from typing import List, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, update, insert, literal, bindparam, tuple_, func, and_, or_
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import selectinload, raiseload, aliased
 from app.models.inventory.inventory_item_model import InventoryItem
+from app.models.inventory.inventory_movement_model import InventoryMovement
+from app.models.inventory.inventory_enums import MovementType
+from app.models.suppliers.supplier_model import Supplier
+
+
+# Primer argumento de pg_advisory_xact_lock(int, int) para los bloqueos de catálogo por negocio
+_CATALOG_LOCK_NAMESPACE = 1001
+
+
+# Sentencias de consultas frecuentes, cacheadas con lru_cache (ver users_repository).
+@lru_cache(maxsize=None)
+def _get_by_id_stmt(load: Tuple[str, ...], for_update: bool):
+    query = (
+        select(InventoryItem)
+        .options(*[selectinload(getattr(InventoryItem, attr)) for attr in load])
+        .where(
+            and_(
+                InventoryItem.id == bindparam("item_id"),
+                InventoryItem.business_id == bindparam("business_id"),
+            )
+        )
+    )
+    if for_update:
+        query = query.with_for_update().execution_options(populate_existing=True)
+    return query
+
+
+@lru_cache(maxsize=None)
+def _sku_exists_stmt(excluding_item: bool):
+    query = select(InventoryItem.id).where(
+        and_(
+            InventoryItem.sku == bindparam("sku"),
+            InventoryItem.business_id == bindparam("business_id"),
+        )
+    )
+    if excluding_item:
+        query = query.where(InventoryItem.id != bindparam("exclude_id"))
+    return query.limit(1)
+
+
+@lru_cache(maxsize=None)
+def _sku_supplier_context_stmt(excluding_item: bool):
+    # Fila ancla de una sola fila: el LEFT JOIN devuelve Supplier=None si no hay proveedor
+    anchor = select(literal(1).label("one")).subquery("anchor")
+    return (
+        select(
+            _sku_exists_stmt(excluding_item).exists().label("sku_taken"),
+            Supplier,
+        )
+        .select_from(anchor)
+        .outerjoin(
+            Supplier,
+            and_(
+                Supplier.id == bindparam("supplier_id"),
+                Supplier.business_id == bindparam("business_id"),
+            ),
+        )
+    )
 
 
 class InventoryItemsRepository:
@@ -32,8 +92,13 @@ class InventoryItemsRepository:
         tax_percentage: Optional[Decimal],
         include_tax: bool,
         supplier_id: Optional[int],
+        commit: bool = True,
     ) -> InventoryItem:
-        """Crear un nuevo ítem de inventario"""
+        """
+        Crear un nuevo ítem de inventario.
+
+        Con commit=False solo hace flush (el ítem ya tiene ID); el llamador confirma la transacción.
+        """
         item = InventoryItem(
             business_id=business_id,
             supplier_id=supplier_id,
@@ -49,21 +114,124 @@ class InventoryItemsRepository:
             include_tax=include_tax,
         )
         self.db.add(item)
-        await self.db.commit()
-        await self.db.refresh(item)
+        if commit:
+            await self.db.commit()
+            await self.db.refresh(item)
+        else:
+            await self.db.flush()
         return item
 
-    async def get_by_id(self, item_id: int, business_id: int) -> Optional[InventoryItem]:
-        """Obtener ítem por ID (filtrado por business_id) con relaciones"""
+    async def create_many(self, rows: List[dict], commit: bool = True) -> List[InventoryItem]:
+        """
+        Crear varios ítems en un solo INSERT de varias filas (... RETURNING).
+        Cada fila trae las mismas claves que create(). Con commit=False no confirma
+        la transacción; los ítems devueltos ya tienen ID.
+        """
+        if not rows:
+            return []
+        result = await self.db.execute(insert(InventoryItem).returning(InventoryItem), rows)
+        items = list(result.scalars().all())
+        if commit:
+            await self.db.commit()
+        return items
+
+    async def lock_business_catalog(self, business_id: int) -> None:
+        """
+        Serializar la creación de ítems de un negocio hasta el fin de la transacción
+        (pg_advisory_xact_lock). Evita que dos operaciones concurrentes que buscan
+        un ítem por (nombre, unidad) y lo crean si falta dupliquen el ítem.
+        """
+        await self.db.execute(
+            select(func.pg_advisory_xact_lock(_CATALOG_LOCK_NAMESPACE, business_id))
+        )
+
+    async def get_by_id(
+        self,
+        item_id: int,
+        business_id: int,
+        load: Tuple[str, ...] = ("business", "supplier"),
+    ) -> Optional[InventoryItem]:
+        """
+        Obtener ítem por ID (filtrado por business_id).
+        load indica qué relaciones cargar; pasar () si solo se usan columnas.
+        """
+        result = await self.db.execute(
+            _get_by_id_stmt(load, False), {"item_id": item_id, "business_id": business_id}
+        )
+        return result.scalar_one_or_none()
+
+    async def get_by_id_for_update(
+        self,
+        item_id: int,
+        business_id: int,
+        load: Tuple[str, ...] = ("supplier",),
+    ) -> Optional[InventoryItem]:
+        """
+        Obtener ítem por ID bloqueando la fila (SELECT ... FOR UPDATE).
+        Para lectura-modificación-escritura del stock: otro ajuste concurrente
+        espera al commit en lugar de pisar la cantidad.
+        """
+        result = await self.db.execute(
+            _get_by_id_stmt(load, True), {"item_id": item_id, "business_id": business_id}
+        )
+        return result.scalar_one_or_none()
+
+    async def get_by_ids(
+        self,
+        ids: List[int],
+        business_id: int,
+        for_update: bool = False,
+    ) -> Dict[int, InventoryItem]:
+        """
+        Obtener varios ítems en un solo SELECT ... WHERE id IN (...) (filtrado por business_id).
+        Devuelve un dict {id: ítem}; los IDs inexistentes o de otro negocio no aparecen.
+
+        Con for_update=True bloquea las filas (FOR UPDATE, en orden de ID para no
+        provocar interbloqueos) y recarga el stock aunque el ítem ya esté en la sesión.
+        """
+        if not ids:
+            return {}
+        query = select(InventoryItem).where(
+            and_(
+                InventoryItem.id.in_(ids),
+                InventoryItem.business_id == business_id,
+            )
+        )
+        if for_update:
+            query = (
+                query.order_by(InventoryItem.id)
+                .with_for_update()
+                .execution_options(populate_existing=True)
+            )
+        result = await self.db.execute(query)
+        return {item.id: item for item in result.scalars().all()}
+
+    async def get_by_name_unit_bulk(
+        self,
+        business_id: int,
+        pairs: List[Tuple[str, str]],
+    ) -> Dict[Tuple[str, str], InventoryItem]:
+        """
+        Buscar ítems por (nombre, unidad de medida) en un solo SELECT ... WHERE (name, unit_of_measure) IN (...).
+        Usa el índice ix_inventory_items_biz_name_unit. Si hay varios ítems con la misma
+        pareja gana el de menor ID.
+        """
+        if not pairs:
+            return {}
         result = await self.db.execute(
             select(InventoryItem)
-            .options(
-                selectinload(InventoryItem.business),
-                selectinload(InventoryItem.supplier),
+            .where(
+                and_(
+                    InventoryItem.business_id == business_id,
+                    tuple_(InventoryItem.name, InventoryItem.unit_of_measure).in_(pairs),
+                )
             )
-            .where(and_(InventoryItem.id == item_id, InventoryItem.business_id == business_id))
+            .order_by(InventoryItem.id)
         )
-        return result.scalar_one_or_none()
+        items: Dict[Tuple[str, str], InventoryItem] = {}
+        for item in result.scalars().all():
+            items.setdefault((item.name, item.unit_of_measure), item)
+        return items
 
     async def get_all_by_business(
         self,
@@ -75,8 +243,11 @@ class InventoryItemsRepository:
         supplier_id: Optional[int] = None,
     ) -> List[InventoryItem]:
         """Obtener todos los ítems de un negocio con paginación y filtros"""
+        # El proveedor se carga en bloque (un solo SELECT ... IN); cualquier otra
+        # relación accedida por fila falla en lugar de disparar un N+1
         query = select(InventoryItem).options(
-            selectinload(InventoryItem.supplier)
+            selectinload(InventoryItem.supplier),
+            raiseload("*", sql_only=True),
         ).where(InventoryItem.business_id == business_id)
 
         if active_only:
@@ -107,24 +278,45 @@ class InventoryItemsRepository:
 
     async def sku_exists(self, sku: str, business_id: int, exclude_id: Optional[int] = None) -> bool:
         """Verificar si un SKU ya existe para el negocio"""
-        query = select(InventoryItem).where(
-            and_(
-                InventoryItem.sku == sku,
-                InventoryItem.business_id == business_id,
-            )
-        )
-
+        params = {"sku": sku, "business_id": business_id}
         if exclude_id:
-            query = query.where(InventoryItem.id != exclude_id)
+            params["exclude_id"] = exclude_id
 
-        result = await self.db.execute(query)
+        result = await self.db.execute(_sku_exists_stmt(bool(exclude_id)), params)
         return result.scalar_one_or_none() is not None
 
+    async def get_sku_supplier_context(
+        self,
+        sku: Optional[str],
+        supplier_id: Optional[int],
+        business_id: int,
+        exclude_id: Optional[int] = None,
+    ) -> Row:
+        """
+        Datos para validar SKU y proveedor de un ítem en una sola consulta.
+
+            SELECT EXISTS (SELECT i.id FROM inventory_items i WHERE i.sku = :sku ...) AS sku_taken, s.*
+            FROM (SELECT 1) AS anchor
+            LEFT OUTER JOIN suppliers s ON s.id = :supplier_id AND s.business_id = :business_id
+
+        Siempre devuelve una fila (sku_taken, Supplier). Con sku=None sku_taken es
+        False; con supplier_id=None (o si no pertenece al negocio) Supplier es None.
+        """
+        params = {"sku": sku, "supplier_id": supplier_id, "business_id": business_id}
+        if exclude_id:
+            params["exclude_id"] = exclude_id
+
+        result = await self.db.execute(_sku_supplier_context_stmt(bool(exclude_id)), params)
+        return result.one()
+
     async def get_items_below_min_stock(self, business_id: int) -> List[InventoryItem]:
         """Obtener ítems por debajo del stock mínimo"""
         result = await self.db.execute(
             select(InventoryItem)
-            .options(selectinload(InventoryItem.supplier))
+            .options(
+                selectinload(InventoryItem.supplier),
+                raiseload("*", sql_only=True),
+            )
             .where(
                 and_(
                     InventoryItem.business_id == business_id,
@@ -149,18 +341,111 @@ class InventoryItemsRepository:
             return False
         return item.quantity_in_stock >= required_quantity
 
+    async def adjust_stock_atomic(
+        self,
+        item: InventoryItem,
+        delta: Decimal,
+        created_by_user_id: Optional[int],
+        movement_type: MovementType,
+        reason: Optional[str] = None,
+        reference_id: Optional[int] = None,
+    ) -> Tuple[InventoryItem, InventoryMovement]:
+        """
+        Suma delta al stock y registra el movimiento en una sola sentencia:
+
+            WITH upd AS (UPDATE inventory_items ... RETURNING id, business_id),
+                 ins AS (INSERT INTO inventory_movements ... SELECT ... FROM upd RETURNING *)
+            SELECT * FROM ins
+
+        Confirma la transacción y refresca el ítem (stock, updated_at, is_below_min_stock).
+        El llamador valida antes que el stock resultante no sea negativo.
+        """
+        upd = (
+            update(InventoryItem)
+            .where(and_(InventoryItem.id == item.id, InventoryItem.business_id == item.business_id))
+            .values(quantity_in_stock=InventoryItem.quantity_in_stock + delta)
+            .returning(InventoryItem.id, InventoryItem.business_id)
+            .cte("upd")
+        )
+        ins = (
+            insert(InventoryMovement)
+            .from_select(
+                [
+                    "inventory_item_id",
+                    "business_id",
+                    "created_by_user_id",
+                    "movement_type",
+                    "quantity",
+                    "reason",
+                    "reference_id",
+                    "reverted",
+                ],
+                select(
+                    upd.c.id,
+                    upd.c.business_id,
+                    literal(created_by_user_id, InventoryMovement.created_by_user_id.type),
+                    literal(movement_type, InventoryMovement.movement_type.type),
+                    literal(delta, InventoryMovement.quantity.type),
+                    literal(reason, InventoryMovement.reason.type),
+                    literal(reference_id, InventoryMovement.reference_id.type),
+                    literal(False),
+                ),
+            )
+            .returning(*InventoryMovement.__table__.c)
+            .cte("ins")
+        )
+        result = await self.db.execute(select(aliased(InventoryMovement, ins)))
+        movement = result.scalar_one()
+        await self.db.commit()
+        await self.db.refresh(item)
+        return item, movement
+
+    async def apply_stock_deltas(
+        self,
+        deltas: Dict[int, Decimal],
+        commit: bool = True,
+    ) -> None:
+        """
+        Sumar a varios ítems su variación de stock ({item_id: delta}) en una sola
+        sentencia ejecutada en bloque:
+
+            UPDATE inventory_items SET quantity_in_stock = quantity_in_stock + :delta WHERE id = :iid
+
+        La suma se hace en la base de datos; el CHECK de stock no negativo sigue aplicando.
+        Con commit=False no confirma la transacción.
+        """
+        if not deltas:
+            return
+        table = InventoryItem.__table__
+        await self.db.execute(
+            update(table)
+            .where(table.c.id == bindparam("iid"))
+            .values(quantity_in_stock=table.c.quantity_in_stock + bindparam("delta")),
+            [{"iid": item_id, "delta": delta} for item_id, delta in deltas.items()],
+        )
+        if commit:
+            await self.db.commit()
+
     async def update_stock(
         self,
         item: InventoryItem,
         new_quantity: Decimal,
+        commit: bool = True,
     ) -> InventoryItem:
-        """Actualizar solo la cantidad en stock"""
+        """
+        Actualizar solo la cantidad en stock.
+
+        Con commit=False solo hace flush; el llamador confirma la transacción.
+        """
         if new_quantity < 0:
             raise ValueError("Stock no puede ser negativo")
 
         item.quantity_in_stock = new_quantity
-        await self.db.commit()
-        await self.db.refresh(item)
+        if commit:
+            await self.db.commit()
+            await self.db.refresh(item)
+        else:
+            await self.db.flush()
         return item
 
     async def update(self, item: InventoryItem) -> InventoryItem:
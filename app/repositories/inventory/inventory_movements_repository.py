@@ -2,15 +2,19 @@
 Repositorio para operaciones de InventoryMovement en la base de datos.
 TODOS los queries filtran por business_id (multi-tenant).
 """
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, desc
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, update, insert, literal, and_, desc
+from sqlalchemy.orm import selectinload, raiseload, aliased
 from app.models.inventory.inventory_movement_model import InventoryMovement
+from app.models.inventory.inventory_item_model import InventoryItem
 from app.models.inventory.inventory_enums import MovementType
 
 
+_REVERT = MovementType.REVERT
+
+
 class InventoryMovementsRepository:
     """
     Repositorio para gestionar operaciones de InventoryMovement.
@@ -28,8 +32,14 @@ class InventoryMovementsRepository:
         quantity: Decimal,
         reason: Optional[str] = None,
         reference_id: Optional[int] = None,
+        commit: bool = True,
     ) -> InventoryMovement:
-        """Crear un nuevo movimiento de inventario"""
+        """
+        Crear un nuevo movimiento de inventario.
+
+        Con commit=False solo hace flush, para que el llamador confirme
+        la transacción junto con la actualización de stock.
+        """
         movement = InventoryMovement(
             inventory_item_id=inventory_item_id,
             business_id=business_id,
@@ -40,10 +50,24 @@ class InventoryMovementsRepository:
             reference_id=reference_id,
         )
         self.db.add(movement)
-        await self.db.commit()
+        if commit:
+            await self.db.commit()
+        else:
+            await self.db.flush()
         await self.db.refresh(movement)
         return movement
 
+    async def create_many(self, rows: List[dict], commit: bool = True) -> None:
+        """
+        Insertar varios movimientos en un solo INSERT de varias filas.
+        Cada fila trae las mismas claves que create(). Con commit=False no confirma la transacción.
+        """
+        if not rows:
+            return
+        await self.db.execute(insert(InventoryMovement), rows)
+        if commit:
+            await self.db.commit()
+
     async def get_by_id(self, movement_id: int, business_id: int) -> Optional[InventoryMovement]:
         """Obtener movimiento por ID (filtrado por business_id) con relaciones"""
         result = await self.db.execute(
@@ -57,6 +81,19 @@ class InventoryMovementsRepository:
         )
         return result.scalar_one_or_none()
 
+    async def get_by_id_for_update(self, movement_id: int, business_id: int) -> Optional[InventoryMovement]:
+        """
+        Obtener movimiento por ID bloqueando la fila (SELECT ... FOR UPDATE).
+        Evita que dos reversiones concurrentes del mismo movimiento pasen la validación.
+        """
+        result = await self.db.execute(
+            select(InventoryMovement)
+            .where(and_(InventoryMovement.id == movement_id, InventoryMovement.business_id == business_id))
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+
     async def get_by_item(
         self,
         item_id: int,
@@ -69,6 +106,7 @@ class InventoryMovementsRepository:
             select(InventoryMovement)
             .options(
                 selectinload(InventoryMovement.created_by),
+                raiseload("*", sql_only=True),
             )
             .where(
                 and_(
@@ -82,35 +120,138 @@ class InventoryMovementsRepository:
         )
         return list(result.scalars().all())
 
-    async def get_by_business(
-        self,
+    @staticmethod
+    def _by_business_query(
         business_id: int,
-        skip: int = 0,
-        limit: int = 100,
-        movement_type: Optional[MovementType] = None,
-    ) -> List[InventoryMovement]:
-        """Obtener todos los movimientos del negocio con paginación"""
+        skip: int,
+        limit: int,
+        movement_type: Optional[MovementType],
+    ):
+        """Consulta de movimientos del negocio (filtros, orden y paginación)"""
+        # Relaciones usadas por fila cargadas en bloque; el resto no puede cargarse perezosamente
         query = select(InventoryMovement).options(
             selectinload(InventoryMovement.inventory_item),
             selectinload(InventoryMovement.created_by),
+            raiseload("*", sql_only=True),
         ).where(InventoryMovement.business_id == business_id)
 
         if movement_type:
             query = query.where(InventoryMovement.movement_type == movement_type)
 
-        query = query.order_by(desc(InventoryMovement.created_at)).offset(skip).limit(limit)
+        return query.order_by(desc(InventoryMovement.created_at)).offset(skip).limit(limit)
 
-        result = await self.db.execute(query)
+    async def get_by_business(
+        self,
+        business_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        movement_type: Optional[MovementType] = None,
+    ) -> List[InventoryMovement]:
+        """Obtener todos los movimientos del negocio con paginación"""
+        result = await self.db.execute(
+            self._by_business_query(business_id, skip, limit, movement_type)
+        )
         return list(result.scalars().all())
 
+    async def stream_by_business(
+        self,
+        business_id: int,
+        skip: int = 0,
+        limit: int = 1000,
+        movement_type: Optional[MovementType] = None,
+        batch_size: int = 500,
+    ) -> AsyncIterator[List[InventoryMovement]]:
+        """
+        Recorre los movimientos del negocio en lotes de batch_size usando un
+        cursor del servidor, sin materializar todo el resultado en memoria.
+        Las relaciones se cargan en bloque por lote.
+        """
+        query = self._by_business_query(business_id, skip, limit, movement_type)
+        result = await self.db.stream_scalars(query.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield partition
+
     async def mark_as_reverted(
         self,
         movement: InventoryMovement,
         reverting_movement_id: int,
+        commit: bool = True,
     ) -> InventoryMovement:
-        """Marcar un movimiento como revertido"""
+        """
+        Marcar un movimiento como revertido.
+
+        Con commit=False solo hace flush; el llamador confirma la transacción.
+        """
         movement.reverted = True
         movement.reverted_by_movement_id = reverting_movement_id
-        await self.db.commit()
-        await self.db.refresh(movement)
+        if commit:
+            await self.db.commit()
+            await self.db.refresh(movement)
+        else:
+            await self.db.flush()
         return movement
+
+    async def revert_atomic(
+        self,
+        original: InventoryMovement,
+        created_by_user_id: Optional[int],
+        reason: str,
+    ) -> InventoryMovement:
+        """
+        Revierte un movimiento en una sola sentencia y un único commit:
+        ajusta el stock del ítem, inserta el movimiento REVERT (cantidad inversa)
+        y marca el original como revertido, encadenando tres CTEs con RETURNING.
+
+        El llamador valida antes que el movimiento no esté revertido y que el
+        stock resultante no sea negativo.
+        """
+        upd_item = (
+            update(InventoryItem)
+            .where(and_(
+                InventoryItem.id == original.inventory_item_id,
+                InventoryItem.business_id == original.business_id,
+            ))
+            .values(quantity_in_stock=InventoryItem.quantity_in_stock - original.quantity)
+            .returning(InventoryItem.id, InventoryItem.business_id)
+            .cte("upd_item")
+        )
+        ins = (
+            insert(InventoryMovement)
+            .from_select(
+                [
+                    "inventory_item_id",
+                    "business_id",
+                    "created_by_user_id",
+                    "movement_type",
+                    "quantity",
+                    "reason",
+                    "reference_id",
+                    "reverted",
+                ],
+                select(
+                    upd_item.c.id,
+                    upd_item.c.business_id,
+                    literal(created_by_user_id, InventoryMovement.created_by_user_id.type),
+                    literal(_REVERT, InventoryMovement.movement_type.type),
+                    literal(-original.quantity, InventoryMovement.quantity.type),
+                    literal(reason, InventoryMovement.reason.type),
+                    literal(original.id, InventoryMovement.reference_id.type),
+                    literal(False),
+                ),
+            )
+            .returning(*InventoryMovement.__table__.c)
+            .cte("ins")
+        )
+        mark_original = (
+            update(InventoryMovement)
+            .where(InventoryMovement.id == original.id)
+            .values(reverted=True, reverted_by_movement_id=select(ins.c.id).scalar_subquery())
+            .returning(InventoryMovement.id)
+            .cte("mark_original")
+        )
+        result = await self.db.execute(
+            select(aliased(InventoryMovement, ins)).add_cte(mark_original)
+        )
+        reverting_movement = result.scalar_one()
+        await self.db.commit()
+        return reverting_movement
@@ -6,12 +6,20 @@ from typing import List, Optional
 from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, joinedload, aliased
+from sqlalchemy.engine import Row
 from sqlalchemy.sql import func
 from app.models.inventory.inventory_transfer_model import InventoryTransfer, TransferItem
+from app.models.inventory.inventory_item_model import InventoryItem
+from app.models.business.business_model import Business
 from app.models.inventory.inventory_enums import TransferStatus
 
 
+# Columnas que cambian al actualizar el estado (las de servidor incluidas); solo
+# estas se recargan, las relaciones ya cargadas del traslado se conservan
+_STATUS_CHANGE_ATTRS = ["status", "updated_at", "completed_at"]
+
+
 class InventoryTransfersRepository:
     """
     Repositorio para gestionar operaciones de InventoryTransfer y TransferItem.
@@ -27,67 +35,119 @@ class InventoryTransfersRepository:
         created_by_user_id: int,
         notes: Optional[str],
         items: List[dict],  # [{"inventory_item_id": int, "quantity": Decimal, "notes": str}]
+        commit: bool = True,
     ) -> InventoryTransfer:
         """
         Crear un nuevo traslado de inventario con sus ítems.
 
+        El traslado y sus ítems se insertan en un solo flush; los IDs y los valores
+        por defecto del servidor (created_at, updated_at) vuelven por RETURNING,
+        así que no hace falta refrescar ni volver a consultar el traslado.
+        Con commit=False solo hace flush; el llamador confirma la transacción.
+
         Args:
             from_business_id: ID del negocio origen
             to_business_id: ID del negocio destino
             created_by_user_id: ID del usuario que crea el traslado
             notes: Notas del traslado
             items: Lista de ítems a trasladar
+            commit: Confirmar la transacción
 
         Returns:
-            InventoryTransfer creado con sus ítems
+            InventoryTransfer creado con sus ítems (transfer.items ya cargado)
         """
-        # Crear el traslado
         transfer = InventoryTransfer(
             from_business_id=from_business_id,
             to_business_id=to_business_id,
             created_by_user_id=created_by_user_id,
-            status=TransferStatus.PENDING.value,
+            status=TransferStatus.PENDING,
             notes=notes,
+            items=[
+                TransferItem(
+                    inventory_item_id=item_data["inventory_item_id"],
+                    quantity=item_data["quantity"],
+                    notes=item_data.get("notes"),
+                )
+                for item_data in items
+            ],
         )
         self.db.add(transfer)
-        await self.db.flush()  # Flush para obtener el ID del traslado
-
-        # Crear los ítems del traslado
-        for item_data in items:
-            transfer_item = TransferItem(
-                transfer_id=transfer.id,
-                inventory_item_id=item_data["inventory_item_id"],
-                quantity=item_data["quantity"],
-                notes=item_data.get("notes"),
-            )
-            self.db.add(transfer_item)
-
-        await self.db.commit()
-        await self.db.refresh(transfer)
+        if commit:
+            await self.db.commit()
+        else:
+            await self.db.flush()
         return transfer
 
-    async def get_by_id(self, transfer_id: int) -> Optional[InventoryTransfer]:
-        """Obtener traslado por ID con todas las relaciones"""
-        result = await self.db.execute(
-            select(InventoryTransfer)
-            .options(
-                selectinload(InventoryTransfer.from_business),
-                selectinload(InventoryTransfer.to_business),
-                selectinload(InventoryTransfer.created_by),
-                selectinload(InventoryTransfer.items).selectinload(TransferItem.inventory_item),
+    async def get_by_id(
+        self,
+        transfer_id: int,
+        for_update: bool = False,
+        with_items: bool = True,
+    ) -> Optional[InventoryTransfer]:
+        """
+        Obtener traslado por ID con todas las relaciones.
+
+        Con for_update=True bloquea la fila del traslado (FOR UPDATE OF inventory_transfers):
+        dos aceptaciones concurrentes no pueden ver ambas el estado PENDING.
+        Con with_items=False no carga los ítems (ver get_item_rows). Con ítems, del
+        ítem de inventario solo se traen las columnas que se usan (nombre y unidad).
+        """
+        options = [
+            joinedload(InventoryTransfer.from_business),
+            joinedload(InventoryTransfer.to_business),
+            joinedload(InventoryTransfer.created_by),
+        ]
+        if with_items:
+            options.append(
+                selectinload(InventoryTransfer.items)
+                .selectinload(TransferItem.inventory_item)
+                .load_only(InventoryItem.name, InventoryItem.unit_of_measure)
             )
+        query = (
+            select(InventoryTransfer)
+            .options(*options)
             .where(InventoryTransfer.id == transfer_id)
         )
+        if for_update:
+            # Solo la tabla del traslado: created_by va por LEFT JOIN y no admite FOR UPDATE
+            query = query.with_for_update(of=InventoryTransfer).execution_options(populate_existing=True)
+        result = await self.db.execute(query)
         return result.scalar_one_or_none()
 
+    async def get_item_rows(self, transfer_id: int) -> List[Row]:
+        """
+        Obtener los ítems de un traslado como filas planas (sin instanciar objetos ORM),
+        con el nombre del ítem de inventario resuelto en el mismo SELECT (JOIN).
+        Las claves de cada fila coinciden con los campos de TransferItemResponse.
+        """
+        result = await self.db.execute(
+            select(
+                TransferItem.id,
+                TransferItem.transfer_id,
+                TransferItem.inventory_item_id,
+                InventoryItem.name.label("inventory_item_name"),
+                TransferItem.quantity,
+                TransferItem.notes,
+            )
+            .join(InventoryItem, InventoryItem.id == TransferItem.inventory_item_id)
+            .where(TransferItem.transfer_id == transfer_id)
+            .order_by(TransferItem.id)
+        )
+        return list(result.all())
+
     async def get_transfers_for_business(
         self,
         business_id: int,
         status_filter: Optional[TransferStatus] = None,
         direction: Optional[str] = None,  # "outgoing", "incoming", None = both
-    ) -> List[InventoryTransfer]:
+    ) -> List[Row]:
         """
-        Obtener traslados de un negocio.
+        Obtener traslados de un negocio como filas planas para el listado.
+
+        Una sola consulta: los nombres de ambos negocios por JOIN y la cantidad
+        de ítems con una subconsulta COUNT correlacionada; no se cargan los ítems
+        ni se instancian objetos ORM. Las claves de cada fila coinciden con los
+        campos de TransferListResponse.
 
         Args:
             business_id: ID del negocio
@@ -95,12 +155,30 @@ class InventoryTransfersRepository:
             direction: "outgoing" (enviados), "incoming" (recibidos), None (ambos)
 
         Returns:
-            Lista de traslados
+            Lista de filas de traslados
         """
-        query = select(InventoryTransfer).options(
-            selectinload(InventoryTransfer.from_business),
-            selectinload(InventoryTransfer.to_business),
-            selectinload(InventoryTransfer.items).selectinload(TransferItem.inventory_item),
+        from_business = aliased(Business)
+        to_business = aliased(Business)
+        items_count = (
+            select(func.count(TransferItem.id))
+            .where(TransferItem.transfer_id == InventoryTransfer.id)
+            .correlate(InventoryTransfer)
+            .scalar_subquery()
+        )
+        query = (
+            select(
+                InventoryTransfer.id,
+                InventoryTransfer.from_business_id,
+                from_business.name.label("from_business_name"),
+                InventoryTransfer.to_business_id,
+                to_business.name.label("to_business_name"),
+                InventoryTransfer.status,
+                items_count.label("items_count"),
+                InventoryTransfer.created_at,
+                InventoryTransfer.completed_at,
+            )
+            .join(from_business, from_business.id == InventoryTransfer.from_business_id)
+            .join(to_business, to_business.id == InventoryTransfer.to_business_id)
         )
 
         # Filtrar por dirección
@@ -123,7 +201,7 @@ class InventoryTransfersRepository:
         query = query.order_by(InventoryTransfer.created_at.desc())
 
         result = await self.db.execute(query)
-        return list(result.scalars().all())
+        return list(result.all())
 
     async def update_status(
         self,
@@ -147,7 +225,7 @@ class InventoryTransfersRepository:
             transfer.completed_at = func.now()
 
         await self.db.commit()
-        await self.db.refresh(transfer)
+        await self.db.refresh(transfer, _STATUS_CHANGE_ATTRS)
         return transfer
 
     async def cancel_transfer(self, transfer: InventoryTransfer) -> InventoryTransfer:
@@ -162,5 +240,5 @@ class InventoryTransfersRepository:
         """
         transfer.status = TransferStatus.CANCELLED.value
         await self.db.commit()
-        await self.db.refresh(transfer)
+        await self.db.refresh(transfer, _STATUS_CHANGE_ATTRS)
         return transfer
@@ -1,17 +1,175 @@
 """
 Repositorio para operaciones de Modifiers en la base de datos.
 """
-from typing import List, Optional
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from sqlalchemy.orm import selectinload
+from sqlalchemy.engine import Row
+from sqlalchemy import select, insert, exists, and_, bindparam
+from sqlalchemy.orm import selectinload, joinedload, raiseload, with_expression
+from sqlalchemy.sql import func
 from app.models.modifiers.modifier_model import (
     ModifierGroup,
     Modifier,
     ModifierInventoryItem,
     ProductModifier,
 )
+from app.models.products.product_model import Product, ProductIngredient
+from app.repositories import updates
+
+
+# Caché en proceso de pertenencia grupo → negocio: (group_id, business_id) -> vence (monotonic).
+# Solo se guardan aciertos: un grupo nunca cambia de negocio ni se elimina por la API,
+# así que un par confirmado no queda obsoleto; el TTL acota el caso de borrado en cascada.
+_GROUP_OWNERSHIP_TTL_SECONDS = 30.0
+_GROUP_OWNERSHIP_MAXSIZE = 1024
+_group_ownership: Dict[Tuple[int, int], float] = {}
+
+
+def _with_modifiers_count():
+    """Opción de carga: ModifierGroup.modifiers_count por subconsulta correlacionada"""
+    return with_expression(
+        ModifierGroup.modifiers_count,
+        select(func.count(Modifier.id))
+        .where(Modifier.modifier_group_id == ModifierGroup.id)
+        .correlate(ModifierGroup)
+        .scalar_subquery(),
+    )
+
+
+# Sentencias de consultas frecuentes, cacheadas con lru_cache (ver users_repository).
+_GROUP_IN_BUSINESS = and_(
+    ModifierGroup.id == bindparam("group_id"),
+    ModifierGroup.business_id == bindparam("business_id"),
+)
+
+
+@lru_cache(maxsize=None)
+def _modifier_group_exists_stmt():
+    return select(ModifierGroup.id).where(_GROUP_IN_BUSINESS)
+
+
+@lru_cache(maxsize=None)
+def _get_modifier_group_with_count_stmt():
+    return select(ModifierGroup).options(_with_modifiers_count()).where(_GROUP_IN_BUSINESS)
+
+
+@lru_cache(maxsize=None)
+def _get_modifier_group_with_name_check_stmt():
+    name_taken = exists().where(
+        and_(
+            Modifier.modifier_group_id == ModifierGroup.id,
+            Modifier.name == bindparam("name"),
+        )
+    ).correlate(ModifierGroup)
+    return select(ModifierGroup, name_taken.label("name_taken")).where(_GROUP_IN_BUSINESS)
+
+
+@lru_cache(maxsize=None)
+def _get_modifier_by_id_stmt():
+    return (
+        select(Modifier)
+        .options(
+            joinedload(Modifier.modifier_group),
+            selectinload(Modifier.inventory_items).joinedload(ModifierInventoryItem.inventory_item),
+            raiseload("*", sql_only=True),
+        )
+        .where(Modifier.id == bindparam("modifier_id"))
+    )
+
+
+@lru_cache(maxsize=None)
+def _get_modifiers_by_group_stmt(active_only: bool):
+    # Proyección directa de las columnas del listado: sin hidratar objetos ORM
+    items_count = (
+        select(func.count(ModifierInventoryItem.id))
+        .where(ModifierInventoryItem.modifier_id == Modifier.id)
+        .correlate(Modifier)
+        .scalar_subquery()
+    )
+    query = (
+        select(
+            Modifier.id,
+            Modifier.modifier_group_id,
+            ModifierGroup.name.label("modifier_group_name"),
+            Modifier.name,
+            Modifier.price_extra,
+            Modifier.is_active,
+            items_count.label("items_count"),
+        )
+        .join(ModifierGroup, Modifier.modifier_group_id == ModifierGroup.id)
+        .where(Modifier.modifier_group_id == bindparam("modifier_group_id"))
+    )
+    if active_only:
+        query = query.where(Modifier.is_active == True)
+    return query.order_by(Modifier.name)
+
+
+@lru_cache(maxsize=None)
+def _get_product_modifier_stmt():
+    return select(ProductModifier).where(
+        and_(
+            ProductModifier.product_id == bindparam("product_id"),
+            ProductModifier.modifier_id == bindparam("modifier_id"),
+        )
+    )
+
+
+@lru_cache(maxsize=None)
+def _get_assignment_context_stmt():
+    # Anclada en el producto (filtrado por negocio): sin fila = producto inexistente;
+    # el modificador y su grupo entran por LEFT JOIN, así que vienen en NULL si no existe
+    already_assigned = exists().where(
+        and_(
+            ProductModifier.product_id == bindparam("product_id"),
+            ProductModifier.modifier_id == bindparam("modifier_id"),
+        )
+    )
+    return (
+        select(
+            Product.name.label("product_name"),
+            Modifier.id.label("modifier_id"),
+            Modifier.name.label("modifier_name"),
+            Modifier.price_extra,
+            ModifierGroup.name.label("modifier_group_name"),
+            ModifierGroup.business_id.label("modifier_business_id"),
+            already_assigned.label("already_assigned"),
+        )
+        .select_from(Product)
+        .outerjoin(Modifier, Modifier.id == bindparam("modifier_id"))
+        .outerjoin(ModifierGroup, ModifierGroup.id == Modifier.modifier_group_id)
+        .where(
+            and_(Product.id == bindparam("product_id"), Product.business_id == bindparam("business_id"))
+        )
+    )
+
+
+@lru_cache(maxsize=None)
+def _get_missing_ingredient_ids_stmt():
+    product_item_ids = select(ProductIngredient.inventory_item_id).where(
+        ProductIngredient.product_id == bindparam("product_id")
+    )
+    return select(ModifierInventoryItem.inventory_item_id).where(
+        and_(
+            ModifierInventoryItem.modifier_id == bindparam("modifier_id"),
+            ModifierInventoryItem.inventory_item_id.not_in(product_item_ids),
+        )
+    )
+
+
+@lru_cache(maxsize=None)
+def _get_modifiers_for_product_stmt():
+    return (
+        select(ProductModifier)
+        .options(
+            selectinload(ProductModifier.modifier)
+            .joinedload(Modifier.modifier_group),
+            raiseload("*", sql_only=True),
+        )
+        .where(ProductModifier.product_id == bindparam("product_id"))
+    )
 
 
 class ModifiersRepository:
@@ -45,19 +203,63 @@ class ModifiersRepository:
         await self.db.refresh(group)
         return group
 
-    async def get_modifier_group_by_id(
+    async def modifier_group_exists(self, group_id: int, business_id: int) -> bool:
+        """
+        Verificar que el grupo exista y pertenezca al negocio.
+        Los aciertos se recuerdan unos segundos (ver _group_ownership) y evitan el SELECT.
+        """
+        key = (group_id, business_id)
+        now = time.monotonic()
+        expires_at = _group_ownership.get(key)
+        if expires_at is not None and expires_at > now:
+            return True
+
+        result = await self.db.execute(
+            _modifier_group_exists_stmt(),
+            {"group_id": group_id, "business_id": business_id},
+        )
+        if result.scalar_one_or_none() is None:
+            _group_ownership.pop(key, None)
+            return False
+
+        if key not in _group_ownership and len(_group_ownership) >= _GROUP_OWNERSHIP_MAXSIZE:
+            # Descartar la entrada más antigua (los dict conservan el orden de inserción)
+            del _group_ownership[next(iter(_group_ownership))]
+        _group_ownership[key] = now + _GROUP_OWNERSHIP_TTL_SECONDS
+        return True
+
+    async def get_modifier_group_with_count(
         self,
         group_id: int,
         business_id: int,
     ) -> Optional[ModifierGroup]:
-        """Obtener grupo de modificadores por ID"""
+        """
+        Obtener grupo de modificadores por ID con modifiers_count,
+        contado en el mismo SELECT (no se carga la colección).
+        """
         result = await self.db.execute(
-            select(ModifierGroup)
-            .options(selectinload(ModifierGroup.modifiers))
-            .where(and_(ModifierGroup.id == group_id, ModifierGroup.business_id == business_id))
+            _get_modifier_group_with_count_stmt(),
+            {"group_id": group_id, "business_id": business_id},
         )
         return result.scalar_one_or_none()
 
+    async def get_modifier_group_with_name_check(
+        self,
+        group_id: int,
+        business_id: int,
+        name: str,
+    ) -> Optional[Tuple[ModifierGroup, bool]]:
+        """
+        Obtener grupo de modificadores por ID y, en el mismo SELECT (EXISTS),
+        si ya tiene un modificador con ese nombre.
+        Devuelve (grupo, name_taken) o None si el grupo no existe en el negocio.
+        """
+        result = await self.db.execute(
+            _get_modifier_group_with_name_check_stmt(),
+            {"group_id": group_id, "business_id": business_id, "name": name},
+        )
+        return result.one_or_none()
+
     async def get_all_modifier_groups(
         self,
         business_id: int,
@@ -65,10 +267,14 @@ class ModifiersRepository:
         limit: int = 100,
         active_only: bool = False,
     ) -> List[ModifierGroup]:
-        """Obtener todos los grupos de modificadores de un negocio"""
-        query = select(ModifierGroup).options(
-            selectinload(ModifierGroup.modifiers)
-        ).where(ModifierGroup.business_id == business_id)
+        """
+        Obtener todos los grupos de modificadores de un negocio.
+        modifiers_count sale de una subconsulta en el mismo SELECT,
+        sin cargar las colecciones de modificadores.
+        """
+        query = select(ModifierGroup).options(_with_modifiers_count()).where(
+            ModifierGroup.business_id == business_id
+        )
 
         if active_only:
             query = query.where(ModifierGroup.is_active == True)
@@ -78,10 +284,14 @@ class ModifiersRepository:
         result = await self.db.execute(query)
         return list(result.scalars().all())
 
-    async def update_modifier_group(self, group: ModifierGroup) -> ModifierGroup:
-        """Actualizar un grupo de modificadores"""
+    async def update_modifier_group(
+        self,
+        group: ModifierGroup,
+        values: Dict[str, Any],
+    ) -> ModifierGroup:
+        """Actualizar un grupo de modificadores (solo las columnas de values)"""
+        await updates.update_columns(self.db, ModifierGroup, group, values)
         await self.db.commit()
-        await self.db.refresh(group)
         return group
 
     # ============= MODIFIER METHODS =============
@@ -104,51 +314,48 @@ class ModifiersRepository:
         await self.db.flush()
         return modifier
 
-    async def add_modifier_inventory_item(
+    async def bulk_add_modifier_inventory_items(
         self,
         modifier_id: int,
-        inventory_item_id: int,
-        quantity: Decimal,
-    ) -> ModifierInventoryItem:
-        """Agregar un ítem de inventario a un modificador"""
-        item = ModifierInventoryItem(
-            modifier_id=modifier_id,
-            inventory_item_id=inventory_item_id,
-            quantity=quantity,
+        items: List[dict],
+    ) -> List[ModifierInventoryItem]:
+        """
+        Agregar varios ítems de inventario a un modificador en un solo INSERT de varias filas
+        (... RETURNING). Cada ítem trae inventory_item_id y quantity. No confirma la
+        transacción (solo ejecuta); los ítems devueltos ya tienen ID.
+        """
+        if not items:
+            return []
+        result = await self.db.execute(
+            insert(ModifierInventoryItem).returning(ModifierInventoryItem),
+            [{"modifier_id": modifier_id, **item} for item in items],
         )
-        self.db.add(item)
-        await self.db.flush()
-        return item
+        return list(result.scalars().all())
 
     async def get_modifier_by_id(self, modifier_id: int) -> Optional[Modifier]:
-        """Obtener modificador por ID con todas sus relaciones"""
-        result = await self.db.execute(
-            select(Modifier)
-            .options(
-                selectinload(Modifier.modifier_group),
-                selectinload(Modifier.inventory_items).selectinload(ModifierInventoryItem.inventory_item),
-            )
-            .where(Modifier.id == modifier_id)
-        )
+        """
+        Obtener modificador por ID con todas sus relaciones.
+        El grupo viene en el mismo SELECT (JOIN); los ítems, con su ítem de inventario,
+        en un segundo SELECT. Cualquier otra relación accedida falla en lugar de
+        disparar un SELECT adicional.
+        """
+        result = await self.db.execute(_get_modifier_by_id_stmt(), {"modifier_id": modifier_id})
         return result.scalar_one_or_none()
 
     async def get_modifiers_by_group(
         self,
         modifier_group_id: int,
         active_only: bool = False,
-    ) -> List[Modifier]:
-        """Obtener todos los modificadores de un grupo"""
-        query = select(Modifier).options(
-            selectinload(Modifier.inventory_items).selectinload(ModifierInventoryItem.inventory_item)
-        ).where(Modifier.modifier_group_id == modifier_group_id)
-
-        if active_only:
-            query = query.where(Modifier.is_active == True)
-
-        query = query.order_by(Modifier.name)
-
-        result = await self.db.execute(query)
-        return list(result.scalars().all())
+    ) -> List[Dict[str, Any]]:
+        """
+        Obtener el listado de modificadores de un grupo.
+        Devuelve filas con las columnas del listado, el nombre del grupo y la cantidad de ítems.
+        """
+        result = await self.db.execute(
+            _get_modifiers_by_group_stmt(active_only),
+            {"modifier_group_id": modifier_group_id},
+        )
+        return [dict(row) for row in result.mappings().all()]
 
     async def modifier_name_exists_in_group(
         self,
@@ -170,10 +377,14 @@ class ModifiersRepository:
         result = await self.db.execute(query)
         return result.scalar_one_or_none() is not None
 
-    async def update_modifier(self, modifier: Modifier) -> Modifier:
-        """Actualizar un modificador"""
+    async def update_modifier(
+        self,
+        modifier: Modifier,
+        values: Dict[str, Any],
+    ) -> Modifier:
+        """Actualizar un modificador (solo las columnas de values)"""
+        await updates.update_columns(self.db, Modifier, modifier, values)
         await self.db.commit()
-        await self.db.refresh(modifier)
         return modifier
 
     async def delete_modifier_inventory_items(self, modifier: Modifier):
@@ -206,29 +417,60 @@ class ModifiersRepository:
     ) -> Optional[ProductModifier]:
         """Verificar si un modificador está asignado a un producto"""
         result = await self.db.execute(
-            select(ProductModifier).where(
-                and_(
-                    ProductModifier.product_id == product_id,
-                    ProductModifier.modifier_id == modifier_id,
-                )
-            )
+            _get_product_modifier_stmt(),
+            {"product_id": product_id, "modifier_id": modifier_id},
         )
         return result.scalar_one_or_none()
 
-    async def get_modifiers_for_product(self, product_id: int) -> List[ProductModifier]:
-        """Obtener todos los modificadores asignados a un producto"""
+    async def get_assignment_context(
+        self,
+        product_id: int,
+        modifier_id: int,
+        business_id: int,
+    ) -> Optional[Row]:
+        """
+        Datos para validar la asignación de un modificador a un producto en una sola consulta:
+        nombre del producto, modificador con el negocio de su grupo y si ya está asignado.
+
+            SELECT p.name, m.id, m.name, m.price_extra, g.name, g.business_id,
+                   EXISTS (SELECT 1 FROM product_modifiers WHERE ...) AS already_assigned
+            FROM products p
+            LEFT JOIN modifiers m ON m.id = :modifier_id
+            LEFT JOIN modifier_groups g ON g.id = m.modifier_group_id
+            WHERE p.id = :product_id AND p.business_id = :business_id
+
+        Retorna None si el producto no existe en el negocio; modifier_id es None
+        si el modificador no existe.
+        """
         result = await self.db.execute(
-            select(ProductModifier)
-            .options(
-                selectinload(ProductModifier.modifier)
-                .selectinload(Modifier.modifier_group),
-                selectinload(ProductModifier.modifier)
-                .selectinload(Modifier.inventory_items),
-            )
-            .where(ProductModifier.product_id == product_id)
+            _get_assignment_context_stmt(),
+            {"product_id": product_id, "modifier_id": modifier_id, "business_id": business_id},
+        )
+        return result.one_or_none()
+
+    async def get_missing_ingredient_ids(
+        self,
+        modifier_id: int,
+        product_id: int,
+    ) -> List[int]:
+        """
+        Ítems de inventario del modificador que no están entre los ingredientes del producto.
+        La diferencia se calcula en SQL: lista vacía = modificador compatible.
+        """
+        result = await self.db.execute(
+            _get_missing_ingredient_ids_stmt(),
+            {"modifier_id": modifier_id, "product_id": product_id},
         )
         return list(result.scalars().all())
 
+    async def get_modifiers_for_product(self, product_id: int) -> List[ProductModifier]:
+        """
+        Obtener todos los modificadores asignados a un producto,
+        con el modificador y su grupo resueltos en un segundo SELECT (JOIN).
+        """
+        result = await self.db.execute(_get_modifiers_for_product_stmt(), {"product_id": product_id})
+        return list(result.scalars().all())
+
     async def remove_modifier_from_product(
         self,
         product_id: int,
@@ -236,12 +478,8 @@ class ModifiersRepository:
     ):
         """Desasignar un modificador de un producto"""
         result = await self.db.execute(
-            select(ProductModifier).where(
-                and_(
-                    ProductModifier.product_id == product_id,
-                    ProductModifier.modifier_id == modifier_id,
-                )
-            )
+            _get_product_modifier_stmt(),
+            {"product_id": product_id, "modifier_id": modifier_id},
         )
         product_modifier = result.scalar_one_or_none()
         if product_modifier:
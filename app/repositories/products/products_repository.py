@@ -1,12 +1,30 @@
 """
 Repositorio para operaciones de Product en la base de datos.
 """
-from typing import List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
 from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, insert, and_, func, bindparam
+from sqlalchemy.orm import selectinload, raiseload, with_expression
+from sqlalchemy.orm.attributes import set_committed_value
 from app.models.products.product_model import Product, ProductIngredient
+from app.models.inventory.inventory_item_model import InventoryItem
+from app.repositories import updates
+
+
+# Sentencias de consultas frecuentes, cacheadas con lru_cache (ver users_repository).
+@lru_cache(maxsize=None)
+def _get_by_id_stmt(with_ingredients: bool):
+    query = select(Product).where(
+        and_(Product.id == bindparam("product_id"), Product.business_id == bindparam("business_id"))
+    )
+    if with_ingredients:
+        query = query.options(
+            selectinload(Product.ingredients).selectinload(ProductIngredient.inventory_item),
+            raiseload("*", sql_only=True),
+        )
+    return query
 
 
 class ProductsRepository:
@@ -28,8 +46,15 @@ class ProductsRepository:
         profit_margin_percentage: Optional[Decimal],
         profit_amount: Optional[Decimal],
         image_url: Optional[str],
+        ingredients: List[dict],
+        inventory_items: Dict[int, InventoryItem],
     ) -> Product:
-        """Crear un nuevo producto"""
+        """
+        Crear un nuevo producto con sus ingredientes (un INSERT para el producto y uno
+        de varias filas para los ingredientes). No confirma la transacción; el producto
+        queda con product.ingredients ya poblado (sin recargar), cada ingrediente con su
+        ítem de inventario tomado de inventory_items ({id: ítem}, ya cargados).
+        """
         product = Product(
             business_id=business_id,
             name=name,
@@ -43,36 +68,49 @@ class ProductsRepository:
         )
         self.db.add(product)
         await self.db.flush()
+
+        new_ingredients = await self.add_ingredients_bulk(product.id, ingredients, inventory_items)
+        set_committed_value(product, "ingredients", new_ingredients)
         return product
 
-    async def add_ingredient(
+    async def add_ingredients_bulk(
         self,
         product_id: int,
-        inventory_item_id: int,
-        quantity: Decimal,
-        unit_cost: Decimal,
-        total_cost: Decimal,
-    ) -> ProductIngredient:
-        """Agregar un ingrediente a un producto"""
-        ingredient = ProductIngredient(
-            product_id=product_id,
-            inventory_item_id=inventory_item_id,
-            quantity=quantity,
-            unit_cost=unit_cost,
-            total_cost=total_cost,
+        ingredients: List[dict],
+        inventory_items: Dict[int, InventoryItem],
+    ) -> List[ProductIngredient]:
+        """
+        Agregar varios ingredientes a un producto en un solo INSERT de varias filas
+        (... RETURNING). Cada ingrediente trae inventory_item_id, quantity, unit_cost y
+        total_cost. No confirma la transacción (solo ejecuta); los ingredientes devueltos
+        ya tienen ID y su ítem de inventario asignado desde inventory_items, sin consultarlo.
+        """
+        if not ingredients:
+            return []
+        result = await self.db.execute(
+            insert(ProductIngredient).returning(ProductIngredient),
+            [{"product_id": product_id, **ingredient} for ingredient in ingredients],
         )
-        self.db.add(ingredient)
-        await self.db.flush()
-        return ingredient
+        new_ingredients = list(result.scalars().all())
+        for ingredient in new_ingredients:
+            set_committed_value(ingredient, "inventory_item", inventory_items[ingredient.inventory_item_id])
+        return new_ingredients
 
-    async def get_by_id(self, product_id: int, business_id: int) -> Optional[Product]:
-        """Obtener producto por ID con ingredientes"""
+    async def get_by_id(
+        self,
+        product_id: int,
+        business_id: int,
+        with_ingredients: bool = True,
+    ) -> Optional[Product]:
+        """
+        Obtener producto por ID con ingredientes y su ítem de inventario (un SELECT
+        adicional por nivel, sin importar cuántos ingredientes tenga). Cualquier otra
+        relación accedida falla en lugar de disparar un SELECT adicional.
+        Con with_ingredients=False solo carga el producto (validaciones de existencia).
+        """
         result = await self.db.execute(
-            select(Product)
-            .options(
-                selectinload(Product.ingredients).selectinload(ProductIngredient.inventory_item),
-            )
-            .where(and_(Product.id == product_id, Product.business_id == business_id))
+            _get_by_id_stmt(with_ingredients),
+            {"product_id": product_id, "business_id": business_id},
         )
         return result.scalar_one_or_none()
 
@@ -84,9 +122,19 @@ class ProductsRepository:
         active_only: bool = False,
         category: Optional[str] = None,
     ) -> List[Product]:
-        """Obtener todos los productos de un negocio"""
+        """
+        Obtener todos los productos de un negocio (sin ingredientes).
+        Product.ingredients_count se calcula en el mismo SELECT con una subconsulta correlacionada.
+        """
+        ingredients_count = (
+            select(func.count(ProductIngredient.id))
+            .where(ProductIngredient.product_id == Product.id)
+            .correlate(Product)
+            .scalar_subquery()
+        )
         query = select(Product).options(
-            selectinload(Product.ingredients)
+            with_expression(Product.ingredients_count, ingredients_count),
+            raiseload("*", sql_only=True),
         ).where(Product.business_id == business_id)
 
         if active_only:
@@ -100,18 +148,39 @@ class ProductsRepository:
         result = await self.db.execute(query)
         return list(result.scalars().all())
 
-    async def update(self, product: Product) -> Product:
-        """Actualizar un producto"""
-        await self.db.commit()
-        await self.db.refresh(product)
+    async def update_columns(
+        self,
+        product: Product,
+        values: Dict[str, Any],
+        commit: bool = True,
+    ) -> Product:
+        """
+        Actualizar solo las columnas indicadas (ver updates.update_columns).
+        Con commit=False no confirma la transacción.
+        """
+        await updates.update_columns(self.db, Product, product, values)
+        if commit:
+            await self.db.commit()
         return product
 
-    async def delete_ingredients(self, product: Product):
-        """Eliminar todos los ingredientes de un producto"""
+    async def replace_ingredients(
+        self,
+        product: Product,
+        ingredients: List[dict],
+        inventory_items: Dict[int, InventoryItem],
+    ) -> None:
+        """
+        Reemplazar los ingredientes de un producto: elimina los anteriores y crea los
+        nuevos con un solo INSERT. product.ingredients queda con los nuevos (sin recargar).
+        No confirma la transacción.
+        """
         for ingredient in product.ingredients:
             await self.db.delete(ingredient)
         await self.db.flush()
 
+        new_ingredients = await self.add_ingredients_bulk(product.id, ingredients, inventory_items)
+        set_committed_value(product, "ingredients", new_ingredients)
+
     async def commit(self):
         """Hacer commit de los cambios"""
         await self.db.commit()
@@ -2,13 +2,44 @@
 Repositorio para operaciones de Supplier en la base de datos.
 TODOS los queries filtran por business_id (multi-tenant).
 """
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, and_, or_, bindparam
 from sqlalchemy.orm import selectinload
 from app.models.suppliers.supplier_model import Supplier
 
 
+# Sentencias de consultas frecuentes, cacheadas con lru_cache (ver users_repository).
+@lru_cache(maxsize=None)
+def _get_by_id_stmt():
+    return (
+        select(Supplier)
+        .options(selectinload(Supplier.business))
+        .where(
+            and_(Supplier.id == bindparam("supplier_id"), Supplier.business_id == bindparam("business_id"))
+        )
+    )
+
+
+@lru_cache(maxsize=None)
+def _find_conflicts_stmt(check_email: bool, check_tax_id: bool, excluding_supplier: bool):
+    conditions = []
+    if check_email:
+        conditions.append(Supplier.email == bindparam("email"))
+    if check_tax_id:
+        conditions.append(Supplier.tax_id == bindparam("tax_id"))
+    query = select(Supplier.email, Supplier.tax_id).where(
+        and_(
+            Supplier.business_id == bindparam("business_id"),
+            or_(*conditions),
+        )
+    )
+    if excluding_supplier:
+        query = query.where(Supplier.id != bindparam("exclude_id"))
+    return query
+
+
 class SuppliersRepository:
     """
     Repositorio para gestionar operaciones CRUD de Supplier.
@@ -47,9 +78,8 @@ class SuppliersRepository:
     async def get_by_id(self, supplier_id: int, business_id: int) -> Optional[Supplier]:
         """Obtener proveedor por ID (filtrado por business_id)"""
         result = await self.db.execute(
-            select(Supplier)
-            .options(selectinload(Supplier.business))
-            .where(and_(Supplier.id == supplier_id, Supplier.business_id == business_id))
+            _get_by_id_stmt(),
+            {"supplier_id": supplier_id, "business_id": business_id},
         )
         return result.scalar_one_or_none()
 
@@ -71,35 +101,37 @@ class SuppliersRepository:
         result = await self.db.execute(query)
         return list(result.scalars().all())
 
-    async def email_exists(self, email: str, business_id: int, exclude_id: Optional[int] = None) -> bool:
-        """Verificar si un email ya existe para el negocio (excluyendo opcionalmente un ID)"""
-        query = select(Supplier).where(
-            and_(
-                Supplier.email == email,
-                Supplier.business_id == business_id,
-            )
-        )
-
+    async def find_conflicts(
+        self,
+        business_id: int,
+        email: Optional[str] = None,
+        tax_id: Optional[str] = None,
+        exclude_id: Optional[int] = None,
+    ) -> Tuple[bool, bool]:
+        """
+        Verificar en un solo SELECT si el email y/o el tax_id ya existen para el negocio
+        (excluyendo opcionalmente un ID). Los valores None no se verifican.
+        Devuelve (email_existe, tax_id_existe).
+        """
+        if not email and not tax_id:
+            return False, False
+
+        params = {"business_id": business_id}
+        if email:
+            params["email"] = email
+        if tax_id:
+            params["tax_id"] = tax_id
         if exclude_id:
-            query = query.where(Supplier.id != exclude_id)
+            params["exclude_id"] = exclude_id
 
-        result = await self.db.execute(query)
-        return result.scalar_one_or_none() is not None
-
-    async def tax_id_exists(self, tax_id: str, business_id: int, exclude_id: Optional[int] = None) -> bool:
-        """Verificar si un tax_id ya existe para el negocio (excluyendo opcionalmente un ID)"""
-        query = select(Supplier).where(
-            and_(
-                Supplier.tax_id == tax_id,
-                Supplier.business_id == business_id,
-            )
+        result = await self.db.execute(
+            _find_conflicts_stmt(bool(email), bool(tax_id), bool(exclude_id)),
+            params,
         )
-
-        if exclude_id:
-            query = query.where(Supplier.id != exclude_id)
-
-        result = await self.db.execute(query)
-        return result.scalar_one_or_none() is not None
+        rows = result.all()
+        email_taken = bool(email) and any(row.email == email for row in rows)
+        tax_id_taken = bool(tax_id) and any(row.tax_id == tax_id for row in rows)
+        return email_taken, tax_id_taken
 
     async def update(self, supplier: Supplier) -> Supplier:
         """Actualizar proveedor existente"""
@@ -0,0 +1,25 @@
+"""
+Helpers de escritura compartidos por los repositorios.
+"""
+from typing import Any, Dict
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+
+async def update_columns(db: AsyncSession, model, obj, values: Dict[str, Any]) -> None:
+    """
+    UPDATE ... SET <values> RETURNING <columnas cambiadas>, updated_at, sin SELECT
+    posterior. Los valores devueltos (ya con la escala de la columna) se asignan en
+    obj como confirmados; las relaciones cargadas se conservan. No confirma la transacción.
+    """
+    table = model.__table__
+    columns = [table.c[key] for key in values] + [table.c.updated_at]
+    result = await db.execute(
+        update(table)
+        .where(table.c.id == obj.id)
+        .values(**values)
+        .returning(*columns)
+    )
+    for key, value in result.one()._mapping.items():
+        set_committed_value(obj, key, value)
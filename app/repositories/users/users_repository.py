@@ -1,8 +1,62 @@
+from functools import lru_cache
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from sqlalchemy.orm import selectinload
-from typing import Optional, List
+from sqlalchemy import select, update, and_, bindparam
+from sqlalchemy.orm import selectinload, joinedload
+from typing import Any, AsyncIterator, Dict, Optional, List, Tuple
+from datetime import date
+from app.models.business.business_model import Business
 from app.models.users.user_model import User, UserRole
+from app.models.attendance.attendance_model import Attendance
+
+
+# Sentencias de consultas frecuentes, construidas una sola vez (en el primer uso,
+# cuando todos los mappers ya están configurados) y reutilizadas con parámetros.
+# Evita reconstruir el Select en cada llamada y aprovecha el caché de compilación.
+@lru_cache(maxsize=None)
+def _get_by_id_stmt():
+    # Carga del usuario actual en cada request: el negocio (muchos-a-uno, obligatorio)
+    # viaja en el mismo SELECT vía INNER JOIN en lugar de una segunda consulta
+    return (
+        select(User)
+        .options(joinedload(User.business, innerjoin=True))
+        .where(
+            and_(User.id == bindparam("user_id"), User.business_id == bindparam("business_id"))
+        )
+    )
+
+
+@lru_cache(maxsize=None)
+def _email_exists_stmt(excluding_user: bool):
+    query = select(User.id).where(
+        and_(User.email == bindparam("email"), User.business_id == bindparam("business_id"))
+    )
+    if excluding_user:
+        query = query.where(User.id != bindparam("exclude_user_id"))
+    return query
+
+
+@lru_cache(maxsize=None)
+def _get_all_by_business_stmt():
+    # Proyección directa de las columnas de UserResponse: sin hidratar objetos ORM
+    # ni registrarlos en el identity map
+    return (
+        select(
+            User.id,
+            User.business_id,
+            Business.name.label("business_name"),
+            User.email,
+            User.full_name,
+            User.phone,
+            User.document,
+            User.role,
+            User.is_active,
+            User.created_at,
+        )
+        .join(Business, User.business_id == Business.id)
+        .where(User.business_id == bindparam("business_id"))
+        .offset(bindparam("skip"))
+        .limit(bindparam("limit"))
+    )
 
 
 class UsersRepository:
@@ -23,9 +77,13 @@ class UsersRepository:
         role: UserRole = UserRole.CASHIER,
         phone: Optional[str] = None,
         document: Optional[str] = None,
+        commit: bool = True,
     ) -> User:
         """
         Crea un nuevo usuario.
+
+        Con commit=False solo hace flush, para que el llamador confirme
+        la transacción junto con otras escrituras (p. ej. auditoría).
         """
         user = User(
             business_id=business_id,
@@ -37,7 +95,10 @@ class UsersRepository:
             document=document,
         )
         self.db.add(user)
-        await self.db.commit()
+        if commit:
+            await self.db.commit()
+        else:
+            await self.db.flush()
         await self.db.refresh(user)
         return user
 
@@ -46,11 +107,7 @@ class UsersRepository:
         Obtiene un usuario por ID, filtrado por business_id.
         """
         result = await self.db.execute(
-            select(User)
-                .options(selectinload(User.business))            
-                .where(
-                    and_(User.id == user_id, User.business_id == business_id)
-                )
+            _get_by_id_stmt(), {"user_id": user_id, "business_id": business_id}
         )
         return result.scalar_one_or_none()
 
@@ -69,27 +126,108 @@ class UsersRepository:
 
     async def get_all_by_business(
         self, business_id: int, skip: int = 0, limit: int = 100
-    ) -> List[User]:
+    ) -> List[Dict[str, Any]]:
         """
-        Obtiene todos los usuarios de un negocio.
+        Obtiene todos los usuarios de un negocio como filas (dict) con las columnas
+        del listado, incluido el nombre del negocio.
         """
         result = await self.db.execute(
-            select(User)
+            _get_all_by_business_stmt(),
+            {"business_id": business_id, "skip": skip, "limit": limit},
+        )
+        return [dict(row) for row in result.mappings().all()]
+
+    async def stream_by_business(
+        self, business_id: int, skip: int = 0, limit: int = 1000, batch_size: int = 500
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Recorre los usuarios del negocio (mismas filas que get_all_by_business) en
+        lotes de batch_size usando un cursor del servidor, sin materializar todo
+        el resultado en memoria.
+        """
+        result = await self.db.stream(
+            _get_all_by_business_stmt().execution_options(yield_per=batch_size),
+            {"business_id": business_id, "skip": skip, "limit": limit},
+        )
+        async for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+
+    async def get_with_today_attendance(
+        self, user_id: int, business_id: int, today_date: date
+    ) -> Optional[Tuple[User, Optional[Attendance]]]:
+        """
+        Obtiene un usuario del negocio junto con su asistencia del día en una sola consulta
+        (LEFT JOIN, como get_all_with_today_attendance). Retorna None si el usuario no existe.
+        """
+        result = await self.db.execute(
+            select(User, Attendance)
+            .outerjoin(
+                Attendance,
+                and_(
+                    Attendance.employee_id == User.id,
+                    Attendance.business_id == User.business_id,
+                    Attendance.date == today_date,
+                ),
+            )
+            .where(and_(User.id == user_id, User.business_id == business_id))
+        )
+        row = result.one_or_none()
+        return (row[0], row[1]) if row else None
+
+    async def get_all_with_today_attendance(
+        self, business_id: int, today_date: date, skip: int = 0, limit: int = 100
+    ) -> List[Tuple[User, Optional[Attendance]]]:
+        """
+        Obtiene los usuarios de un negocio junto con su asistencia del día en una sola consulta.
+        Cada usuario tiene como máximo un registro por día (uq_employee_date),
+        por lo que el LEFT JOIN no multiplica filas.
+        """
+        result = await self.db.execute(
+            select(User, Attendance)
             .options(selectinload(User.business))
+            .outerjoin(
+                Attendance,
+                and_(
+                    Attendance.employee_id == User.id,
+                    Attendance.business_id == User.business_id,
+                    Attendance.date == today_date,
+                ),
+            )
             .where(User.business_id == business_id)
             .offset(skip)
             .limit(limit)
         )
-        return list(result.scalars().all())
+        return [(user, attendance) for user, attendance in result.all()]
 
-    async def update(self, user: User) -> User:
+    async def update(self, user: User, commit: bool = True) -> User:
         """
         Actualiza un usuario.
+
+        Con commit=False solo hace flush; el llamador confirma la transacción.
         """
-        await self.db.commit()
-        await self.db.refresh(user)
+        if commit:
+            await self.db.commit()
+            await self.db.refresh(user)
+        else:
+            await self.db.flush()
         return user
 
+    async def update_hashed_password(
+        self, user_id: int, current_hash: str, new_hash: str
+    ) -> bool:
+        """
+        Reemplaza el hash de contraseña solo si sigue siendo current_hash
+        (si el usuario cambió la contraseña entretanto, no se pisa) y confirma.
+        Retorna True si se actualizó.
+        """
+        result = await self.db.execute(
+            update(User)
+            .where(and_(User.id == user_id, User.hashed_password == current_hash))
+            .values(hashed_password=new_hash)
+        )
+        await self.db.commit()
+        return result.rowcount > 0
+
     async def email_exists(self, email: str, business_id: int, exclude_user_id: Optional[int] = None) -> bool:
         """
         Verifica si un email ya existe en un negocio.
@@ -99,22 +237,26 @@ class UsersRepository:
             business_id: ID del negocio
             exclude_user_id: ID del usuario a excluir de la búsqueda (útil para actualizaciones)
         """
-        query = select(User.id).where(
-            and_(User.email == email, User.business_id == business_id)
-        )
-
+        params = {"email": email, "business_id": business_id}
         if exclude_user_id is not None:
-            query = query.where(User.id != exclude_user_id)
+            params["exclude_user_id"] = exclude_user_id
 
-        result = await self.db.execute(query)
+        result = await self.db.execute(
+            _email_exists_stmt(exclude_user_id is not None), params
+        )
         return result.scalar_one_or_none() is not None
 
-    async def delete_permanently(self, user: User) -> None:
+    async def delete_permanently(self, user: User, commit: bool = True) -> None:
         """
         Elimina permanentemente un usuario de la base de datos.
+
+        Con commit=False solo hace flush; el llamador confirma la transacción.
         """
         await self.db.delete(user)
-        await self.db.commit()
+        if commit:
+            await self.db.commit()
+        else:
+            await self.db.flush()
 
     async def get_by_document(self, document: str, business_id: int) -> Optional[User]:
         """
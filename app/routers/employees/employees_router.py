@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Query, Depends, Path
+from fastapi.responses import StreamingResponse
 from typing import List, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.config.database import get_db
@@ -60,6 +61,30 @@ async def get_employees(
     return await EmployeesController.get_employees(skip, limit, current_user, db)
 
 
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_employees(
+    skip: int = Query(0, ge=0, description="Número de registros a omitir"),
+    limit: int = Query(1000, ge=1, le=5000, description="Número máximo de registros"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Obtiene los empleados del negocio en formato NDJSON (un empleado por línea).
+
+    Requiere autenticación.
+
+    Pensado para páginas grandes: cada empleado se serializa y envía a medida
+    que se construye, sin armar la lista completa en memoria.
+    """
+    employees = EmployeesController.stream_employees(skip, limit, current_user, db)
+
+    async def ndjson():
+        async for employee in employees:
+            yield employee.model_dump_json() + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
 @router.get("/{employee_id}", response_model=EmployeeResponse)
 async def get_employee(
     employee_id: int = Path(..., description="ID del empleado"),
@@ -4,6 +4,7 @@ Define los endpoints REST para gestión de ítems de inventario.
 """
 from fastapi import APIRouter, Query, Depends, Path
 from typing import List, Optional
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.config.database import get_db
 from app.controllers.inventory.inventory_items_controller import InventoryItemsController
@@ -18,6 +19,10 @@ from app.dependencies.auth_dependencies import (
     get_current_user,
 )
 from app.models.users.user_model import User
+from app.utils.responses import json_list_response
+
+# Serializador de listas (las respuestas ya vienen validadas del servicio)
+_ITEM_LIST_ADAPTER = TypeAdapter(List[InventoryItemResponse])
 
 router = APIRouter(
     prefix="/inventory/items",
@@ -62,9 +67,10 @@ async def get_items(
 
     Solo retorna ítems del mismo business_id (multi-tenant).
     """
-    return await InventoryItemsController.get_all_items(
+    items = await InventoryItemsController.get_all_items(
         skip, limit, active_only, category, supplier_id, current_user, db
     )
+    return json_list_response(_ITEM_LIST_ADAPTER, items)
 
 
 @router.get("/alerts/low-stock", response_model=List[InventoryItemResponse])
@@ -79,7 +85,8 @@ async def get_low_stock_alerts(
 
     Retorna ítems activos con quantity_in_stock < min_stock.
     """
-    return await InventoryItemsController.get_low_stock_alerts(current_user, db)
+    items = await InventoryItemsController.get_low_stock_alerts(current_user, db)
+    return json_list_response(_ITEM_LIST_ADAPTER, items)
 
 
 @router.get("/{item_id}", response_model=InventoryItemResponse)
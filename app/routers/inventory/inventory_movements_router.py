@@ -3,7 +3,9 @@ Router para Movimientos de Inventario.
 Define los endpoints REST para gestión de movimientos de inventario.
 """
 from fastapi import APIRouter, Query, Depends, Path
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.config.database import get_db
 from app.controllers.inventory.inventory_movements_controller import InventoryMovementsController
@@ -16,8 +18,12 @@ from app.dependencies.auth_dependencies import (
     get_current_user,
 )
 from app.models.users.user_model import User
+from app.utils.responses import json_list_response
 from app.models.inventory.inventory_enums import MovementType
 
+# Serializador de listas (las respuestas ya vienen validadas del servicio)
+_MOVEMENT_LIST_ADAPTER = TypeAdapter(List[MovementResponse])
+
 router = APIRouter(
     prefix="/inventory/movements",
     tags=["Inventory Movements"],
@@ -39,9 +45,38 @@ async def get_movements(
 
     Solo retorna movimientos del mismo business_id (multi-tenant).
     """
-    return await InventoryMovementsController.get_all_movements(
+    movements = await InventoryMovementsController.get_all_movements(
         skip, limit, movement_type, current_user, db
     )
+    return json_list_response(_MOVEMENT_LIST_ADAPTER, movements)
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_movements(
+    skip: int = Query(0, ge=0, description="Número de registros a omitir"),
+    limit: int = Query(1000, ge=1, le=50000, description="Número máximo de registros"),
+    movement_type: Optional[MovementType] = Query(None, description="Filtrar por tipo de movimiento"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Obtiene los movimientos del negocio en formato NDJSON (un movimiento por línea).
+
+    Requiere autenticación.
+
+    Pensado para exportaciones grandes: los movimientos se leen de la base de
+    datos por lotes con un cursor del servidor y se envían a medida que se
+    serializan, con memoria acotada.
+    """
+    movements = InventoryMovementsController.stream_movements(
+        skip, limit, movement_type, current_user, db
+    )
+
+    async def ndjson():
+        async for movement in movements:
+            yield movement.model_dump_json() + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
 
 @router.get("/item/{item_id}", response_model=List[MovementResponse])
@@ -59,9 +94,10 @@ async def get_movement_history_by_item(
 
     Retorna todos los movimientos (entradas, salidas, ajustes, etc.) del ítem ordenados por fecha.
     """
-    return await InventoryMovementsController.get_movement_history_by_item(
+    movements = await InventoryMovementsController.get_movement_history_by_item(
         item_id, skip, limit, current_user, db
     )
+    return json_list_response(_MOVEMENT_LIST_ADAPTER, movements)
 
 
 @router.get("/{movement_id}", response_model=MovementResponse)
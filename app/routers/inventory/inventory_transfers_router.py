@@ -4,6 +4,7 @@ Define los endpoints REST para gestión de traslados de inventario entre negocio
 """
 from fastapi import APIRouter, Depends, Path, Query
 from typing import List, Optional
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.config.database import get_db
 from app.controllers.inventory.inventory_transfers_controller import InventoryTransfersController
@@ -14,6 +15,10 @@ from app.schemas.inventory.inventory_transfer_schema import (
 )
 from app.dependencies.auth_dependencies import require_owner_or_admin, get_current_user
 from app.models.users.user_model import User
+from app.utils.responses import json_list_response
+
+# Serializador de listas (las respuestas ya vienen construidas por el servicio)
+_TRANSFER_LIST_ADAPTER = TypeAdapter(List[TransferListResponse])
 
 router = APIRouter(
     prefix="/inventory/transfers",
@@ -59,9 +64,10 @@ async def get_transfers(
     - status: pending, completed, cancelled, rejected
     - direction: outgoing (enviados), incoming (recibidos)
     """
-    return await InventoryTransfersController.get_transfers(
+    transfers = await InventoryTransfersController.get_transfers(
         status, direction, current_user, db
     )
+    return json_list_response(_TRANSFER_LIST_ADAPTER, transfers)
 
 
 @router.get("/{transfer_id}", response_model=TransferResponse)
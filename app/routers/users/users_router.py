@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Query, Depends
+from fastapi.responses import StreamingResponse
 from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.config.database import get_db
@@ -35,3 +36,25 @@ async def get_users(
     Solo retorna usuarios del mismo business_id.
     """
     return await UsersController.get_users(skip, limit, current_user, db)
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_users(
+    skip: int = Query(0, ge=0, description="Número de registros a omitir"),
+    limit: int = Query(1000, ge=1, le=5000, description="Número máximo de registros"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Obtiene los usuarios del negocio en formato NDJSON (un usuario por línea).
+    Requiere autenticación.
+    Los usuarios se leen por lotes con un cursor del servidor y se envían a
+    medida que se serializan, con memoria acotada.
+    """
+    users = UsersController.stream_users(skip, limit, current_user, db)
+
+    async def ndjson():
+        async for user in users:
+            yield user.model_dump_json() + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
@@ -48,3 +48,5 @@ class TokenPayload(BaseModel):
     business_id: int
     role: UserRole
     exp: Optional[int] = None
+    # Tipo de token: 0 = access, 1 = refresh (ver TOKEN_TYPE_* en app.utils.security)
+    token_type: int = 0
@@ -2,7 +2,7 @@
 Schemas Pydantic para InventoryItem (Ítem de Inventario).
 Define la validación y serialización de datos de ítems de inventario.
 """
-from pydantic import BaseModel, Field, field_validator, model_validator, condecimal
+from pydantic import BaseModel, Field, AliasPath, field_validator, model_validator, condecimal
 from decimal import Decimal
 from datetime import datetime
 from typing import Optional, Annotated
@@ -52,7 +52,8 @@ class InventoryItemUpdate(BaseModel):
 
 class StockAdjustmentRequest(BaseModel):
     """Schema para ajuste manual de stock"""
-    quantity_change: Annotated[Decimal, Field()]  # Positivo = entrada, Negativo = salida
+    # Positivo = entrada, Negativo = salida. Misma escala que la columna Numeric(10, 3)
+    quantity_change: Annotated[Decimal, Field(max_digits=10, decimal_places=3)]
     reason: str = Field(..., min_length=1, max_length=500)
 
     @field_validator('quantity_change')
@@ -71,8 +72,10 @@ class InventoryItemResponse(InventoryItemBase):
     is_active: bool
     created_at: datetime
     updated_at: datetime
-    supplier_name: Optional[str] = None  # Agregado en el servicio
-    is_below_min_stock: bool = False  # Agregado en el servicio
+    # Leído de item.supplier.name al validar desde el ORM
+    supplier_name: Optional[str] = Field(None, validation_alias=AliasPath("supplier", "name"))
+    is_below_min_stock: bool = False  # Calculado por la base de datos (query_expression)
 
     class Config:
         from_attributes = True
+        populate_by_name = True
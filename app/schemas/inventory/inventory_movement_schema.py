@@ -2,7 +2,7 @@
 Schemas Pydantic para InventoryMovement (Movimiento de Inventario).
 Define la validación y serialización de datos de movimientos de inventario.
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, AliasPath
 from decimal import Decimal
 from datetime import datetime
 from typing import Optional
@@ -13,10 +13,12 @@ class MovementResponse(BaseModel):
     """Schema para respuesta de Movimiento"""
     id: int
     inventory_item_id: int
-    inventory_item_name: str  # Agregado en servicio
+    # Leído de movement.inventory_item.name al validar desde el ORM
+    inventory_item_name: str = Field(..., validation_alias=AliasPath("inventory_item", "name"))
     business_id: int
     created_by_user_id: Optional[int]
-    created_by_user_name: Optional[str]  # Agregado en servicio
+    # Leído de movement.created_by.full_name al validar desde el ORM
+    created_by_user_name: Optional[str] = Field(None, validation_alias=AliasPath("created_by", "full_name"))
     movement_type: MovementType
     quantity: Decimal
     reason: Optional[str]
@@ -27,6 +29,7 @@ class MovementResponse(BaseModel):
 
     class Config:
         from_attributes = True
+        populate_by_name = True
 
 
 class RevertMovementRequest(BaseModel):
@@ -12,7 +12,7 @@ from app.models.inventory.inventory_enums import TransferStatus
 class TransferItemCreate(BaseModel):
     """Schema para crear un ítem dentro de un traslado"""
     inventory_item_id: int = Field(..., gt=0)
-    quantity: Annotated[Decimal, Field(gt=0)]
+    quantity: Annotated[Decimal, Field(gt=0, max_digits=10, decimal_places=3)]  # Escala de la columna Numeric(10, 3)
     notes: Optional[str] = Field(None, max_length=500)
 
     @field_validator('quantity')
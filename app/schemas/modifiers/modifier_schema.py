@@ -2,7 +2,7 @@
 Schemas Pydantic para Modificadores.
 Define la validación y serialización de datos de modificadores.
 """
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, AliasPath, field_validator
 from decimal import Decimal
 from datetime import datetime
 from typing import List, Optional, Annotated
@@ -38,7 +38,7 @@ class ModifierGroupResponse(BaseModel):
     is_active: bool
     created_at: datetime
     updated_at: datetime
-    modifiers_count: int  # Agregado en servicio
+    modifiers_count: int  # Calculado por la base de datos (query_expression)
 
     class Config:
         from_attributes = True
@@ -65,11 +65,13 @@ class ModifierInventoryItemResponse(BaseModel):
     id: int
     modifier_id: int
     inventory_item_id: int
-    inventory_item_name: str  # Agregado en servicio
+    # Leído de item.inventory_item.name al validar desde el ORM
+    inventory_item_name: str = Field(validation_alias=AliasPath("inventory_item", "name"))
     quantity: Decimal
 
     class Config:
         from_attributes = True
+        populate_by_name = True
 
 
 class ModifierCreate(BaseModel):
@@ -102,7 +104,8 @@ class ModifierResponse(BaseModel):
     """Schema para respuesta de modificador"""
     id: int
     modifier_group_id: int
-    modifier_group_name: str  # Agregado en servicio
+    # Leído de modifier.modifier_group.name al validar desde el ORM
+    modifier_group_name: str = Field(validation_alias=AliasPath("modifier_group", "name"))
     name: str
     description: Optional[str]
     price_extra: Decimal
@@ -113,6 +116,7 @@ class ModifierResponse(BaseModel):
 
     class Config:
         from_attributes = True
+        populate_by_name = True
 
 
 class ModifierListResponse(BaseModel):
@@ -123,7 +127,7 @@ class ModifierListResponse(BaseModel):
     name: str
     price_extra: Decimal
     is_active: bool
-    items_count: int  # Agregado en servicio
+    items_count: int  # Conteo calculado en SQL
 
     class Config:
         from_attributes = True
@@ -141,9 +145,11 @@ class ProductModifierResponse(BaseModel):
     id: int
     product_id: int
     modifier_id: int
-    modifier_name: str  # Agregado en servicio
-    modifier_group_name: str  # Agregado en servicio
-    price_extra: Decimal  # Agregado en servicio
+    # Leídos de product_modifier.modifier al validar desde el ORM
+    modifier_name: str = Field(validation_alias=AliasPath("modifier", "name"))
+    modifier_group_name: str = Field(validation_alias=AliasPath("modifier", "modifier_group", "name"))
+    price_extra: Decimal = Field(validation_alias=AliasPath("modifier", "price_extra"))
 
     class Config:
         from_attributes = True
+        populate_by_name = True
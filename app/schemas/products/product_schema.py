@@ -111,7 +111,7 @@ class ProductListResponse(BaseModel):
     total_cost: Decimal
     profit_margin_percentage: Optional[Decimal]
     is_active: bool
-    ingredients_count: int  # Agregado en servicio
+    ingredients_count: int  # Calculado por la base de datos (query_expression)
 
     class Config:
         from_attributes = True
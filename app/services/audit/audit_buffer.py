@@ -0,0 +1,156 @@
+"""
+Buffer de auditoría en memoria.
+
+Los servicios encolan registros de auditoría con `enqueue_log` en lugar de
+insertarlos en la ruta crítica del request. Una tarea en segundo plano agrupa
+los registros (hasta AUDIT_BATCH_SIZE, o lo acumulado en AUDIT_FLUSH_INTERVAL_MS)
+y los inserta con un único INSERT multi-fila en su propia sesión.
+
+La auditoría es append-only y no participa en la transacción de la operación
+de negocio, por lo que agruparla es seguro. Al apagar la aplicación se drena
+la cola antes de salir (ver `shutdown`).
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+from app.config.database import AsyncSessionLocal
+from app.config.settings import settings
+from app.repositories.audit.audit_repository import AuditRepository
+
+logger = logging.getLogger(__name__)
+
+_queue: Optional[asyncio.Queue] = None
+_flusher_task: Optional[asyncio.Task] = None
+# Referencias fuertes a las tareas de encolado con backpressure (cola llena)
+_pending_puts: set = set()
+# Marca de fin: todo lo encolado antes se vuelca y luego la tarea termina
+_STOP = object()
+
+
+def start() -> None:
+    """
+    Inicia la cola y la tarea de volcado si aún no están corriendo.
+    Debe llamarse dentro del event loop (startup de FastAPI o primer encolado).
+    """
+    global _queue, _flusher_task
+
+    if _flusher_task is not None and not _flusher_task.done():
+        return
+
+    _queue = asyncio.Queue(maxsize=settings.AUDIT_QUEUE_MAXSIZE)
+    _flusher_task = asyncio.create_task(_flush_loop())
+
+
+def enqueue_log(
+    business_id: int,
+    action: str,
+    user_id: Optional[int] = None,
+    details: Optional[Dict[str, Any]] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Encola un registro de auditoría sin bloquear el request.
+
+    Args:
+        business_id: ID del negocio
+        action: Descripción de la acción, o plantilla si se pasan params
+        user_id: ID del usuario que realizó la acción
+        details: Detalle estructurado (se guarda como JSON al volcar el lote)
+        params: Valores de la plantilla; el texto se arma en la tarea de
+            volcado, fuera de la ruta del request
+    """
+    if not settings.AUDIT_ENABLED:
+        return
+
+    start()
+
+    entry = {
+        "business_id": business_id,
+        "user_id": user_id,
+        "action": action,
+        "details": details,
+        "params": params,
+    }
+    try:
+        _queue.put_nowait(entry)
+    except asyncio.QueueFull:
+        # Backpressure sin bloquear al llamador: se encola en cuanto haya espacio
+        task = asyncio.create_task(_queue.put(entry))
+        _pending_puts.add(task)
+        task.add_done_callback(_pending_puts.discard)
+
+
+async def _collect_batch() -> List[Dict[str, Any]]:
+    """
+    Espera el primer registro y acumula más hasta llenar el lote
+    o agotar el intervalo de volcado.
+    """
+    batch = [await _queue.get()]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.AUDIT_FLUSH_INTERVAL_MS / 1000
+
+    while len(batch) < settings.AUDIT_BATCH_SIZE:
+        try:
+            batch.append(_queue.get_nowait())
+            continue
+        except asyncio.QueueEmpty:
+            pass
+
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(_queue.get(), timeout=remaining))
+        except asyncio.TimeoutError:
+            break
+
+    return batch
+
+
+def _render(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Arma el texto de la acción a partir de su plantilla (si la tiene)."""
+    params = entry.pop("params")
+    if params is not None:
+        entry["action"] = entry["action"].format_map(params)
+    return entry
+
+
+async def _write_batch(batch: List[Dict[str, Any]]) -> None:
+    """Inserta un lote de registros en una sesión propia."""
+    try:
+        batch = [_render(entry) for entry in batch]
+        async with AsyncSessionLocal() as db:
+            await AuditRepository(db).bulk_create_logs(batch)
+    except Exception as e:
+        logger.error(f"Error al guardar {len(batch)} registro(s) de auditoría: {e}")
+
+
+async def _flush_loop() -> None:
+    """Bucle de la tarea en segundo plano: agrupa y vuelca lotes hasta recibir _STOP."""
+    while True:
+        batch = await _collect_batch()
+        stop = _STOP in batch
+        if stop:
+            batch = [entry for entry in batch if entry is not _STOP]
+        if batch:
+            await _write_batch(batch)
+        if stop:
+            return
+
+
+async def shutdown() -> None:
+    """
+    Vuelca los registros pendientes y detiene la tarea en segundo plano.
+    Se registra en el evento shutdown de FastAPI.
+    """
+    global _queue, _flusher_task
+
+    if _pending_puts:
+        await asyncio.gather(*_pending_puts, return_exceptions=True)
+
+    if _flusher_task is not None and not _flusher_task.done():
+        await _queue.put(_STOP)
+        await _flusher_task
+
+    _queue = None
+    _flusher_task = None
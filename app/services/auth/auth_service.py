@@ -1,5 +1,8 @@
+import asyncio
+import logging
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
+from app.config.database import AsyncSessionLocal
 from app.repositories.users.users_repository import UsersRepository
 from app.repositories.business.business_repository import BusinessRepository
 from app.repositories.audit.audit_repository import AuditRepository
@@ -7,13 +10,33 @@ from app.schemas.auth.auth_schema import RegisterRequest, LoginRequest, TokenRes
 from app.schemas.users.user_schema import UserResponse
 from app.models.users.user_model import UserRole
 from app.utils.security import (
-    get_password_hash,
-    verify_password,
+    aget_password_hash,
+    averify_password,
     create_access_token,
     create_refresh_token,
     decode_token,
+    needs_rehash,
+    TOKEN_TYPE_REFRESH,
 )
 
+logger = logging.getLogger(__name__)
+
+# Referencias fuertes a las tareas de rehash en segundo plano
+_rehash_tasks: set = set()
+
+
+async def _rehash_password(user_id: int, current_hash: str, password: str) -> None:
+    """
+    Recalcula el hash con el costo configurado y lo guarda en una sesión propia,
+    fuera del request de login.
+    """
+    try:
+        new_hash = await aget_password_hash(password)
+        async with AsyncSessionLocal() as db:
+            await UsersRepository(db).update_hashed_password(user_id, current_hash, new_hash)
+    except Exception as e:
+        logger.error(f"Error al actualizar el hash de contraseña del usuario {user_id}: {e}")
+
 
 class AuthService:
     """
@@ -32,6 +55,10 @@ class AuthService:
         Registra un nuevo usuario y crea su negocio.
         El primer usuario siempre es OWNER.
         """
+        # Hashear contraseña antes de escribir nada: una contraseña inválida
+        # (más de 72 bytes) no debe dejar un negocio huérfano
+        hashed_password = await aget_password_hash(data.password)
+
         # Crear el negocio
         business = await self.business_repo.create(name=data.business_name)
 
@@ -43,9 +70,6 @@ class AuthService:
                 detail="Email already registered in this business",
             )
 
-        # Hashear contraseña
-        hashed_password = get_password_hash(data.password)
-
         # Crear usuario owner
         user = await self.users_repo.create(
             business_id=business.id,
@@ -85,13 +109,16 @@ class AuthService:
         user = result.scalar_one_or_none()
 
         if not user:
+            # Mismo costo que una contraseña incorrecta: el tiempo de respuesta
+            # no debe revelar si el email existe
+            await averify_password(data.password, "")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials",
             )
 
         # Verificar contraseña
-        if not verify_password(data.password, user.hashed_password):
+        if not await averify_password(data.password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials",
@@ -104,6 +131,15 @@ class AuthService:
                 detail="User is not active",
             )
 
+        # Hash con un costo distinto del configurado: se regenera en segundo plano
+        # para no sumar otro bcrypt a la latencia del login
+        if needs_rehash(user.hashed_password):
+            task = asyncio.create_task(
+                _rehash_password(user.id, user.hashed_password, data.password)
+            )
+            _rehash_tasks.add(task)
+            task.add_done_callback(_rehash_tasks.discard)
+
         # Registrar auditoría
         await self.audit_repo.create_log(
             business_id=user.business_id,
@@ -127,7 +163,7 @@ class AuthService:
         # Decodificar y validar refresh token
         token_data = decode_token(refresh_token)
 
-        if not token_data:
+        if not token_data or token_data.token_type != TOKEN_TYPE_REFRESH:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid refresh token",
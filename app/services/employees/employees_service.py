@@ -1,10 +1,11 @@
+import io
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from pydantic import TypeAdapter
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator
+from datetime import datetime, date
 from app.repositories.users.users_repository import UsersRepository
 from app.repositories.audit.audit_repository import AuditRepository
-from app.repositories.attendance.attendance_repository import AttendanceRepository
 from app.schemas.employees.employee_schema import (
     EmployeeCreateRequest,
     EmployeeUpdateRequest,
@@ -12,7 +13,42 @@ from app.schemas.employees.employee_schema import (
 )
 from app.schemas.attendance.attendance_schema import TodayAttendanceResponse
 from app.models.users.user_model import User, UserRole
-from app.utils.security import get_password_hash, generate_random_password
+from app.models.attendance.attendance_model import Attendance
+from app.utils.security import aget_password_hash, generate_random_password
+
+
+def _deactivate_denial(manager: UserRole, target: UserRole, is_self: bool) -> Optional[str]:
+    """
+    Motivo por el que `manager` no puede inactivar a `target`, o None si está permitido.
+    """
+    # El owner no puede eliminarse a sí mismo
+    if is_self and manager == UserRole.OWNER:
+        return "El owner no puede eliminarse a sí mismo."
+    # El admin no puede eliminar al owner
+    if target == UserRole.OWNER and manager != UserRole.OWNER:
+        return "No puedes eliminar al owner."
+    # Jerarquía
+    if manager.level <= target.level:
+        return f"No tienes permisos para eliminar este empleado (rol: {target.value})."
+    return None
+
+
+# Tabla de decisión (rol gestor, rol objetivo, es_sí_mismo) -> motivo de rechazo
+_DEACTIVATE_DENIALS = {
+    (manager, target, is_self): _deactivate_denial(manager, target, is_self)
+    for manager in UserRole
+    for target in UserRole
+    for is_self in (False, True)
+}
+
+# Plantillas de mensajes de auditoría
+_AUDIT_CREATED = "Empleado creado: {name} ({email}) con rol {role} por {actor}"
+_AUDIT_UPDATED = "Empleado actualizado: {name} ({email}). Cambios: {changes}. Actualizado por {actor}"
+_AUDIT_DEACTIVATED = "Empleado inactivado: {name} ({email}, rol: {role}) por {actor}"
+_AUDIT_DELETED = "Empleado eliminado permanentemente: {name} ({email}, rol: {role}) por {actor}"
+
+# Validador compilado una sola vez para listas de empleados
+_EMPLOYEE_LIST_ADAPTER = TypeAdapter(List[EmployeeResponse])
 
 
 class EmployeesService:
@@ -21,20 +57,74 @@ class EmployeesService:
     Maneja operaciones CRUD de empleados con validaciones jerárquicas y auditoría.
     """
 
-    # Jerarquía de roles (de mayor a menor)
-    ROLE_HIERARCHY = {
-        UserRole.OWNER: 5,
-        UserRole.ADMIN: 4,
-        UserRole.CASHIER: 3,
-        UserRole.WAITER: 2,
-        UserRole.COOK: 1,
-    }
+    # Se instancia una vez por request: slots en lugar de __dict__
+    __slots__ = (
+        "db",
+        "_users_repo",
+        "_audit_repo",
+        "_emp_cache",
+        "_email_cache",
+        "_today",
+    )
 
     def __init__(self, db: AsyncSession):
         self.db = db
-        self.users_repo = UsersRepository(db)
-        self.audit_repo = AuditRepository(db)
-        self.attendance_repo = AttendanceRepository(db)
+        # Los repositorios se crean perezosamente (p. ej. las lecturas no usan auditoría)
+        self._users_repo: Optional[UsersRepository] = None
+        self._audit_repo: Optional[AuditRepository] = None
+        # Caches por request (el servicio vive lo mismo que la sesión)
+        self._emp_cache: Dict[Tuple[int, int], Optional[User]] = {}
+        self._email_cache: Dict[Tuple[str, int, Optional[int]], bool] = {}
+        self._today: Optional[date] = None
+
+    @property
+    def users_repo(self) -> UsersRepository:
+        if self._users_repo is None:
+            self._users_repo = UsersRepository(self.db)
+        return self._users_repo
+
+    @property
+    def audit_repo(self) -> AuditRepository:
+        if self._audit_repo is None:
+            self._audit_repo = AuditRepository(self.db)
+        return self._audit_repo
+
+    def _today_date(self) -> date:
+        """
+        Fecha UTC de hoy, calculada una sola vez por request.
+        """
+        if self._today is None:
+            self._today = datetime.utcnow().date()
+        return self._today
+
+    async def _get_employee(self, employee_id: int, business_id: int) -> Optional[User]:
+        """
+        Obtiene un empleado por ID, memorizando el resultado durante el request.
+        """
+        key = (business_id, employee_id)
+        if key not in self._emp_cache:
+            self._emp_cache[key] = await self.users_repo.get_by_id(employee_id, business_id)
+        return self._emp_cache[key]
+
+    async def _email_exists(
+        self, email: str, business_id: int, exclude_user_id: Optional[int] = None
+    ) -> bool:
+        """
+        Verifica si un email existe en el negocio, memorizando el resultado durante el request.
+        """
+        key = (email, business_id, exclude_user_id)
+        if key not in self._email_cache:
+            self._email_cache[key] = await self.users_repo.email_exists(
+                email, business_id, exclude_user_id=exclude_user_id
+            )
+        return self._email_cache[key]
+
+    def _invalidate_employee(self, employee_id: int, business_id: int) -> None:
+        """
+        Descarta las entradas cacheadas tras una mutación.
+        """
+        self._emp_cache.pop((business_id, employee_id), None)
+        self._email_cache.clear()
 
     def _can_manage_role(self, manager_role: UserRole, target_role: UserRole) -> bool:
         """
@@ -47,28 +137,31 @@ class EmployeesService:
         Returns:
             True si puede gestionar, False en caso contrario
         """
-        manager_level = self.ROLE_HIERARCHY.get(manager_role, 0)
-        target_level = self.ROLE_HIERARCHY.get(target_role, 0)
-        return manager_level > target_level
+        return manager_role.level > target_role.level
 
-    async def _get_today_attendance(self, employee_id: int, business_id: int) -> Optional[TodayAttendanceResponse]:
+    @staticmethod
+    def _build_response(employee: User) -> EmployeeResponse:
         """
-        Obtiene la asistencia del día actual de un empleado.
-
-        Args:
-            employee_id: ID del empleado
-            business_id: ID del negocio
-
-        Returns:
-            TodayAttendanceResponse con check_in y check_out, o None si no hay registro
+        Construye la respuesta a partir del ORM sin re-validar.
+        Los datos del User ya fueron validados al escribirse en la base de datos.
         """
-        today = datetime.utcnow().date()
-        attendance = await self.attendance_repo.get_today_attendance(
-            employee_id=employee_id,
-            business_id=business_id,
-            today_date=today,
+        return EmployeeResponse.model_construct(
+            id=employee.id,
+            business_id=employee.business_id,
+            email=employee.email,
+            full_name=employee.full_name,
+            phone=employee.phone,
+            document=employee.document,
+            role=employee.role,
+            is_active=employee.is_active,
+            created_at=employee.created_at,
         )
 
+    @staticmethod
+    def _build_today_attendance(attendance: Optional[Attendance]) -> Optional[TodayAttendanceResponse]:
+        """
+        Convierte un registro de asistencia (o None) en TodayAttendanceResponse.
+        """
         if not attendance:
             return None
 
@@ -106,7 +199,7 @@ class EmployeesService:
             )
 
         # Validar que el email no exista en el negocio
-        if await self.users_repo.email_exists(data.email, current_user.business_id):
+        if await self._email_exists(data.email, current_user.business_id):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"El email {data.email} ya está registrado en este negocio.",
@@ -118,7 +211,8 @@ class EmployeesService:
         else:
             plain_password = generate_random_password()
 
-        hashed_password = get_password_hash(plain_password)
+        # bcrypt es costoso a propósito: se ejecuta en un hilo para no bloquear el event loop
+        hashed_password = await aget_password_hash(plain_password)
 
         # Crear el empleado
         employee = await self.users_repo.create(
@@ -129,17 +223,24 @@ class EmployeesService:
             document=data.document,
             hashed_password=hashed_password,
             role=data.role,
+            commit=False,
         )
+        self._email_cache.clear()
 
-        # Registrar auditoría
+        # Registrar auditoría (confirma el empleado y el log en una sola transacción)
         await self.audit_repo.create_log(
             business_id=current_user.business_id,
             user_id=current_user.id,
-            action=f"Empleado creado: {employee.full_name} ({employee.email}) con rol {employee.role.value} por {current_user.full_name}",
+            action=_AUDIT_CREATED.format(
+                name=employee.full_name,
+                email=employee.email,
+                role=employee.role.value,
+                actor=current_user.full_name,
+            ),
         )
 
         # Crear respuesta con contraseña temporal solo si se generó automáticamente
-        response = EmployeeResponse.model_validate(employee)
+        response = self._build_response(employee)
         if not data.password:
             response.temporary_password = plain_password
 
@@ -160,20 +261,21 @@ class EmployeesService:
         Returns:
             EmployeeResponse con los datos del empleado
         """
-        employee = await self.users_repo.get_by_id(employee_id, current_user.business_id)
+        # Empleado y asistencia del día en una sola consulta (LEFT JOIN)
+        row = await self.users_repo.get_with_today_attendance(
+            employee_id, current_user.business_id, self._today_date()
+        )
 
-        if not employee:
+        if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Empleado no encontrado.",
             )
-
-        # Obtener asistencia del día
-        today_attendance = await self._get_today_attendance(employee.id, current_user.business_id)
+        employee, attendance = row
 
         # Crear respuesta
-        response = EmployeeResponse.model_validate(employee)
-        response.today_attendance = today_attendance
+        response = self._build_response(employee)
+        response.today_attendance = self._build_today_attendance(attendance)
 
         return response
 
@@ -194,20 +296,50 @@ class EmployeesService:
         Returns:
             Lista de EmployeeResponse con asistencia del día actual
         """
-        employees = await self.users_repo.get_all_by_business(
-            current_user.business_id, skip, limit
+        # Empleados y su asistencia del día en una sola consulta
+        rows = await self.users_repo.get_all_with_today_attendance(
+            current_user.business_id, self._today_date(), skip, limit
+        )
+
+        # Validar toda la página de una vez
+        result = _EMPLOYEE_LIST_ADAPTER.validate_python(
+            [emp for emp, _ in rows], from_attributes=True
         )
 
         # Agregar asistencia del día a cada empleado
-        result = []
-        for emp in employees:
-            today_attendance = await self._get_today_attendance(emp.id, current_user.business_id)
-            response = EmployeeResponse.model_validate(emp)
-            response.today_attendance = today_attendance
-            result.append(response)
+        for response, (_, attendance) in zip(result, rows):
+            response.today_attendance = self._build_today_attendance(attendance)
 
         return result
 
+    async def iter_all_employees(
+        self,
+        current_user: User,
+        skip: int = 0,
+        limit: int = 1000,
+    ) -> AsyncIterator[EmployeeResponse]:
+        """
+        Itera los empleados del negocio, emitiendo cada respuesta apenas se construye.
+        Permite serializar la página en streaming sin materializar la lista completa
+        de respuestas.
+
+        Args:
+            current_user: Usuario actual
+            skip: Número de registros a omitir
+            limit: Número máximo de registros
+
+        Yields:
+            EmployeeResponse con asistencia del día actual
+        """
+        rows = await self.users_repo.get_all_with_today_attendance(
+            current_user.business_id, self._today_date(), skip, limit
+        )
+
+        for emp, attendance in rows:
+            response = self._build_response(emp)
+            response.today_attendance = self._build_today_attendance(attendance)
+            yield response
+
     async def update_employee(
         self,
         employee_id: int,
@@ -233,7 +365,7 @@ class EmployeesService:
             EmployeeResponse con los datos actualizados
         """
         # Obtener el empleado
-        employee = await self.users_repo.get_by_id(employee_id, current_user.business_id)
+        employee = await self._get_employee(employee_id, current_user.business_id)
 
         if not employee:
             raise HTTPException(
@@ -248,8 +380,16 @@ class EmployeesService:
                 detail=f"No tienes permisos para editar este empleado (rol: {employee.role.value}).",
             )
 
-        # Rastrear cambios para auditoría
-        changes: List[str] = []
+        # Sin campos aplicables: no hay nada que validar ni guardar
+        if not data.model_dump(exclude_none=True):
+            return self._build_response(employee)
+
+        # Rastrear cambios; las descripciones solo se construyen si hay auditoría.
+        # Cada atributo se asigna solo si cambia, para que la sesión quede limpia
+        # en actualizaciones sin efecto.
+        audit_enabled = self.audit_repo.enabled
+        # Buffer único para las descripciones (cada entrada termina en ", ")
+        changes = io.StringIO()
 
         # Validar y aplicar cambio de rol
         if data.role is not None:
@@ -268,50 +408,61 @@ class EmployeesService:
                 )
 
             if employee.role != data.role:
-                changes.append(f"Rol cambiado de {employee.role.value} a {data.role.value}")
+                if audit_enabled:
+                    changes.write(f"Rol cambiado de {employee.role.value} a {data.role.value}, ")
                 employee.role = data.role
 
         # Validar y aplicar cambio de email
         if data.email is not None and data.email != employee.email:
-            if await self.users_repo.email_exists(
+            if await self._email_exists(
                 data.email, current_user.business_id, exclude_user_id=employee.id
             ):
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"El email {data.email} ya está registrado en este negocio.",
                 )
-            changes.append(f"Email cambiado de {employee.email} a {data.email}")
+            if audit_enabled:
+                changes.write(f"Email cambiado de {employee.email} a {data.email}, ")
             employee.email = data.email
 
         # Aplicar cambio de nombre
         if data.full_name is not None and data.full_name != employee.full_name:
-            changes.append(f"Nombre cambiado de '{employee.full_name}' a '{data.full_name}'")
+            if audit_enabled:
+                changes.write(f"Nombre cambiado de '{employee.full_name}' a '{data.full_name}', ")
             employee.full_name = data.full_name
 
         # Aplicar cambio de teléfono
         if data.phone is not None and data.phone != employee.phone:
-            changes.append(f"Teléfono cambiado de '{employee.phone or 'N/A'}' a '{data.phone}'")
+            if audit_enabled:
+                changes.write(f"Teléfono cambiado de '{employee.phone or 'N/A'}' a '{data.phone}', ")
             employee.phone = data.phone
 
         # Aplicar cambio de estado
         if data.is_active is not None and data.is_active != employee.is_active:
-            new_status = "activo" if data.is_active else "inactivo"
-            old_status = "activo" if employee.is_active else "inactivo"
-            changes.append(f"Estado cambiado de {old_status} a {new_status}")
+            if audit_enabled:
+                new_status = "activo" if data.is_active else "inactivo"
+                old_status = "activo" if employee.is_active else "inactivo"
+                changes.write(f"Estado cambiado de {old_status} a {new_status}, ")
             employee.is_active = data.is_active
 
-        # Guardar cambios
-        if changes:
-            employee = await self.users_repo.update(employee)
+        # Guardar cambios solo si algún atributo quedó modificado (sin UPDATE ni auditoría si no)
+        if self.db.is_modified(employee):
+            employee = await self.users_repo.update(employee, commit=False)
+            self._invalidate_employee(employee.id, current_user.business_id)
 
-            # Registrar auditoría
+            # Registrar auditoría (confirma la actualización y el log juntos)
             await self.audit_repo.create_log(
                 business_id=current_user.business_id,
                 user_id=current_user.id,
-                action=f"Empleado actualizado: {employee.full_name} ({employee.email}). Cambios: {', '.join(changes)}. Actualizado por {current_user.full_name}",
+                action=_AUDIT_UPDATED.format(
+                    name=employee.full_name,
+                    email=employee.email,
+                    changes=changes.getvalue()[:-2],
+                    actor=current_user.full_name,
+                ),
             )
 
-        return EmployeeResponse.model_validate(employee)
+        return self._build_response(employee)
 
     async def deactivate_employee(
         self,
@@ -334,7 +485,7 @@ class EmployeesService:
             EmployeeResponse con el empleado inactivado
         """
         # Obtener el empleado
-        employee = await self.users_repo.get_by_id(employee_id, current_user.business_id)
+        employee = await self._get_employee(employee_id, current_user.business_id)
 
         if not employee:
             raise HTTPException(
@@ -342,39 +493,34 @@ class EmployeesService:
                 detail="Empleado no encontrado.",
             )
 
-        # Validar que el owner no se elimine a sí mismo
-        if employee.id == current_user.id and current_user.role == UserRole.OWNER:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="El owner no puede eliminarse a sí mismo.",
-            )
-
-        # Validar que el admin no pueda eliminar al owner
-        if employee.role == UserRole.OWNER and current_user.role != UserRole.OWNER:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="No puedes eliminar al owner.",
-            )
-
-        # Validar jerarquía
-        if not self._can_manage_role(current_user.role, employee.role):
+        # Validar permisos (owner a sí mismo, admin vs owner, jerarquía)
+        denial = _DEACTIVATE_DENIALS[
+            (current_user.role, employee.role, employee.id == current_user.id)
+        ]
+        if denial:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"No tienes permisos para eliminar este empleado (rol: {employee.role.value}).",
+                detail=denial,
             )
 
         # Inactivar el empleado
         employee.is_active = False
-        employee = await self.users_repo.update(employee)
+        employee = await self.users_repo.update(employee, commit=False)
+        self._invalidate_employee(employee.id, current_user.business_id)
 
-        # Registrar auditoría
+        # Registrar auditoría (confirma la inactivación y el log juntos)
         await self.audit_repo.create_log(
             business_id=current_user.business_id,
             user_id=current_user.id,
-            action=f"Empleado inactivado: {employee.full_name} ({employee.email}, rol: {employee.role.value}) por {current_user.full_name}",
+            action=_AUDIT_DEACTIVATED.format(
+                name=employee.full_name,
+                email=employee.email,
+                role=employee.role.value,
+                actor=current_user.full_name,
+            ),
         )
 
-        return EmployeeResponse.model_validate(employee)
+        return self._build_response(employee)
 
     async def delete_employee_permanently(
         self,
@@ -404,7 +550,7 @@ class EmployeesService:
             )
 
         # Obtener el empleado
-        employee = await self.users_repo.get_by_id(employee_id, current_user.business_id)
+        employee = await self._get_employee(employee_id, current_user.business_id)
 
         if not employee:
             raise HTTPException(
@@ -432,13 +578,19 @@ class EmployeesService:
         employee_role = employee.role.value
 
         # Eliminar permanentemente
-        await self.users_repo.delete_permanently(employee)
+        await self.users_repo.delete_permanently(employee, commit=False)
+        self._invalidate_employee(employee_id, current_user.business_id)
 
-        # Registrar auditoría
+        # Registrar auditoría (confirma la eliminación y el log juntos)
         await self.audit_repo.create_log(
             business_id=current_user.business_id,
             user_id=current_user.id,
-            action=f"Empleado eliminado permanentemente: {employee_name} ({employee_email}, rol: {employee_role}) por {current_user.full_name}",
+            action=_AUDIT_DELETED.format(
+                name=employee_name,
+                email=employee_email,
+                role=employee_role,
+                actor=current_user.full_name,
+            ),
         )
 
         return {
@@ -4,12 +4,11 @@ Maneja operaciones CRUD de ítems con validaciones y auditoría.
 """
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+from pydantic import TypeAdapter
 from decimal import Decimal
 from app.repositories.inventory.inventory_items_repository import InventoryItemsRepository
 from app.repositories.inventory.inventory_movements_repository import InventoryMovementsRepository
-from app.repositories.suppliers.suppliers_repository import SuppliersRepository
-from app.repositories.audit.audit_repository import AuditRepository
 from app.schemas.inventory.inventory_item_schema import (
     InventoryItemCreate,
     InventoryItemUpdate,
@@ -17,7 +16,31 @@ from app.schemas.inventory.inventory_item_schema import (
     StockAdjustmentRequest,
 )
 from app.models.users.user_model import User, UserRole
+from app.dependencies.auth_dependencies import require_role
+from app.models.suppliers.supplier_model import Supplier
+from app.models.inventory.inventory_item_model import InventoryItem
 from app.models.inventory.inventory_enums import MovementType
+from app.services.audit import audit_buffer
+
+
+# Validador compilado una sola vez para listas de ítems
+_ITEM_LIST_ADAPTER = TypeAdapter(List[InventoryItemResponse])
+
+# Roles que pueden modificar el inventario
+_MUTATING_ROLES = frozenset({UserRole.OWNER, UserRole.ADMIN})
+
+# Plantillas de auditoría (el texto se arma al volcar el lote, ver audit_buffer)
+_AUDIT_CREATED = "Ítem de inventario creado: {name} (ID: {id}, Stock inicial: {stock} {unit}){supplier_info} por {actor}"
+_AUDIT_UPDATED = "Ítem de inventario actualizado: {name} (ID: {id}). Actualizado por {actor}"
+_AUDIT_DEACTIVATED = "Ítem de inventario inactivado: {name} (ID: {id}) por {actor}"
+_AUDIT_ADJUSTED = (
+    "{action_type} de stock: {name} (ID: {id}). Cantidad: {quantity} {unit}. "
+    "Stock anterior: {previous_stock}, Stock nuevo: {new_stock}. Motivo: {reason}. Por {actor}"
+)
+
+# Tipos de movimiento para ajustes manuales
+_MANUAL_IN = MovementType.MANUAL_IN
+_MANUAL_OUT = MovementType.MANUAL_OUT
 
 
 class InventoryItemsService:
@@ -30,14 +53,65 @@ class InventoryItemsService:
         self.db = db
         self.items_repo = InventoryItemsRepository(db)
         self.movements_repo = InventoryMovementsRepository(db)
-        self.suppliers_repo = SuppliersRepository(db)
-        self.audit_repo = AuditRepository(db)
+        # Proveedores ya consultados en este request, por (business_id, supplier_id)
+        self._supplier_cache: Dict[Tuple[int, int], Optional[Supplier]] = {}
+
+    @staticmethod
+    def _build_response(item: InventoryItem) -> InventoryItemResponse:
+        """
+        Construye la respuesta de un ítem.
+        supplier_name sale de item.supplier (AliasPath) e is_below_min_stock
+        ya viene calculado por la base de datos.
+        """
+        return InventoryItemResponse.model_validate(item)
+
+    async def _get_item_or_404(
+        self,
+        item_id: int,
+        business_id: int,
+        load: Tuple[str, ...] = (),
+        for_update: bool = False,
+    ) -> InventoryItem:
+        """
+        Obtiene un ítem del negocio o lanza 404.
+        load indica las relaciones a cargar (solo las que la respuesta necesita);
+        for_update bloquea la fila hasta el commit.
+        """
+        if for_update:
+            item = await self.items_repo.get_by_id_for_update(item_id, business_id, load=load)
+        else:
+            item = await self.items_repo.get_by_id(item_id, business_id, load=load)
+
+        if not item:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Ítem de inventario no encontrado.",
+            )
+        return item
+
+    async def _check_sku_and_supplier(
+        self,
+        business_id: int,
+        sku: Optional[str],
+        supplier_id: Optional[int],
+        exclude_id: Optional[int] = None,
+    ) -> Tuple[bool, Optional[Supplier]]:
+        """
+        Verifica el SKU y obtiene el proveedor en una sola consulta sobre la sesión del request.
+        El proveedor solo se consulta la primera vez en el request; sin nada que consultar
+        no se toca la BD.
+        """
+        key = (business_id, supplier_id)
+        fetch_supplier = bool(supplier_id) and key not in self._supplier_cache
+        if not sku and not fetch_supplier:
+            return False, self._supplier_cache.get(key)
 
-    def _calculate_is_below_min_stock(self, quantity: Decimal, min_stock: Optional[Decimal]) -> bool:
-        """Calcular si el ítem está por debajo del stock mínimo"""
-        if min_stock is None:
-            return False
-        return quantity < min_stock
+        sku_taken, supplier = await self.items_repo.get_sku_supplier_context(
+            sku, supplier_id if fetch_supplier else None, business_id, exclude_id=exclude_id
+        )
+        if fetch_supplier:
+            self._supplier_cache[key] = supplier
+        return sku_taken, self._supplier_cache.get(key)
 
     async def create_item(
         self,
@@ -61,23 +135,24 @@ class InventoryItemsService:
             InventoryItemResponse con los datos del ítem creado
         """
         # Validar que el usuario sea OWNER o ADMIN
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER y ADMIN pueden crear ítems de inventario.",
-            )
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER y ADMIN pueden crear ítems de inventario."
+        )
+
+        # SKU y proveedor se validan con una sola consulta
+        sku_taken, supplier = await self._check_sku_and_supplier(
+            current_user.business_id, data.sku, data.supplier_id
+        )
 
         # Validar SKU único (si se proporciona)
-        if data.sku:
-            if await self.items_repo.sku_exists(data.sku, current_user.business_id):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"El SKU {data.sku} ya está registrado en este negocio.",
-                )
+        if sku_taken:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El SKU {data.sku} ya está registrado en este negocio.",
+            )
 
         # Validar supplier (si se proporciona)
         if data.supplier_id:
-            supplier = await self.suppliers_repo.get_by_id(data.supplier_id, current_user.business_id)
             if not supplier:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -105,22 +180,22 @@ class InventoryItemsService:
             supplier_id=data.supplier_id,
         )
 
-        # Registrar auditoría
-        supplier_info = f" (Proveedor: {supplier.name})" if data.supplier_id else ""
-        await self.audit_repo.create_log(
+        # Registrar auditoría (se inserta en lote en segundo plano)
+        audit_buffer.enqueue_log(
             business_id=current_user.business_id,
             user_id=current_user.id,
-            action=f"Ítem de inventario creado: {item.name} (ID: {item.id}, Stock inicial: {item.quantity_in_stock} {item.unit_of_measure}){supplier_info} por {current_user.full_name}",
+            action=_AUDIT_CREATED,
+            params={
+                "name": item.name,
+                "id": item.id,
+                "stock": item.quantity_in_stock,
+                "unit": item.unit_of_measure,
+                "supplier_info": f" (Proveedor: {supplier.name})" if data.supplier_id else "",
+                "actor": current_user.full_name,
+            },
         )
 
-        # Preparar respuesta
-        response = InventoryItemResponse.model_validate(item)
-        response.supplier_name = supplier.name if data.supplier_id and supplier else None
-        response.is_below_min_stock = self._calculate_is_below_min_stock(
-            item.quantity_in_stock, item.min_stock
-        )
-
-        return response
+        return self._build_response(item)
 
     async def get_item_by_id(
         self,
@@ -128,21 +203,9 @@ class InventoryItemsService:
         current_user: User,
     ) -> InventoryItemResponse:
         """Obtiene un ítem por ID"""
-        item = await self.items_repo.get_by_id(item_id, current_user.business_id)
-
-        if not item:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Ítem de inventario no encontrado.",
-            )
-
-        response = InventoryItemResponse.model_validate(item)
-        response.supplier_name = item.supplier.name if item.supplier else None
-        response.is_below_min_stock = self._calculate_is_below_min_stock(
-            item.quantity_in_stock, item.min_stock
-        )
+        item = await self._get_item_or_404(item_id, current_user.business_id, load=("supplier",))
 
-        return response
+        return self._build_response(item)
 
     async def get_all_items(
         self,
@@ -163,16 +226,8 @@ class InventoryItemsService:
             supplier_id=supplier_id,
         )
 
-        responses = []
-        for item in items:
-            response = InventoryItemResponse.model_validate(item)
-            response.supplier_name = item.supplier.name if item.supplier else None
-            response.is_below_min_stock = self._calculate_is_below_min_stock(
-                item.quantity_in_stock, item.min_stock
-            )
-            responses.append(response)
-
-        return responses
+        # is_below_min_stock ya viene calculado en el SELECT; supplier_name vía AliasPath
+        return _ITEM_LIST_ADAPTER.validate_python(items, from_attributes=True)
 
     async def update_item(
         self,
@@ -182,33 +237,36 @@ class InventoryItemsService:
     ) -> InventoryItemResponse:
         """Actualiza un ítem existente (solo metadatos, no stock)"""
         # Validar que el usuario sea OWNER o ADMIN
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER y ADMIN pueden actualizar ítems de inventario.",
-            )
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER y ADMIN pueden actualizar ítems de inventario."
+        )
 
-        # Obtener el ítem
-        item = await self.items_repo.get_by_id(item_id, current_user.business_id)
+        item = await self._get_item_or_404(item_id, current_user.business_id, load=("supplier",))
 
-        if not item:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Ítem de inventario no encontrado.",
-            )
+        # Payload vacío: nada que validar ni actualizar
+        update_data = data.model_dump(exclude_unset=True)
+        if not update_data:
+            return self._build_response(item)
+
+        # SKU y proveedor (si cambiaron) se validan con una sola consulta
+        check_sku = bool(data.sku) and data.sku != item.sku
+        check_supplier = bool(data.supplier_id) and data.supplier_id != item.supplier_id
+        sku_taken, supplier = await self._check_sku_and_supplier(
+            current_user.business_id,
+            data.sku if check_sku else None,
+            data.supplier_id if check_supplier else None,
+            exclude_id=item_id,
+        )
 
         # Validar SKU único (si se proporciona y cambió)
-        if data.sku and data.sku != item.sku:
-            if await self.items_repo.sku_exists(data.sku, current_user.business_id, exclude_id=item_id):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"El SKU {data.sku} ya está registrado en este negocio.",
-                )
+        if sku_taken:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El SKU {data.sku} ya está registrado en este negocio.",
+            )
 
         # Validar supplier (si se proporciona y cambió)
-        supplier = None
-        if data.supplier_id and data.supplier_id != item.supplier_id:
-            supplier = await self.suppliers_repo.get_by_id(data.supplier_id, current_user.business_id)
+        if check_supplier:
             if not supplier:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -220,15 +278,13 @@ class InventoryItemsService:
                     detail="El proveedor está inactivo.",
                 )
 
-        # Registrar cambios para auditoría
-        changes = []
-        update_data = data.model_dump(exclude_unset=True)
-
+        # Registrar cambios para auditoría (se guardan estructurados en details)
+        changes = {}
         for field, value in update_data.items():
             old_value = getattr(item, field)
             if value != old_value:
                 setattr(item, field, value)
-                changes.append(f"{field}: '{old_value}' → '{value}'")
+                changes[field] = {"old": old_value, "new": value}
 
         # Solo actualizar si hay cambios
         if changes:
@@ -242,23 +298,21 @@ class InventoryItemsService:
 
             updated_item = await self.items_repo.update(item)
 
-            # Registrar auditoría
-            await self.audit_repo.create_log(
+            # Registrar auditoría (se inserta en lote en segundo plano)
+            audit_buffer.enqueue_log(
                 business_id=current_user.business_id,
                 user_id=current_user.id,
-                action=f"Ítem de inventario actualizado: {updated_item.name} (ID: {updated_item.id}). Cambios: {', '.join(changes)}. Actualizado por {current_user.full_name}",
+                action=_AUDIT_UPDATED,
+                details={"changes": changes},
+                params={"name": updated_item.name, "id": updated_item.id, "actor": current_user.full_name},
             )
 
-            # Recargar con relaciones
-            item = await self.items_repo.get_by_id(item_id, current_user.business_id)
+            # Solo si cambió el proveedor hace falta recargar la relación
+            if "supplier_id" in changes:
+                await self.db.refresh(updated_item, ["supplier"])
+            item = updated_item
 
-        response = InventoryItemResponse.model_validate(item)
-        response.supplier_name = item.supplier.name if item.supplier else None
-        response.is_below_min_stock = self._calculate_is_below_min_stock(
-            item.quantity_in_stock, item.min_stock
-        )
-
-        return response
+        return self._build_response(item)
 
     async def deactivate_item(
         self,
@@ -267,20 +321,11 @@ class InventoryItemsService:
     ) -> InventoryItemResponse:
         """Inactiva un ítem de inventario (soft delete)"""
         # Validar que el usuario sea OWNER o ADMIN
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER y ADMIN pueden inactivar ítems de inventario.",
-            )
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER y ADMIN pueden inactivar ítems de inventario."
+        )
 
-        # Obtener el ítem
-        item = await self.items_repo.get_by_id(item_id, current_user.business_id)
-
-        if not item:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Ítem de inventario no encontrado.",
-            )
+        item = await self._get_item_or_404(item_id, current_user.business_id, load=("supplier",))
 
         if not item.is_active:
             raise HTTPException(
@@ -292,20 +337,15 @@ class InventoryItemsService:
         item.is_active = False
         updated_item = await self.items_repo.update(item)
 
-        # Registrar auditoría
-        await self.audit_repo.create_log(
+        # Registrar auditoría (se inserta en lote en segundo plano)
+        audit_buffer.enqueue_log(
             business_id=current_user.business_id,
             user_id=current_user.id,
-            action=f"Ítem de inventario inactivado: {updated_item.name} (ID: {updated_item.id}) por {current_user.full_name}",
-        )
-
-        response = InventoryItemResponse.model_validate(updated_item)
-        response.supplier_name = updated_item.supplier.name if updated_item.supplier else None
-        response.is_below_min_stock = self._calculate_is_below_min_stock(
-            updated_item.quantity_in_stock, updated_item.min_stock
+            action=_AUDIT_DEACTIVATED,
+            params={"name": updated_item.name, "id": updated_item.id, "actor": current_user.full_name},
         )
 
-        return response
+        return self._build_response(updated_item)
 
     async def get_low_stock_alerts(
         self,
@@ -314,14 +354,7 @@ class InventoryItemsService:
         """Obtiene ítems con stock por debajo del mínimo"""
         items = await self.items_repo.get_items_below_min_stock(current_user.business_id)
 
-        responses = []
-        for item in items:
-            response = InventoryItemResponse.model_validate(item)
-            response.supplier_name = item.supplier.name if item.supplier else None
-            response.is_below_min_stock = True  # Ya sabemos que está bajo el mínimo
-            responses.append(response)
-
-        return responses
+        return _ITEM_LIST_ADAPTER.validate_python(items, from_attributes=True)
 
     async def adjust_stock_manually(
         self,
@@ -347,20 +380,14 @@ class InventoryItemsService:
             InventoryItemResponse con el stock actualizado
         """
         # Validar que el usuario sea OWNER o ADMIN
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER y ADMIN pueden ajustar el stock manualmente.",
-            )
-
-        # Obtener el ítem
-        item = await self.items_repo.get_by_id(item_id, current_user.business_id)
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER y ADMIN pueden ajustar el stock manualmente."
+        )
 
-        if not item:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Ítem de inventario no encontrado.",
-            )
+        # Fila bloqueada hasta el commit
+        item = await self._get_item_or_404(
+            item_id, current_user.business_id, load=("supplier",), for_update=True
+        )
 
         if not item.is_active:
             raise HTTPException(
@@ -369,43 +396,48 @@ class InventoryItemsService:
             )
 
         # Calcular nuevo stock
-        new_stock = item.quantity_in_stock + data.quantity_change
+        quantity_change = data.quantity_change
+        new_stock = item.quantity_in_stock + quantity_change
 
         if new_stock < 0:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Stock insuficiente. Stock actual: {item.quantity_in_stock} {item.unit_of_measure}, cambio solicitado: {data.quantity_change}. Stock resultante sería negativo.",
+                detail=f"Stock insuficiente. Stock actual: {item.quantity_in_stock} {item.unit_of_measure}, cambio solicitado: {quantity_change}. Stock resultante sería negativo.",
             )
 
-        # Determinar tipo de movimiento
-        movement_type = MovementType.MANUAL_IN if data.quantity_change > 0 else MovementType.MANUAL_OUT
+        # El signo del cambio decide tipo de movimiento, texto de auditoría y cantidad absoluta
+        if quantity_change > 0:
+            movement_type, action_type, quantity_abs = _MANUAL_IN, "Entrada manual", quantity_change
+        else:
+            movement_type, action_type, quantity_abs = _MANUAL_OUT, "Salida manual", -quantity_change
 
-        # Crear movimiento
-        await self.movements_repo.create(
-            inventory_item_id=item_id,
-            business_id=current_user.business_id,
+        previous_stock = item.quantity_in_stock
+
+        # Stock y movimiento se escriben con una sola sentencia (CTE) y un único commit
+        updated_item, _ = await self.items_repo.adjust_stock_atomic(
+            item,
+            delta=quantity_change,
             created_by_user_id=current_user.id,
-            movement_type=movement_type.value,
-            quantity=data.quantity_change,
+            movement_type=movement_type,
             reason=data.reason,
         )
 
-        # Actualizar stock
-        updated_item = await self.items_repo.update_stock(item, new_stock)
-
-        # Registrar auditoría
-        action_type = "Entrada manual" if data.quantity_change > 0 else "Salida manual"
-        await self.audit_repo.create_log(
+        # Registrar auditoría (se inserta en lote en segundo plano)
+        audit_buffer.enqueue_log(
             business_id=current_user.business_id,
             user_id=current_user.id,
-            action=f"{action_type} de stock: {updated_item.name} (ID: {updated_item.id}). Cantidad: {abs(data.quantity_change)} {updated_item.unit_of_measure}. Stock anterior: {item.quantity_in_stock}, Stock nuevo: {new_stock}. Motivo: {data.reason}. Por {current_user.full_name}",
-        )
-
-        # Preparar respuesta
-        response = InventoryItemResponse.model_validate(updated_item)
-        response.supplier_name = updated_item.supplier.name if updated_item.supplier else None
-        response.is_below_min_stock = self._calculate_is_below_min_stock(
-            updated_item.quantity_in_stock, updated_item.min_stock
+            action=_AUDIT_ADJUSTED,
+            params={
+                "action_type": action_type,
+                "name": updated_item.name,
+                "id": updated_item.id,
+                "quantity": quantity_abs,
+                "unit": updated_item.unit_of_measure,
+                "previous_stock": previous_stock,
+                "new_stock": new_stock,
+                "reason": data.reason,
+                "actor": current_user.full_name,
+            },
         )
 
-        return response
+        return self._build_response(updated_item)
@@ -4,17 +4,33 @@ Maneja operaciones de movimientos con validaciones y auditoría.
 """
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Tuple
+from pydantic import TypeAdapter
 from decimal import Decimal
 from app.repositories.inventory.inventory_movements_repository import InventoryMovementsRepository
 from app.repositories.inventory.inventory_items_repository import InventoryItemsRepository
-from app.repositories.audit.audit_repository import AuditRepository
 from app.schemas.inventory.inventory_movement_schema import (
     MovementResponse,
     RevertMovementRequest,
 )
 from app.models.users.user_model import User, UserRole
 from app.models.inventory.inventory_enums import MovementType
+from app.models.inventory.inventory_item_model import InventoryItem
+from app.services.audit import audit_buffer
+
+
+# Único rol que puede revertir movimientos
+_REVERT_ROLE = UserRole.OWNER
+
+# Plantilla de auditoría (el texto se arma al volcar el lote, ver audit_buffer;
+# también el acceso a movement_type.value)
+_AUDIT_REVERTED = (
+    "Movimiento revertido: {name} (Movimiento original #{movement_id}, tipo: {movement_type.value}, "
+    "cantidad: {quantity}). Motivo: {reason}. Revertido por {actor}"
+)
+
+# Validador compilado una sola vez para listas de movimientos
+_MOVEMENT_LIST_ADAPTER = TypeAdapter(List[MovementResponse])
 
 
 class InventoryMovementsService:
@@ -27,7 +43,30 @@ class InventoryMovementsService:
         self.db = db
         self.movements_repo = InventoryMovementsRepository(db)
         self.items_repo = InventoryItemsRepository(db)
-        self.audit_repo = AuditRepository(db)
+
+    async def _get_item_or_404(
+        self,
+        item_id: int,
+        business_id: int,
+        load: Tuple[str, ...] = (),
+        for_update: bool = False,
+    ) -> InventoryItem:
+        """
+        Obtiene un ítem del negocio o lanza 404.
+        load indica las relaciones a cargar (solo las que la respuesta necesita);
+        for_update bloquea la fila hasta el commit.
+        """
+        if for_update:
+            item = await self.items_repo.get_by_id_for_update(item_id, business_id, load=load)
+        else:
+            item = await self.items_repo.get_by_id(item_id, business_id, load=load)
+
+        if not item:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Ítem de inventario no encontrado.",
+            )
+        return item
 
     async def create_movement(
         self,
@@ -56,12 +95,7 @@ class InventoryMovementsService:
             MovementResponse con los datos del movimiento creado
         """
         # Validar que el ítem existe
-        item = await self.items_repo.get_by_id(inventory_item_id, business_id)
-        if not item:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Ítem de inventario no encontrado.",
-            )
+        item = await self._get_item_or_404(inventory_item_id, business_id)
 
         # Crear el movimiento
         movement = await self.movements_repo.create(
@@ -133,13 +167,9 @@ class InventoryMovementsService:
         limit: int = 100,
     ) -> List[MovementResponse]:
         """Obtiene el historial de movimientos de un ítem específico"""
-        # Verificar que el ítem existe y pertenece al negocio
-        item = await self.items_repo.get_by_id(item_id, current_user.business_id)
-        if not item:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Ítem de inventario no encontrado.",
-            )
+        # Verificar que el ítem existe y pertenece al negocio (la referencia
+        # lo mantiene en el identity map, que solo guarda referencias débiles)
+        item = await self._get_item_or_404(item_id, current_user.business_id)
 
         movements = await self.movements_repo.get_by_item(
             item_id=item_id,
@@ -148,26 +178,8 @@ class InventoryMovementsService:
             limit=limit,
         )
 
-        responses = []
-        for movement in movements:
-            response = MovementResponse(
-                id=movement.id,
-                inventory_item_id=movement.inventory_item_id,
-                inventory_item_name=item.name,
-                business_id=movement.business_id,
-                created_by_user_id=movement.created_by_user_id,
-                created_by_user_name=movement.created_by.full_name if movement.created_by else None,
-                movement_type=movement.movement_type,
-                quantity=movement.quantity,
-                reason=movement.reason,
-                reference_id=movement.reference_id,
-                reverted=movement.reverted,
-                reverted_by_movement_id=movement.reverted_by_movement_id,
-                created_at=movement.created_at,
-            )
-            responses.append(response)
-
-        return responses
+        # El ítem ya está en el identity map: su nombre se resuelve sin consultas extra
+        return _MOVEMENT_LIST_ADAPTER.validate_python(movements, from_attributes=True)
 
     async def get_all_movements(
         self,
@@ -184,26 +196,27 @@ class InventoryMovementsService:
             movement_type=movement_type,
         )
 
-        responses = []
-        for movement in movements:
-            response = MovementResponse(
-                id=movement.id,
-                inventory_item_id=movement.inventory_item_id,
-                inventory_item_name=movement.inventory_item.name if movement.inventory_item else "Desconocido",
-                business_id=movement.business_id,
-                created_by_user_id=movement.created_by_user_id,
-                created_by_user_name=movement.created_by.full_name if movement.created_by else None,
-                movement_type=movement.movement_type,
-                quantity=movement.quantity,
-                reason=movement.reason,
-                reference_id=movement.reference_id,
-                reverted=movement.reverted,
-                reverted_by_movement_id=movement.reverted_by_movement_id,
-                created_at=movement.created_at,
-            )
-            responses.append(response)
+        return _MOVEMENT_LIST_ADAPTER.validate_python(movements, from_attributes=True)
 
-        return responses
+    async def iter_all_movements(
+        self,
+        current_user: User,
+        skip: int = 0,
+        limit: int = 1000,
+        movement_type: Optional[MovementType] = None,
+    ) -> AsyncIterator[MovementResponse]:
+        """
+        Itera los movimientos del negocio, leyendo y validando por lotes.
+        Permite serializar exportaciones grandes en streaming con memoria acotada.
+        """
+        async for partition in self.movements_repo.stream_by_business(
+            business_id=current_user.business_id,
+            skip=skip,
+            limit=limit,
+            movement_type=movement_type,
+        ):
+            for response in _MOVEMENT_LIST_ADAPTER.validate_python(partition, from_attributes=True):
+                yield response
 
     async def revert_movement(
         self,
@@ -229,14 +242,14 @@ class InventoryMovementsService:
             MovementResponse del movimiento de reversión creado
         """
         # Solo OWNER puede revertir
-        if current_user.role != UserRole.OWNER:
+        if current_user.role != _REVERT_ROLE:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Solo el OWNER puede revertir movimientos.",
             )
 
-        # Obtener el movimiento original
-        original_movement = await self.movements_repo.get_by_id(movement_id, current_user.business_id)
+        # Obtener el movimiento original (fila bloqueada hasta el commit)
+        original_movement = await self.movements_repo.get_by_id_for_update(movement_id, current_user.business_id)
 
         if not original_movement:
             raise HTTPException(
@@ -251,18 +264,11 @@ class InventoryMovementsService:
                 detail="Este movimiento ya fue revertido.",
             )
 
-        # Obtener el ítem para validar stock
-        item = await self.items_repo.get_by_id(
-            original_movement.inventory_item_id,
-            current_user.business_id,
+        # Obtener el ítem para validar stock (fila bloqueada hasta el commit)
+        item = await self._get_item_or_404(
+            original_movement.inventory_item_id, current_user.business_id, for_update=True
         )
 
-        if not item:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Ítem de inventario no encontrado.",
-            )
-
         # Calcular nuevo stock después de revertir
         new_stock = item.quantity_in_stock - original_movement.quantity
 
@@ -272,28 +278,26 @@ class InventoryMovementsService:
                 detail=f"No se puede revertir: el stock resultante sería negativo ({new_stock} {item.unit_of_measure}).",
             )
 
-        # Crear movimiento de reversión (cantidad inversa)
-        reverting_movement = await self.movements_repo.create(
-            inventory_item_id=original_movement.inventory_item_id,
-            business_id=current_user.business_id,
+        # Stock, movimiento de reversión y marca del original: una sola sentencia (CTE)
+        reverting_movement = await self.movements_repo.revert_atomic(
+            original_movement,
             created_by_user_id=current_user.id,
-            movement_type=MovementType.REVERT.value,
-            quantity=-original_movement.quantity,  # Cantidad inversa
             reason=f"Reversión del movimiento #{original_movement.id}. Motivo: {data.reason}",
-            reference_id=original_movement.id,
         )
 
-        # Marcar el movimiento original como revertido
-        await self.movements_repo.mark_as_reverted(original_movement, reverting_movement.id)
-
-        # Actualizar el stock del ítem
-        await self.items_repo.update_stock(item, new_stock)
-
-        # Registrar auditoría
-        await self.audit_repo.create_log(
+        # Registrar auditoría (se inserta en lote en segundo plano)
+        audit_buffer.enqueue_log(
             business_id=current_user.business_id,
             user_id=current_user.id,
-            action=f"Movimiento revertido: {item.name} (Movimiento original #{original_movement.id}, tipo: {original_movement.movement_type.value}, cantidad: {original_movement.quantity}). Motivo: {data.reason}. Revertido por {current_user.full_name}",
+            action=_AUDIT_REVERTED,
+            params={
+                "name": item.name,
+                "movement_id": original_movement.id,
+                "movement_type": original_movement.movement_type,
+                "quantity": original_movement.quantity,
+                "reason": data.reason,
+                "actor": current_user.full_name,
+            },
         )
 
         # Preparar respuesta
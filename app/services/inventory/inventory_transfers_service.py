@@ -4,14 +4,13 @@ Maneja operaciones de traslados de inventario entre negocios relacionados.
 """
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
-from typing import List
+from typing import List, Tuple
 from decimal import Decimal
 from app.repositories.inventory.inventory_transfers_repository import InventoryTransfersRepository
 from app.repositories.inventory.inventory_items_repository import InventoryItemsRepository
 from app.repositories.inventory.inventory_movements_repository import InventoryMovementsRepository
 from app.repositories.business.business_relationships_repository import BusinessRelationshipsRepository
 from app.repositories.business.business_repository import BusinessRepository
-from app.repositories.audit.audit_repository import AuditRepository
 from app.schemas.inventory.inventory_transfer_schema import (
     TransferCreate,
     TransferResponse,
@@ -19,7 +18,66 @@ from app.schemas.inventory.inventory_transfer_schema import (
     TransferItemResponse,
 )
 from app.models.users.user_model import User, UserRole
+from app.dependencies.auth_dependencies import require_role
 from app.models.inventory.inventory_enums import TransferStatus, RelationshipStatus, MovementType
+from app.services.audit import audit_buffer
+
+
+# Roles que pueden crear, aceptar, rechazar y cancelar traslados
+_MUTATING_ROLES = frozenset({UserRole.OWNER, UserRole.ADMIN})
+
+_DECIMAL_ZERO = Decimal("0")
+
+# Escala de TransferItem.quantity (Numeric(10, 3)), para responder igual que la base de datos
+_QUANTITY_STEP = Decimal("0.001")
+
+# Estados válidos para el filtro del listado, indexados por su valor
+_STATUS_BY_VALUE = {s.value: s for s in TransferStatus}
+
+
+# Plantillas de auditoría (el texto se arma al volcar el lote, ver audit_buffer).
+# Cada operación deja un registro en el negocio origen y otro en el destino.
+_AUDIT_CREATED_ORIGIN = "Traslado de inventario creado hacia '{to_name}' (ID: {transfer_id}) por {actor}. Estado: PENDING"
+_AUDIT_CREATED_DESTINATION = "Solicitud de traslado de inventario recibida desde '{from_name}' (ID: {transfer_id}). Estado: PENDING"
+_AUDIT_ACCEPTED_ORIGIN = "Traslado de inventario completado (ID: {transfer_id}) hacia '{to_name}'. Estado: COMPLETED"
+_AUDIT_ACCEPTED_DESTINATION = "Traslado de inventario aceptado (ID: {transfer_id}) desde '{from_name}' por {actor}. Estado: COMPLETED"
+_AUDIT_REJECTED_ORIGIN = "Traslado de inventario rechazado (ID: {transfer_id}) hacia '{to_name}'. Estado: REJECTED"
+_AUDIT_REJECTED_DESTINATION = "Traslado de inventario rechazado (ID: {transfer_id}) desde '{from_name}' por {actor}. Estado: REJECTED"
+_AUDIT_CANCELLED_ORIGIN = "Traslado de inventario cancelado (ID: {transfer_id}) hacia '{to_name}' por {actor}. Estado: CANCELLED"
+_AUDIT_CANCELLED_DESTINATION = "Traslado de inventario cancelado (ID: {transfer_id}) desde '{from_name}'. Estado: CANCELLED"
+
+
+def _enqueue_transfer_audit(
+    transfer_id: int,
+    user: User,
+    from_business: Tuple[int, str],
+    to_business: Tuple[int, str],
+    origin_action: str,
+    destination_action: str,
+) -> None:
+    """
+    Encola los dos registros de auditoría de un traslado (negocio origen y destino).
+    Se llama después del commit: la auditoría no bloquea la respuesta.
+    from_business / to_business: (ID, nombre) de cada negocio.
+    """
+    params = {
+        "transfer_id": transfer_id,
+        "from_name": from_business[1],
+        "to_name": to_business[1],
+        "actor": user.full_name,
+    }
+    audit_buffer.enqueue_log(
+        business_id=from_business[0],
+        user_id=user.id,
+        action=origin_action,
+        params=params,
+    )
+    audit_buffer.enqueue_log(
+        business_id=to_business[0],
+        user_id=user.id,
+        action=destination_action,
+        params=params,
+    )
 
 
 class InventoryTransfersService:
@@ -35,7 +93,6 @@ class InventoryTransfersService:
         self.movements_repo = InventoryMovementsRepository(db)
         self.relationships_repo = BusinessRelationshipsRepository(db)
         self.business_repo = BusinessRepository(db)
-        self.audit_repo = AuditRepository(db)
 
     async def create_transfer(
         self,
@@ -61,11 +118,9 @@ class InventoryTransfersService:
             TransferResponse con los datos del traslado creado
         """
         # Validar que el usuario sea OWNER o ADMIN
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER y ADMIN pueden crear traslados de inventario.",
-            )
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER y ADMIN pueden crear traslados de inventario."
+        )
 
         # Validar que no traslade al mismo negocio
         if data.to_business_id == current_user.business_id:
@@ -74,8 +129,13 @@ class InventoryTransfersService:
                 detail="No puedes crear un traslado hacia tu propio negocio.",
             )
 
+        # Negocio destino y relación entre ambos negocios en una sola consulta
+        target_business = await self.relationships_repo.get_transfer_context(
+            from_business_id=current_user.business_id,
+            to_business_id=data.to_business_id,
+        )
+
         # Validar que el negocio destino exista
-        target_business = await self.business_repo.get_by_id(data.to_business_id)
         if not target_business:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -83,21 +143,22 @@ class InventoryTransfersService:
             )
 
         # Validar que exista una relación ACTIVE entre los negocios
-        relationship = await self.relationships_repo.get_by_businesses(
-            business_id_1=current_user.business_id,
-            business_id_2=data.to_business_id,
-        )
-        if not relationship or relationship.status != RelationshipStatus.ACTIVE:
+        if target_business.relationship_status != RelationshipStatus.ACTIVE:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="No existe una relación activa entre los negocios. Primero deben establecer una relación.",
             )
 
         # Validar todos los ítems y stock
+        # Los ítems se cargan en un solo SELECT ... IN (TransferCreate ya rechaza IDs duplicados)
+        items_map = await self.items_repo.get_by_ids(
+            [item_data.inventory_item_id for item_data in data.items],
+            current_user.business_id,
+        )
         items_data = []
         for item_data in data.items:
             # Validar que el ítem exista y pertenezca al negocio origen
-            item = await self.items_repo.get_by_id(item_data.inventory_item_id, current_user.business_id)
+            item = items_map.get(item_data.inventory_item_id)
             if not item:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -133,26 +194,44 @@ class InventoryTransfersService:
             items=items_data,
         )
 
-        # Registrar auditoría en el negocio origen
-        origin_business = await self.business_repo.get_by_id(current_user.business_id)
-        await self.audit_repo.create_log(
-            business_id=current_user.business_id,
-            user_id=current_user.id,
-            action=f"Traslado de inventario creado hacia '{target_business.name}' (ID: {transfer.id}) por {current_user.full_name}. Estado: PENDING",
+        # Auditoría en el negocio origen y en el destino, fuera de la ruta crítica
+        # El negocio origen ya viene cargado con el usuario actual
+        _enqueue_transfer_audit(
+            transfer.id,
+            current_user,
+            from_business=(current_user.business_id, current_user.business.name),
+            to_business=(data.to_business_id, target_business.name),
+            origin_action=_AUDIT_CREATED_ORIGIN,
+            destination_action=_AUDIT_CREATED_DESTINATION,
         )
 
-        # Registrar auditoría en el negocio destino
-        await self.audit_repo.create_log(
-            business_id=data.to_business_id,
-            user_id=current_user.id,
-            action=f"Solicitud de traslado de inventario recibida desde '{origin_business.name}' (ID: {transfer.id}). Estado: PENDING",
+        # La respuesta se arma con lo que ya está en memoria (sin volver a consultar)
+        return TransferResponse.model_construct(
+            id=transfer.id,
+            from_business_id=transfer.from_business_id,
+            from_business_name=current_user.business.name,
+            to_business_id=transfer.to_business_id,
+            to_business_name=target_business.name,
+            created_by_user_id=current_user.id,
+            created_by_user_name=current_user.full_name,
+            status=transfer.status,
+            notes=transfer.notes,
+            created_at=transfer.created_at,
+            updated_at=transfer.updated_at,
+            completed_at=transfer.completed_at,
+            items=[
+                TransferItemResponse.model_construct(
+                    id=item.id,
+                    transfer_id=item.transfer_id,
+                    inventory_item_id=item.inventory_item_id,
+                    inventory_item_name=items_map[item.inventory_item_id].name,
+                    quantity=item.quantity.quantize(_QUANTITY_STEP),  # escala de la columna
+                    notes=item.notes,
+                )
+                for item in transfer.items
+            ],
         )
 
-        # Cargar el traslado con todas las relaciones
-        transfer_with_relations = await self.transfers_repo.get_by_id(transfer.id)
-
-        return self._build_response(transfer_with_relations)
-
     async def accept_transfer(
         self,
         transfer_id: int,
@@ -180,14 +259,12 @@ class InventoryTransfersService:
             TransferResponse con los datos del traslado actualizado
         """
         # Validar que el usuario sea OWNER o ADMIN
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER y ADMIN pueden aceptar traslados.",
-            )
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER y ADMIN pueden aceptar traslados."
+        )
 
-        # Obtener el traslado
-        transfer = await self.transfers_repo.get_by_id(transfer_id)
+        # Obtener el traslado bloqueando su fila hasta el commit
+        transfer = await self.transfers_repo.get_by_id(transfer_id, for_update=True)
         if not transfer:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -208,12 +285,16 @@ class InventoryTransfersService:
                 detail=f"No se puede aceptar un traslado en estado {transfer.status.value}.",
             )
 
-        # Validar nuevamente el stock (puede haber cambiado desde que se creó)
+        # Validar nuevamente el stock (puede haber cambiado desde que se creó).
+        # Los ítems origen quedan bloqueados (FOR UPDATE) hasta el commit, así otra
+        # operación concurrente no puede consumir el stock ya validado.
+        locked_items = await self.items_repo.get_by_ids(
+            [ti.inventory_item_id for ti in transfer.items],
+            transfer.from_business_id,
+            for_update=True,
+        )
         for transfer_item in transfer.items:
-            origin_item = await self.items_repo.get_by_id(
-                transfer_item.inventory_item_id,
-                transfer.from_business_id,
-            )
+            origin_item = locked_items.get(transfer_item.inventory_item_id)
             if not origin_item:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -226,94 +307,108 @@ class InventoryTransfersService:
                     detail=f"Stock insuficiente para '{origin_item.name}' en el negocio origen. Disponible: {origin_item.quantity_in_stock}, Solicitado: {transfer_item.quantity}",
                 )
 
-        # Procesar el traslado
-        for transfer_item in transfer.items:
-            # Obtener el ítem en el negocio origen
-            origin_item = await self.items_repo.get_by_id(
-                transfer_item.inventory_item_id,
-                transfer.from_business_id,
-            )
-
-            # Crear movimiento TRANSFER_OUT en el negocio origen
-            await self.movements_repo.create(
-                inventory_item_id=origin_item.id,
-                business_id=transfer.from_business_id,
-                created_by_user_id=current_user.id,
-                movement_type=MovementType.TRANSFER_OUT.value,
-                quantity=transfer_item.quantity,
-                reason=f"Traslado a '{transfer.to_business.name}' (ID: {transfer.id})",
-                reference_id=transfer.id,
-            )
-
-            # Actualizar stock en el negocio origen (reducir)
-            origin_item.quantity_in_stock -= transfer_item.quantity
-            await self.items_repo.update(origin_item)
+        # Buscar de una vez los ítems compatibles en el negocio destino
+        # IMPORTANTE: Se emparejan por nombre y unidad de medida.
+        # El bloqueo evita que otra aceptación concurrente hacia el mismo negocio
+        # cree en paralelo el mismo ítem faltante.
+        await self.items_repo.lock_business_catalog(transfer.to_business_id)
+        dest_by_key = await self.items_repo.get_by_name_unit_bulk(
+            business_id=transfer.to_business_id,
+            pairs=list({
+                (ti.inventory_item.name, ti.inventory_item.unit_of_measure)
+                for ti in transfer.items
+            }),
+        )
 
-            # Buscar o crear el ítem en el negocio destino
-            # IMPORTANTE: Buscar por nombre y unidad de medida (o SKU si existe)
-            dest_items = await self.items_repo.get_all_by_business(
-                business_id=transfer.to_business_id,
-                skip=0,
-                limit=1000,
+        # Crear en un solo INSERT los ítems que no existen en el negocio destino
+        # (varias líneas del traslado pueden mapear al mismo ítem destino)
+        missing = {}
+        for transfer_item in transfer.items:
+            origin_item = locked_items[transfer_item.inventory_item_id]
+            dest_key = (origin_item.name, origin_item.unit_of_measure)
+            if dest_key not in dest_by_key:
+                missing.setdefault(dest_key, origin_item)
+        if missing:
+            created_items = await self.items_repo.create_many([
+                {
+                    "business_id": transfer.to_business_id,
+                    "name": origin_item.name,
+                    "category": origin_item.category,
+                    "unit_of_measure": origin_item.unit_of_measure,
+                    "sku": None,  # No copiar SKU para evitar conflictos
+                    "quantity_in_stock": _DECIMAL_ZERO,
+                    "min_stock": origin_item.min_stock,
+                    "max_stock": origin_item.max_stock,
+                    "unit_price": origin_item.unit_price,
+                    "tax_percentage": origin_item.tax_percentage,
+                    "include_tax": origin_item.include_tax,
+                    "supplier_id": None,  # El proveedor puede no existir en el negocio destino
+                }
+                for origin_item in missing.values()
+            ], commit=False)
+            dest_by_key.update(
+                {(item.name, item.unit_of_measure): item for item in created_items}
             )
 
-            # Buscar ítem compatible (mismo nombre y unidad de medida)
-            dest_item = None
-            for item in dest_items:
-                if (item.name == origin_item.name and
-                    item.unit_of_measure == origin_item.unit_of_measure):
-                    dest_item = item
-                    break
-
-            # Si no existe, crear el ítem en el negocio destino
-            if not dest_item:
-                dest_item = await self.items_repo.create(
-                    business_id=transfer.to_business_id,
-                    name=origin_item.name,
-                    category=origin_item.category,
-                    unit_of_measure=origin_item.unit_of_measure,
-                    sku=None,  # No copiar SKU para evitar conflictos
-                    quantity_in_stock=Decimal(0),
-                    min_stock=origin_item.min_stock,
-                    max_stock=origin_item.max_stock,
-                    unit_price=origin_item.unit_price,
-                    tax_percentage=origin_item.tax_percentage,
-                    include_tax=origin_item.include_tax,
-                    supplier_id=None,  # El proveedor puede no existir en el negocio destino
-                )
-
-            # Crear movimiento TRANSFER_IN en el negocio destino
-            await self.movements_repo.create(
-                inventory_item_id=dest_item.id,
-                business_id=transfer.to_business_id,
-                created_by_user_id=current_user.id,
-                movement_type=MovementType.TRANSFER_IN.value,
-                quantity=transfer_item.quantity,
-                reason=f"Traslado desde '{transfer.from_business.name}' (ID: {transfer.id})",
-                reference_id=transfer.id,
-            )
+        # Procesar el traslado: se acumulan movimientos y variaciones de stock
+        # y se escriben en bloque al final (INSERT/UPDATE de varias filas)
+        # Datos repetidos en cada movimiento y en la auditoría, resueltos una vez
+        transfer_ref = transfer.id
+        from_name = transfer.from_business.name
+        to_name = transfer.to_business.name
+        reason_out = f"Traslado a '{to_name}' (ID: {transfer_ref})"
+        reason_in = f"Traslado desde '{from_name}' (ID: {transfer_ref})"
+        movements = []
+        stock_deltas = {}
+        for transfer_item in transfer.items:
+            # Ítem en el negocio origen, ya bloqueado y validado arriba
+            origin_item = locked_items[transfer_item.inventory_item_id]
+
+            # Movimiento TRANSFER_OUT en el negocio origen (reduce stock)
+            movements.append({
+                "inventory_item_id": origin_item.id,
+                "business_id": transfer.from_business_id,
+                "created_by_user_id": current_user.id,
+                "movement_type": MovementType.TRANSFER_OUT,
+                "quantity": transfer_item.quantity,
+                "reason": reason_out,
+                "reference_id": transfer_ref,
+            })
+            stock_deltas[origin_item.id] = stock_deltas.get(origin_item.id, _DECIMAL_ZERO) - transfer_item.quantity
+
+            # Ítem compatible en el destino (mismo nombre y unidad de medida)
+            dest_item = dest_by_key[(origin_item.name, origin_item.unit_of_measure)]
+
+            # Movimiento TRANSFER_IN en el negocio destino (aumenta stock)
+            movements.append({
+                "inventory_item_id": dest_item.id,
+                "business_id": transfer.to_business_id,
+                "created_by_user_id": current_user.id,
+                "movement_type": MovementType.TRANSFER_IN,
+                "quantity": transfer_item.quantity,
+                "reason": reason_in,
+                "reference_id": transfer_ref,
+            })
+            stock_deltas[dest_item.id] = stock_deltas.get(dest_item.id, _DECIMAL_ZERO) + transfer_item.quantity
 
-            # Actualizar stock en el negocio destino (aumentar)
-            dest_item.quantity_in_stock += transfer_item.quantity
-            await self.items_repo.update(dest_item)
+        await self.movements_repo.create_many(movements, commit=False)
+        await self.items_repo.apply_stock_deltas(stock_deltas, commit=False)
 
-        # Actualizar estado del traslado
+        # Actualizar estado del traslado: un único commit confirma movimientos,
+        # stock y estado, y libera los bloqueos
         updated_transfer = await self.transfers_repo.update_status(
             transfer=transfer,
             new_status=TransferStatus.COMPLETED.value,
         )
 
-        # Registrar auditoría en ambos negocios
-        await self.audit_repo.create_log(
-            business_id=transfer.to_business_id,
-            user_id=current_user.id,
-            action=f"Traslado de inventario aceptado (ID: {transfer.id}) desde '{transfer.from_business.name}' por {current_user.full_name}. Estado: COMPLETED",
-        )
-
-        await self.audit_repo.create_log(
-            business_id=transfer.from_business_id,
-            user_id=current_user.id,
-            action=f"Traslado de inventario completado (ID: {transfer.id}) hacia '{transfer.to_business.name}'. Estado: COMPLETED",
+        # Auditoría en ambos negocios, fuera de la ruta crítica
+        _enqueue_transfer_audit(
+            transfer_ref,
+            current_user,
+            from_business=(transfer.from_business_id, from_name),
+            to_business=(transfer.to_business_id, to_name),
+            origin_action=_AUDIT_ACCEPTED_ORIGIN,
+            destination_action=_AUDIT_ACCEPTED_DESTINATION,
         )
 
         return self._build_response(updated_transfer)
@@ -338,14 +433,12 @@ class InventoryTransfersService:
             TransferResponse con los datos del traslado actualizado
         """
         # Validar que el usuario sea OWNER o ADMIN
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER y ADMIN pueden rechazar traslados.",
-            )
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER y ADMIN pueden rechazar traslados."
+        )
 
         # Obtener el traslado
-        transfer = await self.transfers_repo.get_by_id(transfer_id)
+        transfer = await self.transfers_repo.get_by_id(transfer_id, with_items=False)
         if not transfer:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -372,20 +465,18 @@ class InventoryTransfersService:
             new_status=TransferStatus.REJECTED.value,
         )
 
-        # Registrar auditoría en ambos negocios
-        await self.audit_repo.create_log(
-            business_id=transfer.to_business_id,
-            user_id=current_user.id,
-            action=f"Traslado de inventario rechazado (ID: {transfer.id}) desde '{transfer.from_business.name}' por {current_user.full_name}. Estado: REJECTED",
+        # Auditoría en ambos negocios, fuera de la ruta crítica
+        _enqueue_transfer_audit(
+            transfer.id,
+            current_user,
+            from_business=(transfer.from_business_id, transfer.from_business.name),
+            to_business=(transfer.to_business_id, transfer.to_business.name),
+            origin_action=_AUDIT_REJECTED_ORIGIN,
+            destination_action=_AUDIT_REJECTED_DESTINATION,
         )
 
-        await self.audit_repo.create_log(
-            business_id=transfer.from_business_id,
-            user_id=current_user.id,
-            action=f"Traslado de inventario rechazado (ID: {transfer.id}) hacia '{transfer.to_business.name}'. Estado: REJECTED",
-        )
-
-        return self._build_response(updated_transfer)
+        item_rows = await self.transfers_repo.get_item_rows(transfer_id)
+        return self._build_response(updated_transfer, item_rows)
 
     async def cancel_transfer(
         self,
@@ -407,14 +498,12 @@ class InventoryTransfersService:
             TransferResponse con los datos del traslado actualizado
         """
         # Validar que el usuario sea OWNER o ADMIN
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER y ADMIN pueden cancelar traslados.",
-            )
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER y ADMIN pueden cancelar traslados."
+        )
 
         # Obtener el traslado
-        transfer = await self.transfers_repo.get_by_id(transfer_id)
+        transfer = await self.transfers_repo.get_by_id(transfer_id, with_items=False)
         if not transfer:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -438,20 +527,18 @@ class InventoryTransfersService:
         # Cancelar el traslado
         updated_transfer = await self.transfers_repo.cancel_transfer(transfer)
 
-        # Registrar auditoría en ambos negocios
-        await self.audit_repo.create_log(
-            business_id=transfer.from_business_id,
-            user_id=current_user.id,
-            action=f"Traslado de inventario cancelado (ID: {transfer.id}) hacia '{transfer.to_business.name}' por {current_user.full_name}. Estado: CANCELLED",
-        )
-
-        await self.audit_repo.create_log(
-            business_id=transfer.to_business_id,
-            user_id=current_user.id,
-            action=f"Traslado de inventario cancelado (ID: {transfer.id}) desde '{transfer.from_business.name}'. Estado: CANCELLED",
+        # Auditoría en ambos negocios, fuera de la ruta crítica
+        _enqueue_transfer_audit(
+            transfer.id,
+            current_user,
+            from_business=(transfer.from_business_id, transfer.from_business.name),
+            to_business=(transfer.to_business_id, transfer.to_business.name),
+            origin_action=_AUDIT_CANCELLED_ORIGIN,
+            destination_action=_AUDIT_CANCELLED_DESTINATION,
         )
 
-        return self._build_response(updated_transfer)
+        item_rows = await self.transfers_repo.get_item_rows(transfer_id)
+        return self._build_response(updated_transfer, item_rows)
 
     async def get_transfer_by_id(
         self,
@@ -471,7 +558,7 @@ class InventoryTransfersService:
         Returns:
             TransferResponse con los datos del traslado
         """
-        transfer = await self.transfers_repo.get_by_id(transfer_id)
+        transfer = await self.transfers_repo.get_by_id(transfer_id, with_items=False)
 
         if not transfer:
             raise HTTPException(
@@ -487,7 +574,8 @@ class InventoryTransfersService:
                 detail="No tienes permiso para ver este traslado.",
             )
 
-        return self._build_response(transfer)
+        item_rows = await self.transfers_repo.get_item_rows(transfer_id)
+        return self._build_response(transfer, item_rows)
 
     async def get_transfers(
         self,
@@ -509,37 +597,48 @@ class InventoryTransfersService:
         # Validar status_filter
         status_enum = None
         if status_filter:
-            try:
-                status_enum = TransferStatus(status_filter)
-            except ValueError:
+            status_enum = _STATUS_BY_VALUE.get(status_filter)
+            if status_enum is None:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Estado inválido: {status_filter}",
                 )
 
-        transfers = await self.transfers_repo.get_transfers_for_business(
+        rows = await self.transfers_repo.get_transfers_for_business(
             business_id=current_user.business_id,
             status_filter=status_enum,
             direction=direction,
         )
 
-        return [self._build_list_response(transfer) for transfer in transfers]
-
-    def _build_response(self, transfer) -> TransferResponse:
-        """Construye la respuesta completa del traslado con ítems"""
-        items_response = [
-            TransferItemResponse(
-                id=item.id,
-                transfer_id=item.transfer_id,
-                inventory_item_id=item.inventory_item_id,
-                inventory_item_name=item.inventory_item.name,
-                quantity=item.quantity,
-                notes=item.notes,
-            )
-            for item in transfer.items
-        ]
+        return [self._build_list_response(row) for row in rows]
+
+    def _build_response(self, transfer, item_rows=None) -> TransferResponse:
+        """
+        Construye la respuesta completa del traslado con ítems.
+        Usa model_construct: los datos salen del ORM y ya fueron validados al escribirse.
+
+        item_rows: filas de transfers_repo.get_item_rows; si no se pasan,
+        se usan los ítems ya cargados en transfer.items.
+        """
+        if item_rows is not None:
+            items_response = [
+                TransferItemResponse.model_construct(**row._mapping)
+                for row in item_rows
+            ]
+        else:
+            items_response = [
+                TransferItemResponse.model_construct(
+                    id=item.id,
+                    transfer_id=item.transfer_id,
+                    inventory_item_id=item.inventory_item_id,
+                    inventory_item_name=item.inventory_item.name,
+                    quantity=item.quantity,
+                    notes=item.notes,
+                )
+                for item in transfer.items
+            ]
 
-        return TransferResponse(
+        return TransferResponse.model_construct(
             id=transfer.id,
             from_business_id=transfer.from_business_id,
             from_business_name=transfer.from_business.name,
@@ -555,16 +654,9 @@ class InventoryTransfersService:
             items=items_response,
         )
 
-    def _build_list_response(self, transfer) -> TransferListResponse:
-        """Construye la respuesta resumida del traslado sin ítems"""
-        return TransferListResponse(
-            id=transfer.id,
-            from_business_id=transfer.from_business_id,
-            from_business_name=transfer.from_business.name,
-            to_business_id=transfer.to_business_id,
-            to_business_name=transfer.to_business.name,
-            status=transfer.status,
-            items_count=len(transfer.items),
-            created_at=transfer.created_at,
-            completed_at=transfer.completed_at,
-        )
+    def _build_list_response(self, row) -> TransferListResponse:
+        """
+        Construye la respuesta resumida del traslado sin ítems (sin re-validar)
+        a partir de una fila de transfers_repo.get_transfers_for_business.
+        """
+        return TransferListResponse.model_construct(**row._mapping)
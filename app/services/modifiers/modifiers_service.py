@@ -9,7 +9,6 @@ from decimal import Decimal
 from app.repositories.modifiers.modifiers_repository import ModifiersRepository
 from app.repositories.products.products_repository import ProductsRepository
 from app.repositories.inventory.inventory_items_repository import InventoryItemsRepository
-from app.repositories.audit.audit_repository import AuditRepository
 from app.schemas.modifiers.modifier_schema import (
     ModifierGroupCreate,
     ModifierGroupUpdate,
@@ -23,6 +22,21 @@ from app.schemas.modifiers.modifier_schema import (
     ProductModifierResponse,
 )
 from app.models.users.user_model import User, UserRole
+from app.dependencies.auth_dependencies import require_role
+from app.services.audit import audit_buffer
+from app.utils.changes import diff_changes
+
+
+# Plantillas de auditoría (el texto se arma al volcar el lote, ver audit_buffer)
+_AUDIT_GROUP_CREATED = "Grupo de modificadores creado: {name} (ID: {id}) por {actor}"
+_AUDIT_GROUP_UPDATED = "Grupo de modificadores actualizado: {name} (ID: {id}). Actualizado por {actor}"
+_AUDIT_CREATED = "Modificador creado: {name} (ID: {id}) en grupo '{group}' con {items_count} ítems por {actor}"
+_AUDIT_UPDATED = "Modificador actualizado: {name} (ID: {id}). Actualizado por {actor}"
+_AUDIT_ASSIGNED = "Modificador '{name}' asignado al producto '{product}' por {actor}"
+_AUDIT_UNASSIGNED = "Modificador '{name}' desasignado del producto '{product}' por {actor}"
+
+# Roles que pueden modificar grupos, modificadores y su asignación a productos
+_MUTATING_ROLES = frozenset({UserRole.OWNER, UserRole.ADMIN, UserRole.COOK})
 
 
 class ModifiersService:
@@ -36,7 +50,6 @@ class ModifiersService:
         self.modifiers_repo = ModifiersRepository(db)
         self.products_repo = ProductsRepository(db)
         self.items_repo = InventoryItemsRepository(db)
-        self.audit_repo = AuditRepository(db)
 
     # ============= MODIFIER GROUP METHODS =============
 
@@ -59,11 +72,9 @@ class ModifiersService:
             ModifierGroupResponse con los datos del grupo creado
         """
         # Validar que el usuario sea OWNER, ADMIN o COOK
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN, UserRole.COOK]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER, ADMIN y COOK pueden crear grupos de modificadores.",
-            )
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER, ADMIN y COOK pueden crear grupos de modificadores."
+        )
 
         # Crear el grupo
         group = await self.modifiers_repo.create_modifier_group(
@@ -74,25 +85,18 @@ class ModifiersService:
             is_required=data.is_required,
         )
 
-        # Registrar auditoría
-        await self.audit_repo.create_log(
+        # Grupo recién creado: aún no tiene modificadores
+        group.modifiers_count = 0
+
+        # Registrar auditoría (se inserta en lote en segundo plano)
+        audit_buffer.enqueue_log(
             business_id=current_user.business_id,
             user_id=current_user.id,
-            action=f"Grupo de modificadores creado: {group.name} (ID: {group.id}) por {current_user.full_name}",
+            action=_AUDIT_GROUP_CREATED,
+            params={"name": group.name, "id": group.id, "actor": current_user.full_name},
         )
 
-        return ModifierGroupResponse(
-            id=group.id,
-            business_id=group.business_id,
-            name=group.name,
-            description=group.description,
-            allow_multiple=group.allow_multiple,
-            is_required=group.is_required,
-            is_active=group.is_active,
-            created_at=group.created_at,
-            updated_at=group.updated_at,
-            modifiers_count=0,
-        )
+        return ModifierGroupResponse.model_validate(group)
 
     async def get_modifier_group_by_id(
         self,
@@ -100,7 +104,7 @@ class ModifiersService:
         current_user: User,
     ) -> ModifierGroupResponse:
         """Obtiene un grupo de modificadores por ID"""
-        group = await self.modifiers_repo.get_modifier_group_by_id(group_id, current_user.business_id)
+        group = await self.modifiers_repo.get_modifier_group_with_count(group_id, current_user.business_id)
 
         if not group:
             raise HTTPException(
@@ -108,18 +112,7 @@ class ModifiersService:
                 detail="Grupo de modificadores no encontrado.",
             )
 
-        return ModifierGroupResponse(
-            id=group.id,
-            business_id=group.business_id,
-            name=group.name,
-            description=group.description,
-            allow_multiple=group.allow_multiple,
-            is_required=group.is_required,
-            is_active=group.is_active,
-            created_at=group.created_at,
-            updated_at=group.updated_at,
-            modifiers_count=len(group.modifiers),
-        )
+        return ModifierGroupResponse.model_validate(group)
 
     async def get_all_modifier_groups(
         self,
@@ -136,21 +129,7 @@ class ModifiersService:
             active_only=active_only,
         )
 
-        return [
-            ModifierGroupResponse(
-                id=group.id,
-                business_id=group.business_id,
-                name=group.name,
-                description=group.description,
-                allow_multiple=group.allow_multiple,
-                is_required=group.is_required,
-                is_active=group.is_active,
-                created_at=group.created_at,
-                updated_at=group.updated_at,
-                modifiers_count=len(group.modifiers),
-            )
-            for group in groups
-        ]
+        return [ModifierGroupResponse.model_validate(group) for group in groups]
 
     async def update_modifier_group(
         self,
@@ -160,14 +139,12 @@ class ModifiersService:
     ) -> ModifierGroupResponse:
         """Actualiza un grupo de modificadores"""
         # Validar que el usuario sea OWNER, ADMIN o COOK
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN, UserRole.COOK]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER, ADMIN y COOK pueden actualizar grupos de modificadores.",
-            )
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER, ADMIN y COOK pueden actualizar grupos de modificadores."
+        )
 
-        # Obtener el grupo
-        group = await self.modifiers_repo.get_modifier_group_by_id(group_id, current_user.business_id)
+        # Obtener el grupo (con la cantidad de modificadores para la respuesta)
+        group = await self.modifiers_repo.get_modifier_group_with_count(group_id, current_user.business_id)
 
         if not group:
             raise HTTPException(
@@ -175,52 +152,28 @@ class ModifiersService:
                 detail="Grupo de modificadores no encontrado.",
             )
 
-        # Registrar cambios para auditoría
-        changes = []
-        update_data = data.model_dump(exclude_unset=True)
+        # Registrar cambios para auditoría (se guardan estructurados en details)
+        changes = diff_changes(group, data)
 
-        for field, value in update_data.items():
-            old_value = getattr(group, field)
-            if value != old_value:
-                setattr(group, field, value)
-                changes.append(f"{field}: '{old_value}' → '{value}'")
-
-        # Solo actualizar si hay cambios
+        # Solo actualizar si hay cambios (UPDATE de las columnas cambiadas)
         if changes:
-            updated_group = await self.modifiers_repo.update_modifier_group(group)
+            updated_group = await self.modifiers_repo.update_modifier_group(
+                group,
+                {field: change["new"] for field, change in changes.items()},
+            )
 
-            # Registrar auditoría
-            await self.audit_repo.create_log(
+            # Registrar auditoría (se inserta en lote en segundo plano)
+            audit_buffer.enqueue_log(
                 business_id=current_user.business_id,
                 user_id=current_user.id,
-                action=f"Grupo de modificadores actualizado: {updated_group.name} (ID: {updated_group.id}). Cambios: {', '.join(changes)}. Actualizado por {current_user.full_name}",
+                action=_AUDIT_GROUP_UPDATED,
+                details={"changes": changes},
+                params={"name": updated_group.name, "id": updated_group.id, "actor": current_user.full_name},
             )
 
-            return ModifierGroupResponse(
-                id=updated_group.id,
-                business_id=updated_group.business_id,
-                name=updated_group.name,
-                description=updated_group.description,
-                allow_multiple=updated_group.allow_multiple,
-                is_required=updated_group.is_required,
-                is_active=updated_group.is_active,
-                created_at=updated_group.created_at,
-                updated_at=updated_group.updated_at,
-                modifiers_count=len(updated_group.modifiers),
-            )
+            return ModifierGroupResponse.model_validate(updated_group)
 
-        return ModifierGroupResponse(
-            id=group.id,
-            business_id=group.business_id,
-            name=group.name,
-            description=group.description,
-            allow_multiple=group.allow_multiple,
-            is_required=group.is_required,
-            is_active=group.is_active,
-            created_at=group.created_at,
-            updated_at=group.updated_at,
-            modifiers_count=len(group.modifiers),
-        )
+        return ModifierGroupResponse.model_validate(group)
 
     # ============= MODIFIER METHODS =============
 
@@ -247,34 +200,40 @@ class ModifiersService:
             ModifierResponse con los datos del modificador creado
         """
         # Validar que el usuario sea OWNER, ADMIN o COOK
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN, UserRole.COOK]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER, ADMIN y COOK pueden crear modificadores.",
-            )
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER, ADMIN y COOK pueden crear modificadores."
+        )
 
         # Validar que el grupo exista y pertenezca al negocio
-        group = await self.modifiers_repo.get_modifier_group_by_id(
+        # (el mismo SELECT indica si el nombre ya existe en el grupo)
+        row = await self.modifiers_repo.get_modifier_group_with_name_check(
             data.modifier_group_id,
             current_user.business_id,
+            data.name,
         )
-        if not group:
+        if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Grupo de modificadores no encontrado o no pertenece a tu negocio.",
             )
+        group, name_taken = row
 
         # Validar que el nombre no se repita en el grupo
-        if await self.modifiers_repo.modifier_name_exists_in_group(data.name, data.modifier_group_id):
+        if name_taken:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"El nombre '{data.name}' ya existe en el grupo '{group.name}'.",
             )
 
         # Validar todos los ítems de inventario
+        # Se cargan en un solo SELECT ... IN (ModifierCreate ya rechaza IDs duplicados)
+        items_map = await self.items_repo.get_by_ids(
+            [item_data.inventory_item_id for item_data in data.inventory_items],
+            current_user.business_id,
+        )
         for item_data in data.inventory_items:
             # Validar que el ítem exista y pertenezca al negocio
-            item = await self.items_repo.get_by_id(item_data.inventory_item_id, current_user.business_id)
+            item = items_map.get(item_data.inventory_item_id)
             if not item:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -296,27 +255,56 @@ class ModifiersService:
             price_extra=data.price_extra,
         )
 
-        # Crear los ítems de inventario del modificador
-        for item_data in data.inventory_items:
-            await self.modifiers_repo.add_modifier_inventory_item(
-                modifier_id=modifier.id,
-                inventory_item_id=item_data.inventory_item_id,
-                quantity=item_data.quantity,
-            )
+        # Crear los ítems de inventario del modificador (un solo INSERT)
+        modifier_items = await self.modifiers_repo.bulk_add_modifier_inventory_items(
+            modifier_id=modifier.id,
+            items=[
+                {
+                    "inventory_item_id": item_data.inventory_item_id,
+                    "quantity": item_data.quantity,
+                }
+                for item_data in data.inventory_items
+            ],
+        )
 
         await self.modifiers_repo.commit()
 
-        # Registrar auditoría
-        await self.audit_repo.create_log(
+        # Registrar auditoría (se inserta en lote en segundo plano)
+        audit_buffer.enqueue_log(
             business_id=current_user.business_id,
             user_id=current_user.id,
-            action=f"Modificador creado: {modifier.name} (ID: {modifier.id}) en grupo '{group.name}' con {len(data.inventory_items)} ítems por {current_user.full_name}",
+            action=_AUDIT_CREATED,
+            params={
+                "name": modifier.name,
+                "id": modifier.id,
+                "group": group.name,
+                "items_count": len(data.inventory_items),
+                "actor": current_user.full_name,
+            },
         )
 
-        # Cargar el modificador con todas las relaciones
-        modifier_with_relations = await self.modifiers_repo.get_modifier_by_id(modifier.id)
-
-        return self._build_modifier_response(modifier_with_relations)
+        # La respuesta se arma con lo que ya está en memoria (sin volver a consultar)
+        return ModifierResponse.model_construct(
+            id=modifier.id,
+            modifier_group_id=modifier.modifier_group_id,
+            modifier_group_name=group.name,
+            name=modifier.name,
+            description=modifier.description,
+            price_extra=modifier.price_extra,
+            is_active=modifier.is_active,
+            created_at=modifier.created_at,
+            updated_at=modifier.updated_at,
+            inventory_items=[
+                ModifierInventoryItemResponse.model_construct(
+                    id=item.id,
+                    modifier_id=item.modifier_id,
+                    inventory_item_id=item.inventory_item_id,
+                    inventory_item_name=items_map[item.inventory_item_id].name,
+                    quantity=item.quantity,
+                )
+                for item in modifier_items
+            ],
+        )
 
     async def get_modifier_by_id(
         self,
@@ -332,12 +320,9 @@ class ModifiersService:
                 detail="Modificador no encontrado.",
             )
 
-        # Validar que pertenezca al negocio
-        group = await self.modifiers_repo.get_modifier_group_by_id(
-            modifier.modifier_group_id,
-            current_user.business_id,
-        )
-        if not group:
+        # Validar que pertenezca al negocio (el grupo ya viene cargado con el modificador)
+        group = modifier.modifier_group
+        if group.business_id != current_user.business_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="El modificador no pertenece a tu negocio.",
@@ -353,16 +338,16 @@ class ModifiersService:
     ) -> List[ModifierListResponse]:
         """Obtiene todos los modificadores de un grupo"""
         # Validar que el grupo exista y pertenezca al negocio
-        group = await self.modifiers_repo.get_modifier_group_by_id(group_id, current_user.business_id)
-        if not group:
+        if not await self.modifiers_repo.modifier_group_exists(group_id, current_user.business_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Grupo de modificadores no encontrado.",
             )
 
-        modifiers = await self.modifiers_repo.get_modifiers_by_group(group_id, active_only)
+        rows = await self.modifiers_repo.get_modifiers_by_group(group_id, active_only)
 
-        return [self._build_modifier_list_response(modifier) for modifier in modifiers]
+        # Las filas ya vienen proyectadas desde SQL con los tipos del schema
+        return [ModifierListResponse.model_construct(**row) for row in rows]
 
     async def update_modifier(
         self,
@@ -372,11 +357,9 @@ class ModifiersService:
     ) -> ModifierResponse:
         """Actualiza un modificador (sin modificar ítems de inventario)"""
         # Validar que el usuario sea OWNER, ADMIN o COOK
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN, UserRole.COOK]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER, ADMIN y COOK pueden actualizar modificadores.",
-            )
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER, ADMIN y COOK pueden actualizar modificadores."
+        )
 
         # Obtener el modificador
         modifier = await self.modifiers_repo.get_modifier_by_id(modifier_id)
@@ -387,12 +370,9 @@ class ModifiersService:
                 detail="Modificador no encontrado.",
             )
 
-        # Validar que pertenezca al negocio
-        group = await self.modifiers_repo.get_modifier_group_by_id(
-            modifier.modifier_group_id,
-            current_user.business_id,
-        )
-        if not group:
+        # Validar que pertenezca al negocio (el grupo ya viene cargado con el modificador)
+        group = modifier.modifier_group
+        if group.business_id != current_user.business_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="El modificador no pertenece a tu negocio.",
@@ -410,25 +390,23 @@ class ModifiersService:
                     detail=f"El nombre '{data.name}' ya existe en el grupo '{group.name}'.",
                 )
 
-        # Registrar cambios para auditoría
-        changes = []
-        update_data = data.model_dump(exclude_unset=True)
-
-        for field, value in update_data.items():
-            old_value = getattr(modifier, field)
-            if value != old_value:
-                setattr(modifier, field, value)
-                changes.append(f"{field}: '{old_value}' → '{value}'")
+        # Registrar cambios para auditoría (se guardan estructurados en details)
+        changes = diff_changes(modifier, data)
 
-        # Solo actualizar si hay cambios
+        # Solo actualizar si hay cambios (UPDATE de las columnas cambiadas)
         if changes:
-            updated_modifier = await self.modifiers_repo.update_modifier(modifier)
+            updated_modifier = await self.modifiers_repo.update_modifier(
+                modifier,
+                {field: change["new"] for field, change in changes.items()},
+            )
 
-            # Registrar auditoría
-            await self.audit_repo.create_log(
+            # Registrar auditoría (se inserta en lote en segundo plano)
+            audit_buffer.enqueue_log(
                 business_id=current_user.business_id,
                 user_id=current_user.id,
-                action=f"Modificador actualizado: {updated_modifier.name} (ID: {updated_modifier.id}). Cambios: {', '.join(changes)}. Actualizado por {current_user.full_name}",
+                action=_AUDIT_UPDATED,
+                details={"changes": changes},
+                params={"name": updated_modifier.name, "id": updated_modifier.id, "actor": current_user.full_name},
             )
 
             return self._build_modifier_response(updated_modifier)
@@ -458,60 +436,55 @@ class ModifiersService:
             ProductModifierResponse
         """
         # Validar que el usuario sea OWNER, ADMIN o COOK
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN, UserRole.COOK]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER, ADMIN y COOK pueden asignar modificadores.",
-            )
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER, ADMIN y COOK pueden asignar modificadores."
+        )
+
+        # Producto, modificador (con el negocio de su grupo) y asignación previa
+        # en una sola consulta sobre la sesión del request
+        context = await self.modifiers_repo.get_assignment_context(
+            product_id, data.modifier_id, current_user.business_id
+        )
 
         # Validar que el producto exista y pertenezca al negocio
-        product = await self.products_repo.get_by_id(product_id, current_user.business_id)
-        if not product:
+        if not context:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Producto no encontrado.",
             )
 
         # Validar que el modificador exista
-        modifier = await self.modifiers_repo.get_modifier_by_id(data.modifier_id)
-        if not modifier:
+        if context.modifier_id is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Modificador no encontrado.",
             )
 
         # Validar que el modificador pertenezca al negocio
-        group = await self.modifiers_repo.get_modifier_group_by_id(
-            modifier.modifier_group_id,
-            current_user.business_id,
-        )
-        if not group:
+        if context.modifier_business_id != current_user.business_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="El modificador no pertenece a tu negocio.",
             )
 
         # Validar que no esté ya asignado
-        existing = await self.modifiers_repo.get_product_modifier(product_id, data.modifier_id)
-        if existing:
+        if context.already_assigned:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="El modificador ya está asignado a este producto.",
             )
 
         # VALIDACIÓN DE COMPATIBILIDAD
-        # Obtener los inventory_item_id de los ingredientes del producto
-        product_ingredient_ids = {ing.inventory_item_id for ing in product.ingredients}
-
-        # Obtener los inventory_item_id del modificador
-        modifier_item_ids = {item.inventory_item_id for item in modifier.inventory_items}
-
-        # Validar que todos los ítems del modificador existan en los ingredientes del producto
-        if not modifier_item_ids.issubset(product_ingredient_ids):
-            missing_items = modifier_item_ids - product_ingredient_ids
+        # Todos los ítems del modificador deben existir en los ingredientes del producto
+        # (diferencia de conjuntos en SQL, sobre la sesión del request; solo se
+        # calcula una vez que producto y modificador pasaron sus validaciones)
+        missing_item_ids = await self.modifiers_repo.get_missing_ingredient_ids(
+            data.modifier_id, product_id
+        )
+        if missing_item_ids:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"El modificador '{modifier.name}' no es compatible con el producto '{product.name}'. Los ingredientes del modificador deben existir en el producto.",
+                detail=f"El modificador '{context.modifier_name}' no es compatible con el producto '{context.product_name}'. Los ingredientes del modificador deben existir en el producto.",
             )
 
         # Asignar el modificador
@@ -520,20 +493,21 @@ class ModifiersService:
             modifier_id=data.modifier_id,
         )
 
-        # Registrar auditoría
-        await self.audit_repo.create_log(
+        # Registrar auditoría (se inserta en lote en segundo plano)
+        audit_buffer.enqueue_log(
             business_id=current_user.business_id,
             user_id=current_user.id,
-            action=f"Modificador '{modifier.name}' asignado al producto '{product.name}' por {current_user.full_name}",
+            action=_AUDIT_ASSIGNED,
+            params={"name": context.modifier_name, "product": context.product_name, "actor": current_user.full_name},
         )
 
         return ProductModifierResponse(
             id=product_modifier.id,
             product_id=product_modifier.product_id,
             modifier_id=product_modifier.modifier_id,
-            modifier_name=modifier.name,
-            modifier_group_name=modifier.modifier_group.name,
-            price_extra=modifier.price_extra,
+            modifier_name=context.modifier_name,
+            modifier_group_name=context.modifier_group_name,
+            price_extra=context.price_extra,
         )
 
     async def get_modifiers_for_product(
@@ -552,17 +526,7 @@ class ModifiersService:
 
         product_modifiers = await self.modifiers_repo.get_modifiers_for_product(product_id)
 
-        return [
-            ProductModifierResponse(
-                id=pm.id,
-                product_id=pm.product_id,
-                modifier_id=pm.modifier_id,
-                modifier_name=pm.modifier.name,
-                modifier_group_name=pm.modifier.modifier_group.name,
-                price_extra=pm.modifier.price_extra,
-            )
-            for pm in product_modifiers
-        ]
+        return [ProductModifierResponse.model_validate(pm) for pm in product_modifiers]
 
     async def remove_modifier_from_product(
         self,
@@ -572,11 +536,9 @@ class ModifiersService:
     ):
         """Desasigna un modificador de un producto"""
         # Validar que el usuario sea OWNER, ADMIN o COOK
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN, UserRole.COOK]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER, ADMIN y COOK pueden desasignar modificadores.",
-            )
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER, ADMIN y COOK pueden desasignar modificadores."
+        )
 
         # Validar que el producto exista y pertenezca al negocio
         product = await self.products_repo.get_by_id(product_id, current_user.business_id)
@@ -600,49 +562,21 @@ class ModifiersService:
         # Desasignar
         await self.modifiers_repo.remove_modifier_from_product(product_id, modifier_id)
 
-        # Registrar auditoría
-        await self.audit_repo.create_log(
+        # Registrar auditoría (se inserta en lote en segundo plano)
+        audit_buffer.enqueue_log(
             business_id=current_user.business_id,
             user_id=current_user.id,
-            action=f"Modificador '{modifier.name}' desasignado del producto '{product.name}' por {current_user.full_name}",
+            action=_AUDIT_UNASSIGNED,
+            params={"name": modifier.name, "product": product.name, "actor": current_user.full_name},
         )
 
     # ============= HELPER METHODS =============
 
     def _build_modifier_response(self, modifier) -> ModifierResponse:
-        """Construye la respuesta completa del modificador con ítems"""
-        items_response = [
-            ModifierInventoryItemResponse(
-                id=item.id,
-                modifier_id=item.modifier_id,
-                inventory_item_id=item.inventory_item_id,
-                inventory_item_name=item.inventory_item.name,
-                quantity=item.quantity,
-            )
-            for item in modifier.inventory_items
-        ]
-
-        return ModifierResponse(
-            id=modifier.id,
-            modifier_group_id=modifier.modifier_group_id,
-            modifier_group_name=modifier.modifier_group.name,
-            name=modifier.name,
-            description=modifier.description,
-            price_extra=modifier.price_extra,
-            is_active=modifier.is_active,
-            created_at=modifier.created_at,
-            updated_at=modifier.updated_at,
-            inventory_items=items_response,
-        )
+        """
+        Construye la respuesta completa del modificador con ítems.
+        modifier_group_name e inventory_item_name salen de las relaciones
+        ya cargadas (AliasPath).
+        """
+        return ModifierResponse.model_validate(modifier)
 
-    def _build_modifier_list_response(self, modifier) -> ModifierListResponse:
-        """Construye la respuesta resumida del modificador sin ítems"""
-        return ModifierListResponse(
-            id=modifier.id,
-            modifier_group_id=modifier.modifier_group_id,
-            modifier_group_name=modifier.modifier_group.name,
-            name=modifier.name,
-            price_extra=modifier.price_extra,
-            is_active=modifier.is_active,
-            items_count=len(modifier.inventory_items),
-        )
@@ -4,14 +4,15 @@ Maneja operaciones CRUD de productos con cálculos de costos y auditoría.
 """
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from decimal import Decimal
+from pydantic import TypeAdapter
 from app.repositories.products.products_repository import ProductsRepository
 from app.repositories.inventory.inventory_items_repository import InventoryItemsRepository
 from app.repositories.inventory.inventory_movements_repository import InventoryMovementsRepository
-from app.repositories.audit.audit_repository import AuditRepository
 from app.schemas.products.product_schema import (
     ProductCreate,
+    ProductIngredientCreate,
     ProductUpdate,
     ProductResponse,
     ProductListResponse,
@@ -19,7 +20,31 @@ from app.schemas.products.product_schema import (
     IngredientUpdate,
 )
 from app.models.users.user_model import User, UserRole
+from app.dependencies.auth_dependencies import require_role
+from app.models.inventory.inventory_item_model import InventoryItem
 from app.models.inventory.inventory_enums import MovementType
+from app.services.audit import audit_buffer
+from app.utils.changes import diff_changes
+
+
+# Validador compilado una sola vez para listas de productos
+_PRODUCT_LIST_ADAPTER = TypeAdapter(List[ProductListResponse])
+
+# Plantillas de auditoría (el texto se arma al volcar el lote, ver audit_buffer)
+_AUDIT_CREATED = "Producto creado: {name} (ID: {id}) con {ingredients_count} ingredientes por {actor}"
+_AUDIT_UPDATED = "Producto actualizado: {name} (ID: {id}). Actualizado por {actor}"
+_AUDIT_INGREDIENTS_UPDATED = "Ingredientes actualizados para producto: {name} (ID: {id}). Nuevo costo total: {total_cost}. Actualizado por {actor}"
+_AUDIT_DEACTIVATED = "Producto inactivado: {name} (ID: {id}) por {actor}"
+
+# Roles que pueden crear, actualizar e inactivar productos (y sus ingredientes)
+_MUTATING_ROLES = frozenset({UserRole.OWNER, UserRole.ADMIN, UserRole.COOK})
+
+_DECIMAL_ZERO = Decimal("0")
+_DECIMAL_HUNDRED = Decimal("100")
+
+# Diferencia máxima admitida entre el precio de venta y el implícito en el margen
+# indicado, en centavos (la comparación se hace sobre valores escalados x100)
+_PRICE_TOLERANCE_CENTS = Decimal("1")
 
 
 class ProductsService:
@@ -33,7 +58,6 @@ class ProductsService:
         self.products_repo = ProductsRepository(db)
         self.items_repo = InventoryItemsRepository(db)
         self.movements_repo = InventoryMovementsRepository(db)
-        self.audit_repo = AuditRepository(db)
 
     async def create_product(
         self,
@@ -57,43 +81,15 @@ class ProductsService:
             ProductResponse con los datos del producto creado
         """
         # Validar que el usuario sea OWNER, ADMIN o COOK
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN, UserRole.COOK]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER, ADMIN y COOK pueden crear productos.",
-            )
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER, ADMIN y COOK pueden crear productos."
+        )
 
         # Validar y calcular costos de ingredientes
-        total_cost = Decimal(0)
-        ingredients_data = []
-
-        for ing_data in data.ingredients:
-            # Validar que el ingrediente exista y pertenezca al negocio
-            item = await self.items_repo.get_by_id(ing_data.inventory_item_id, current_user.business_id)
-            if not item:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"El ítem con ID {ing_data.inventory_item_id} no existe o no pertenece a tu negocio.",
-                )
-
-            # Validar que el ítem esté activo
-            if not item.is_active:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"El ingrediente '{item.name}' está inactivo. No se puede usar en el producto.",
-                )
-
-            # Calcular costo del ingrediente
-            unit_cost = item.unit_price
-            ingredient_total_cost = unit_cost * ing_data.quantity
-            total_cost += ingredient_total_cost
-
-            ingredients_data.append({
-                "inventory_item_id": ing_data.inventory_item_id,
-                "quantity": ing_data.quantity,
-                "unit_cost": unit_cost,
-                "total_cost": ingredient_total_cost,
-            })
+        ingredients_data, total_cost, items_map = await self._calculate_ingredients(
+            data.ingredients,
+            current_user.business_id,
+        )
 
         # Validar que sale_price >= total_cost
         if data.sale_price < total_cost:
@@ -107,8 +103,9 @@ class ProductsService:
 
         # Si el usuario especificó un margen, validar que sea correcto
         if data.profit_margin_percentage is not None:
-            expected_sale_price = total_cost * (Decimal(1) + data.profit_margin_percentage / Decimal(100))
-            if abs(data.sale_price - expected_sale_price) > Decimal('0.01'):
+            # |sale - cost * (1 + m/100)| > 0.01  <=>  |100*sale - cost*(100 + m)| > 1 (sin divisiones)
+            expected_sale_cents = total_cost * (_DECIMAL_HUNDRED + data.profit_margin_percentage)
+            if abs(data.sale_price * _DECIMAL_HUNDRED - expected_sale_cents) > _PRICE_TOLERANCE_CENTS:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"El margen de ganancia especificado ({data.profit_margin_percentage}%) no coincide con el precio de venta.",
@@ -116,9 +113,9 @@ class ProductsService:
             profit_margin = data.profit_margin_percentage
         else:
             # Calcular el margen basado en el precio de venta
-            profit_margin = (profit_amount / data.sale_price * Decimal(100)) if data.sale_price > 0 else Decimal(0)
+            profit_margin = (profit_amount / data.sale_price * _DECIMAL_HUNDRED) if data.sale_price > 0 else _DECIMAL_ZERO
 
-        # Crear el producto
+        # Crear el producto con sus ingredientes (un solo flush)
         product = await self.products_repo.create_product(
             business_id=current_user.business_id,
             name=data.name,
@@ -129,31 +126,26 @@ class ProductsService:
             profit_margin_percentage=profit_margin,
             profit_amount=profit_amount,
             image_url=data.image_url,
+            ingredients=ingredients_data,
+            inventory_items=items_map,
         )
 
-        # Crear los ingredientes
-        for ing_data in ingredients_data:
-            await self.products_repo.add_ingredient(
-                product_id=product.id,
-                inventory_item_id=ing_data["inventory_item_id"],
-                quantity=ing_data["quantity"],
-                unit_cost=ing_data["unit_cost"],
-                total_cost=ing_data["total_cost"],
-            )
-
         await self.products_repo.commit()
 
-        # Registrar auditoría
-        await self.audit_repo.create_log(
+        # Registrar auditoría (se inserta en lote en segundo plano)
+        audit_buffer.enqueue_log(
             business_id=current_user.business_id,
             user_id=current_user.id,
-            action=f"Producto creado: {product.name} (ID: {product.id}) con {len(ingredients_data)} ingredientes por {current_user.full_name}",
+            action=_AUDIT_CREATED,
+            params={
+                "name": product.name,
+                "id": product.id,
+                "ingredients_count": len(ingredients_data),
+                "actor": current_user.full_name,
+            },
         )
 
-        # Cargar el producto con todas las relaciones
-        product_with_relations = await self.products_repo.get_by_id(product.id, current_user.business_id)
-
-        return self._build_response(product_with_relations)
+        return self._build_response(product)
 
     async def get_product_by_id(
         self,
@@ -188,7 +180,7 @@ class ProductsService:
             category=category,
         )
 
-        return [self._build_list_response(product) for product in products]
+        return _PRODUCT_LIST_ADAPTER.validate_python(products, from_attributes=True)
 
     async def update_product(
         self,
@@ -212,11 +204,9 @@ class ProductsService:
             ProductResponse con los datos actualizados
         """
         # Validar que el usuario sea OWNER, ADMIN o COOK
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN, UserRole.COOK]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER, ADMIN y COOK pueden actualizar productos.",
-            )
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER, ADMIN y COOK pueden actualizar productos."
+        )
 
         # Obtener el producto
         product = await self.products_repo.get_by_id(product_id, current_user.business_id)
@@ -227,6 +217,10 @@ class ProductsService:
                 detail="Producto no encontrado.",
             )
 
+        # Sin campos enviados no hay nada que validar ni actualizar
+        if not data.model_fields_set:
+            return self._build_response(product)
+
         # Validar sale_price >= total_cost
         new_sale_price = data.sale_price if data.sale_price is not None else product.sale_price
         if new_sale_price < product.total_cost:
@@ -235,33 +229,30 @@ class ProductsService:
                 detail=f"El precio de venta ({new_sale_price}) debe ser mayor o igual al costo total ({product.total_cost}).",
             )
 
-        # Registrar cambios para auditoría
-        changes = []
-        update_data = data.model_dump(exclude_unset=True)
-
-        for field, value in update_data.items():
-            old_value = getattr(product, field)
-            if value != old_value:
-                setattr(product, field, value)
-                changes.append(f"{field}: '{old_value}' → '{value}'")
-
-        # Recalcular profit_amount y profit_margin si cambió el precio
-        if data.sale_price is not None:
-            product.profit_amount = product.sale_price - product.total_cost
-            product.profit_margin_percentage = (
-                (product.profit_amount / product.sale_price * Decimal(100))
-                if product.sale_price > 0 else Decimal(0)
+        # Registrar cambios para auditoría (values: columnas a actualizar)
+        changes = diff_changes(product, data)
+        values = {field: change["new"] for field, change in changes.items()}
+
+        # Recalcular profit_amount y profit_margin solo si el precio realmente cambió
+        if "sale_price" in changes and data.sale_price is not None:
+            profit_amount = new_sale_price - product.total_cost
+            values["profit_amount"] = profit_amount
+            values["profit_margin_percentage"] = (
+                (profit_amount / new_sale_price * _DECIMAL_HUNDRED)
+                if new_sale_price > 0 else _DECIMAL_ZERO
             )
 
-        # Solo actualizar si hay cambios
+        # Solo actualizar si hay cambios (UPDATE ... RETURNING, sin recargar el producto)
         if changes:
-            updated_product = await self.products_repo.update(product)
+            updated_product = await self.products_repo.update_columns(product, values)
 
-            # Registrar auditoría
-            await self.audit_repo.create_log(
+            # Registrar auditoría (se inserta en lote en segundo plano)
+            audit_buffer.enqueue_log(
                 business_id=current_user.business_id,
                 user_id=current_user.id,
-                action=f"Producto actualizado: {updated_product.name} (ID: {updated_product.id}). Cambios: {', '.join(changes)}. Actualizado por {current_user.full_name}",
+                action=_AUDIT_UPDATED,
+                details={"changes": changes},
+                params={"name": updated_product.name, "id": updated_product.id, "actor": current_user.full_name},
             )
 
             return self._build_response(updated_product)
@@ -287,11 +278,9 @@ class ProductsService:
             ProductResponse con los datos actualizados
         """
         # Validar que el usuario sea OWNER, ADMIN o COOK
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN, UserRole.COOK]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER, ADMIN y COOK pueden actualizar ingredientes.",
-            )
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER, ADMIN y COOK pueden actualizar ingredientes."
+        )
 
         # Obtener el producto
         product = await self.products_repo.get_by_id(product_id, current_user.business_id)
@@ -303,36 +292,10 @@ class ProductsService:
             )
 
         # Validar y calcular costos de ingredientes
-        total_cost = Decimal(0)
-        ingredients_data = []
-
-        for ing_data in data.ingredients:
-            # Validar que el ingrediente exista y pertenezca al negocio
-            item = await self.items_repo.get_by_id(ing_data.inventory_item_id, current_user.business_id)
-            if not item:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"El ítem con ID {ing_data.inventory_item_id} no existe o no pertenece a tu negocio.",
-                )
-
-            # Validar que el ítem esté activo
-            if not item.is_active:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"El ingrediente '{item.name}' está inactivo. No se puede usar en el producto.",
-                )
-
-            # Calcular costo del ingrediente
-            unit_cost = item.unit_price
-            ingredient_total_cost = unit_cost * ing_data.quantity
-            total_cost += ingredient_total_cost
-
-            ingredients_data.append({
-                "inventory_item_id": ing_data.inventory_item_id,
-                "quantity": ing_data.quantity,
-                "unit_cost": unit_cost,
-                "total_cost": ingredient_total_cost,
-            })
+        ingredients_data, total_cost, items_map = await self._calculate_ingredients(
+            data.ingredients,
+            current_user.business_id,
+        )
 
         # Validar que sale_price >= nuevo total_cost
         if product.sale_price < total_cost:
@@ -341,40 +304,41 @@ class ProductsService:
                 detail=f"El precio de venta actual ({product.sale_price}) es menor al nuevo costo total ({total_cost}). Actualiza el precio de venta primero.",
             )
 
-        # Eliminar ingredientes anteriores
-        await self.products_repo.delete_ingredients(product)
-
-        # Crear los nuevos ingredientes
-        for ing_data in ingredients_data:
-            await self.products_repo.add_ingredient(
-                product_id=product.id,
-                inventory_item_id=ing_data["inventory_item_id"],
-                quantity=ing_data["quantity"],
-                unit_cost=ing_data["unit_cost"],
-                total_cost=ing_data["total_cost"],
-            )
-
-        # Actualizar costos y márgenes del producto
-        product.total_cost = total_cost
-        product.profit_amount = product.sale_price - total_cost
-        product.profit_margin_percentage = (
-            (product.profit_amount / product.sale_price * Decimal(100))
-            if product.sale_price > 0 else Decimal(0)
+        # Reemplazar los ingredientes (los nuevos se crean con un solo INSERT)
+        await self.products_repo.replace_ingredients(product, ingredients_data, items_map)
+
+        # Actualizar costos y márgenes del producto (UPDATE ... RETURNING, sin commit)
+        profit_amount = product.sale_price - total_cost
+        await self.products_repo.update_columns(
+            product,
+            {
+                "total_cost": total_cost,
+                "profit_amount": profit_amount,
+                "profit_margin_percentage": (
+                    (profit_amount / product.sale_price * _DECIMAL_HUNDRED)
+                    if product.sale_price > 0 else _DECIMAL_ZERO
+                ),
+            },
+            commit=False,
         )
 
         await self.products_repo.commit()
 
-        # Registrar auditoría
-        await self.audit_repo.create_log(
+        # Registrar auditoría (se inserta en lote en segundo plano)
+        audit_buffer.enqueue_log(
             business_id=current_user.business_id,
             user_id=current_user.id,
-            action=f"Ingredientes actualizados para producto: {product.name} (ID: {product.id}). Nuevo costo total: {total_cost}. Actualizado por {current_user.full_name}",
+            action=_AUDIT_INGREDIENTS_UPDATED,
+            details={"ingredients": ingredients_data},
+            params={
+                "name": product.name,
+                "id": product.id,
+                "total_cost": product.total_cost,
+                "actor": current_user.full_name,
+            },
         )
 
-        # Cargar el producto con todas las relaciones
-        updated_product = await self.products_repo.get_by_id(product.id, current_user.business_id)
-
-        return self._build_response(updated_product)
+        return self._build_response(product)
 
     async def deactivate_product(
         self,
@@ -383,11 +347,9 @@ class ProductsService:
     ) -> ProductResponse:
         """Inactiva un producto (soft delete)"""
         # Validar que el usuario sea OWNER, ADMIN o COOK
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN, UserRole.COOK]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER, ADMIN y COOK pueden inactivar productos.",
-            )
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER, ADMIN y COOK pueden inactivar productos."
+        )
 
         # Obtener el producto
         product = await self.products_repo.get_by_id(product_id, current_user.business_id)
@@ -404,19 +366,65 @@ class ProductsService:
                 detail="El producto ya está inactivo.",
             )
 
-        # Inactivar
-        product.is_active = False
-        updated_product = await self.products_repo.update(product)
+        # Inactivar (UPDATE ... RETURNING, sin recargar el producto)
+        updated_product = await self.products_repo.update_columns(product, {"is_active": False})
 
-        # Registrar auditoría
-        await self.audit_repo.create_log(
+        # Registrar auditoría (se inserta en lote en segundo plano)
+        audit_buffer.enqueue_log(
             business_id=current_user.business_id,
             user_id=current_user.id,
-            action=f"Producto inactivado: {updated_product.name} (ID: {updated_product.id}) por {current_user.full_name}",
+            action=_AUDIT_DEACTIVATED,
+            params={"name": updated_product.name, "id": updated_product.id, "actor": current_user.full_name},
         )
 
         return self._build_response(updated_product)
 
+    async def _calculate_ingredients(
+        self,
+        ingredients: List[ProductIngredientCreate],
+        business_id: int,
+    ) -> Tuple[List[dict], Decimal, Dict[int, InventoryItem]]:
+        """
+        Valida los ingredientes (existen, pertenecen al negocio y están activos) y
+        calcula su costo. Devuelve las filas a insertar, el costo total del producto
+        y los ítems de inventario cargados ({id: ítem}).
+        """
+        # Los ítems se cargan en un solo SELECT ... IN (el schema ya rechaza IDs duplicados)
+        items_map = await self.items_repo.get_by_ids(
+            [ing_data.inventory_item_id for ing_data in ingredients],
+            business_id,
+        )
+
+        for ing_data in ingredients:
+            # Validar que el ingrediente exista y pertenezca al negocio
+            item = items_map.get(ing_data.inventory_item_id)
+            if not item:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"El ítem con ID {ing_data.inventory_item_id} no existe o no pertenece a tu negocio.",
+                )
+
+            # Validar que el ítem esté activo
+            if not item.is_active:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"El ingrediente '{item.name}' está inactivo. No se puede usar en el producto.",
+                )
+
+        # Costo de cada ingrediente: precio unitario actual del ítem * cantidad
+        ingredients_data = [
+            {
+                "inventory_item_id": ing_data.inventory_item_id,
+                "quantity": ing_data.quantity,
+                "unit_cost": items_map[ing_data.inventory_item_id].unit_price,
+                "total_cost": items_map[ing_data.inventory_item_id].unit_price * ing_data.quantity,
+            }
+            for ing_data in ingredients
+        ]
+        total_cost = sum((ing["total_cost"] for ing in ingredients_data), _DECIMAL_ZERO)
+
+        return ingredients_data, total_cost, items_map
+
     def _build_response(self, product) -> ProductResponse:
         """Construye la respuesta completa del producto con ingredientes"""
         ingredients_response = [
@@ -448,16 +456,3 @@ class ProductsService:
             updated_at=product.updated_at,
             ingredients=ingredients_response,
         )
-
-    def _build_list_response(self, product) -> ProductListResponse:
-        """Construye la respuesta resumida del producto sin ingredientes"""
-        return ProductListResponse(
-            id=product.id,
-            name=product.name,
-            category=product.category,
-            sale_price=product.sale_price,
-            total_cost=product.total_cost,
-            profit_margin_percentage=product.profit_margin_percentage,
-            is_active=product.is_active,
-            ingredients_count=len(product.ingredients),
-        )
@@ -5,14 +5,30 @@ Maneja operaciones CRUD de proveedores con validaciones y auditoría.
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from typing import List
+from pydantic import TypeAdapter
 from app.repositories.suppliers.suppliers_repository import SuppliersRepository
-from app.repositories.audit.audit_repository import AuditRepository
 from app.schemas.suppliers.supplier_schema import (
     SupplierCreate,
     SupplierUpdate,
     SupplierResponse,
 )
 from app.models.users.user_model import User, UserRole
+from app.dependencies.auth_dependencies import require_role
+from app.services.audit import audit_buffer
+from app.utils.changes import diff_changes
+
+
+# Validador compilado una sola vez para listas de proveedores
+_SUPPLIER_LIST_ADAPTER = TypeAdapter(List[SupplierResponse])
+
+# Plantillas de auditoría (el texto se arma al volcar el lote, ver audit_buffer)
+_AUDIT_CREATED = "Proveedor creado: {name} (ID: {id}) por {actor}"
+_AUDIT_UPDATED = "Proveedor actualizado: {name} (ID: {id}). Actualizado por {actor}"
+_AUDIT_DEACTIVATED = "Proveedor inactivado: {name} (ID: {id}) por {actor}"
+_AUDIT_DELETED = "Proveedor eliminado permanentemente: {name} (ID: {id}, Tax ID: {tax_id}) por {actor}"
+
+# Roles que pueden crear, actualizar e inactivar proveedores
+_MUTATING_ROLES = frozenset({UserRole.OWNER, UserRole.ADMIN})
 
 
 class SuppliersService:
@@ -24,7 +40,6 @@ class SuppliersService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.suppliers_repo = SuppliersRepository(db)
-        self.audit_repo = AuditRepository(db)
 
     async def create_supplier(
         self,
@@ -47,27 +62,26 @@ class SuppliersService:
             SupplierResponse con los datos del proveedor creado
         """
         # Validar que el usuario sea OWNER o ADMIN
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN]:
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER y ADMIN pueden crear proveedores."
+        )
+
+        # Validar email y tax_id únicos (si se proporcionan) en una sola consulta
+        email_taken, tax_id_taken = await self.suppliers_repo.find_conflicts(
+            current_user.business_id,
+            email=data.email,
+            tax_id=data.tax_id,
+        )
+        if email_taken:
             raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER y ADMIN pueden crear proveedores.",
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El email {data.email} ya está registrado para otro proveedor en este negocio.",
+            )
+        if tax_id_taken:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El NIT/Tax ID {data.tax_id} ya está registrado para otro proveedor en este negocio.",
             )
-
-        # Validar email único (si se proporciona)
-        if data.email:
-            if await self.suppliers_repo.email_exists(data.email, current_user.business_id):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"El email {data.email} ya está registrado para otro proveedor en este negocio.",
-                )
-
-        # Validar tax_id único (si se proporciona)
-        if data.tax_id:
-            if await self.suppliers_repo.tax_id_exists(data.tax_id, current_user.business_id):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"El NIT/Tax ID {data.tax_id} ya está registrado para otro proveedor en este negocio.",
-                )
 
         # Crear el proveedor
         supplier = await self.suppliers_repo.create(
@@ -81,11 +95,12 @@ class SuppliersService:
             address=data.address,
         )
 
-        # Registrar auditoría
-        await self.audit_repo.create_log(
+        # Registrar auditoría (se inserta en lote en segundo plano)
+        audit_buffer.enqueue_log(
             business_id=current_user.business_id,
             user_id=current_user.id,
-            action=f"Proveedor creado: {supplier.name} (ID: {supplier.id}) por {current_user.full_name}",
+            action=_AUDIT_CREATED,
+            params={"name": supplier.name, "id": supplier.id, "actor": current_user.full_name},
         )
 
         return SupplierResponse.model_validate(supplier)
@@ -141,7 +156,7 @@ class SuppliersService:
             active_only=active_only,
         )
 
-        return [SupplierResponse.model_validate(supplier) for supplier in suppliers]
+        return _SUPPLIER_LIST_ADAPTER.validate_python(suppliers, from_attributes=True)
 
     async def update_supplier(
         self,
@@ -166,11 +181,9 @@ class SuppliersService:
             SupplierResponse con los datos actualizados
         """
         # Validar que el usuario sea OWNER o ADMIN
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER y ADMIN pueden actualizar proveedores.",
-            )
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER y ADMIN pueden actualizar proveedores."
+        )
 
         # Obtener el proveedor
         supplier = await self.suppliers_repo.get_by_id(supplier_id, current_user.business_id)
@@ -181,41 +194,44 @@ class SuppliersService:
                 detail="Proveedor no encontrado.",
             )
 
-        # Validar email único (si se proporciona y cambió)
-        if data.email and data.email != supplier.email:
-            if await self.suppliers_repo.email_exists(data.email, current_user.business_id, exclude_id=supplier_id):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"El email {data.email} ya está registrado para otro proveedor en este negocio.",
-                )
-
-        # Validar tax_id único (si se proporciona y cambió)
-        if data.tax_id and data.tax_id != supplier.tax_id:
-            if await self.suppliers_repo.tax_id_exists(data.tax_id, current_user.business_id, exclude_id=supplier_id):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"El NIT/Tax ID {data.tax_id} ya está registrado para otro proveedor en este negocio.",
-                )
+        # Sin campos enviados no hay nada que validar ni actualizar
+        if not data.model_fields_set:
+            return SupplierResponse.model_validate(supplier)
 
-        # Registrar cambios para auditoría
-        changes = []
-        update_data = data.model_dump(exclude_unset=True)
+        # Validar email y tax_id únicos (solo los que se proporcionan y cambiaron) en una sola consulta
+        email_taken, tax_id_taken = await self.suppliers_repo.find_conflicts(
+            current_user.business_id,
+            email=data.email if data.email != supplier.email else None,
+            tax_id=data.tax_id if data.tax_id != supplier.tax_id else None,
+            exclude_id=supplier_id,
+        )
+        if email_taken:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El email {data.email} ya está registrado para otro proveedor en este negocio.",
+            )
+        if tax_id_taken:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El NIT/Tax ID {data.tax_id} ya está registrado para otro proveedor en este negocio.",
+            )
 
-        for field, value in update_data.items():
-            old_value = getattr(supplier, field)
-            if value != old_value:
-                setattr(supplier, field, value)
-                changes.append(f"{field}: '{old_value}' → '{value}'")
+        # Registrar cambios para auditoría
+        changes = diff_changes(supplier, data)
+        for field, change in changes.items():
+            setattr(supplier, field, change["new"])
 
         # Solo actualizar si hay cambios
         if changes:
             updated_supplier = await self.suppliers_repo.update(supplier)
 
-            # Registrar auditoría
-            await self.audit_repo.create_log(
+            # Registrar auditoría (se inserta en lote en segundo plano)
+            audit_buffer.enqueue_log(
                 business_id=current_user.business_id,
                 user_id=current_user.id,
-                action=f"Proveedor actualizado: {updated_supplier.name} (ID: {updated_supplier.id}). Cambios: {', '.join(changes)}. Actualizado por {current_user.full_name}",
+                action=_AUDIT_UPDATED,
+                details={"changes": changes},
+                params={"name": updated_supplier.name, "id": updated_supplier.id, "actor": current_user.full_name},
             )
 
             return SupplierResponse.model_validate(updated_supplier)
@@ -238,11 +254,9 @@ class SuppliersService:
             SupplierResponse con el proveedor inactivado
         """
         # Validar que el usuario sea OWNER o ADMIN
-        if current_user.role not in [UserRole.OWNER, UserRole.ADMIN]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo los roles OWNER y ADMIN pueden inactivar proveedores.",
-            )
+        require_role(
+            current_user, _MUTATING_ROLES, "Solo los roles OWNER y ADMIN pueden inactivar proveedores."
+        )
 
         # Obtener el proveedor
         supplier = await self.suppliers_repo.get_by_id(supplier_id, current_user.business_id)
@@ -263,11 +277,12 @@ class SuppliersService:
         supplier.is_active = False
         updated_supplier = await self.suppliers_repo.update(supplier)
 
-        # Registrar auditoría
-        await self.audit_repo.create_log(
+        # Registrar auditoría (se inserta en lote en segundo plano)
+        audit_buffer.enqueue_log(
             business_id=current_user.business_id,
             user_id=current_user.id,
-            action=f"Proveedor inactivado: {updated_supplier.name} (ID: {updated_supplier.id}) por {current_user.full_name}",
+            action=_AUDIT_DEACTIVATED,
+            params={"name": updated_supplier.name, "id": updated_supplier.id, "actor": current_user.full_name},
         )
 
         return SupplierResponse.model_validate(updated_supplier)
@@ -301,12 +316,18 @@ class SuppliersService:
                 detail="Proveedor no encontrado.",
             )
 
-        # Registrar auditoría antes de eliminar
-        await self.audit_repo.create_log(
+        # Eliminar
+        await self.suppliers_repo.delete_permanently(supplier)
+
+        # Registrar auditoría (los datos del proveedor siguen en memoria tras eliminarlo)
+        audit_buffer.enqueue_log(
             business_id=current_user.business_id,
             user_id=current_user.id,
-            action=f"Proveedor eliminado permanentemente: {supplier.name} (ID: {supplier.id}, Tax ID: {supplier.tax_id}) por {current_user.full_name}",
+            action=_AUDIT_DELETED,
+            params={
+                "name": supplier.name,
+                "id": supplier.id,
+                "tax_id": supplier.tax_id,
+                "actor": current_user.full_name,
+            },
         )
-
-        # Eliminar
-        await self.suppliers_repo.delete_permanently(supplier)
@@ -1,9 +1,13 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
-from typing import List
+from pydantic import TypeAdapter
+from typing import AsyncIterator, List
 from app.repositories.users.users_repository import UsersRepository
 from app.schemas.users.user_schema import UserResponse
 
+# Validador compilado una sola vez para listas de usuarios
+_USER_LIST_ADAPTER = TypeAdapter(List[UserResponse])
+
 
 class UsersService:
     """
@@ -35,4 +39,15 @@ class UsersService:
         Obtiene todos los usuarios del negocio.
         """
         users = await self.users_repo.get_all_by_business(business_id, skip, limit)
-        return [UserResponse.model_validate(user) for user in users]
+        return _USER_LIST_ADAPTER.validate_python(users)
+
+    async def iter_all_users(
+        self, business_id: int, skip: int = 0, limit: int = 1000
+    ) -> AsyncIterator[UserResponse]:
+        """
+        Itera los usuarios del negocio, leyendo y validando por lotes.
+        Permite serializar listados grandes en streaming con memoria acotada.
+        """
+        async for partition in self.users_repo.stream_by_business(business_id, skip, limit):
+            for response in _USER_LIST_ADAPTER.validate_python(partition):
+                yield response
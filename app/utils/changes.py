@@ -0,0 +1,29 @@
+from operator import attrgetter
+from typing import Any, Dict
+from pydantic import BaseModel
+
+
+def diff_changes(obj: Any, data: BaseModel) -> Dict[str, Dict[str, Any]]:
+    """
+    Compara contra el objeto solo los campos enviados por el cliente (model_fields_set)
+    y devuelve {campo: {"old", "new"}} con los que realmente cambian, en el orden
+    de los campos del schema.
+
+    Los valores de ambos lados se leen de una vez con operator.attrgetter; si no se
+    envió ningún campo retorna {} sin tocar el objeto.
+    """
+    fields = [field for field in type(data).model_fields if field in data.model_fields_set]
+    if not fields:
+        return {}
+
+    getter = attrgetter(*fields)
+    new_values = getter(data)
+    old_values = getter(obj)
+    if len(fields) == 1:
+        new_values, old_values = (new_values,), (old_values,)
+
+    return {
+        field: {"old": old_value, "new": new_value}
+        for field, old_value, new_value in zip(fields, old_values, new_values)
+        if new_value != old_value
+    }
@@ -0,0 +1,14 @@
+from typing import Any, Sequence
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+def json_list_response(adapter: TypeAdapter, items: Sequence[Any]) -> Response:
+    """
+    Serializa una lista de respuestas ya validadas directamente a JSON.
+
+    Al devolver un Response, FastAPI no vuelve a validar la lista contra el
+    response_model ni la pasa por jsonable_encoder; el response_model del
+    endpoint se mantiene solo para la documentación OpenAPI.
+    """
+    return Response(content=adapter.dump_json(items), media_type="application/json")
@@ -1,29 +1,220 @@
-from passlib.context import CryptContext
-from jose import JWTError, jwt
-from datetime import datetime, timedelta
-from typing import Optional
+import asyncio
+import base64
+import bcrypt
+import hashlib
+import hmac
+import json
+import multiprocessing
+import os
+import re
+from fastapi import HTTPException, status
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from jose import JWTError, jwk, jwt
+from typing import Dict, List, Optional
 import secrets
 import string
+import threading
+import time
 from app.config.settings import settings
 from app.schemas.auth.auth_schema import TokenPayload
 from app.models.users.user_model import UserRole
 
-# Contexto para hashing de contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashing de contraseñas con bcrypt directo (sin la capa de despacho de passlib).
+# bcrypt solo considera los primeros 72 bytes: en lugar de truncar en silencio
+# (dos contraseñas largas distintas coincidirían), las más largas se rechazan.
+# El costo se toma de settings.BCRYPT_ROUNDS.
+_BCRYPT_MAX_BYTES = 72
+# Forma de un hash bcrypt válido ($2a$/$2b$/$2y$, costo de 2 dígitos, 53 caracteres
+# de salt+hash); cualquier otra cosa se rechaza sin correr el key schedule.
+_BCRYPT_HASH_RE = re.compile(r"\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}")
+
+
+@lru_cache(maxsize=None)
+def _dummy_hash() -> bytes:
+    """
+    Hash bcrypt de relleno con el costo configurado, generado en el primer uso.
+    Se verifica contra él cuando no hay un hash real que comprobar, para que el
+    tiempo de respuesta no revele si el hash (o el usuario) existe.
+    """
+    return bcrypt.hashpw(secrets.token_bytes(16), bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS))
+
+
+# Pool dedicado para bcrypt: la extensión en C libera el GIL durante el key
+# schedule, así que varios hashes corren en paralelo sin bloquear el event loop.
+# Con BCRYPT_EXECUTOR=process se reemplaza en el startup por un pool de procesos
+# (ver start_bcrypt_executor).
+_BCRYPT_EXECUTOR: Executor = ThreadPoolExecutor(
+    max_workers=min(32, (os.cpu_count() or 1) * 2),
+    thread_name_prefix="bcrypt",
+)
+
+# Caché de tokens ya decodificados: token crudo -> payload. Evita repetir la
+# verificación HMAC y el parseo JSON del mismo token en cada request. Los tokens
+# inválidos también se guardan (payload None) para no re-verificarlos bajo carga.
+# La expiración va por baldes de _TOKEN_BUCKET_SECONDS según el vencimiento de
+# cada entrada: un balde se descarta entero apenas empieza su ventana (nunca
+# después de que venza alguna de sus entradas), así que un acierto no compara
+# tiempos por entrada.
+_TOKEN_BUCKET_SECONDS = 10
+_TOKEN_CACHE: Dict[str, Optional[TokenPayload]] = {}
+_TOKEN_BUCKETS: Dict[int, List[str]] = {}
+_TOKEN_CACHE_LOCK = threading.Lock()
+_purged_through_bucket = 0
+_MISS = object()
+
+
+def _b64url(data: bytes) -> bytes:
+    """Base64 URL-safe sin relleno, como exige JWS."""
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+# Emisión de tokens HS256 sin pasar por jose: el header es siempre el mismo y se
+# codifica una sola vez, y el HMAC con la clave ya cargada se clona por token.
+_JWT_HEADER_B64 = _b64url(
+    json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":"), sort_keys=True).encode("utf-8")
+)
+_JWT_HEADER = _JWT_HEADER_B64.decode("ascii")
+_HS256_BASE = hmac.new(settings.SECRET_KEY.encode("utf-8"), digestmod=hashlib.sha256)
+
+# Clave de jose construida una sola vez: pasar el SECRET_KEY como str hace que
+# jose intente parsearlo como JWK y reconstruya el objeto clave en cada llamada.
+_JWT_KEY = jwk.construct(settings.SECRET_KEY, settings.ALGORITHM)
+
+
+# Tipo de token en el claim "t" (entero en lugar del string "type"). Los tokens
+# emitidos antes del cambio siguen trayendo "type" y se traducen al decodificar.
+TOKEN_TYPE_ACCESS = 0
+TOKEN_TYPE_REFRESH = 1
+_LEGACY_TOKEN_TYPES = {"access": TOKEN_TYPE_ACCESS, "refresh": TOKEN_TYPE_REFRESH}
+
+# Claims de cada tipo de token con su forma fija ya armada: emitir un token copia
+# la plantilla y completa cuatro campos. "exp" es un NumericDate (segundos desde
+# epoch); las vigencias se leen de settings una sola vez.
+_ACCESS_TOKEN_TEMPLATE = {"user_id": 0, "business_id": 0, "role": "", "exp": 0, "t": TOKEN_TYPE_ACCESS}
+_REFRESH_TOKEN_TEMPLATE = {"user_id": 0, "business_id": 0, "role": "", "exp": 0, "t": TOKEN_TYPE_REFRESH}
+_ACCESS_TOKEN_SECONDS = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+_REFRESH_TOKEN_SECONDS = settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+
+# Alfabeto de contraseñas generadas: un carácter de cada clase es obligatorio
+_PASSWORD_CLASSES = (string.ascii_lowercase, string.ascii_uppercase, string.digits, "!@#$%&*")
+_PASSWORD_ALPHABET = "".join(_PASSWORD_CLASSES)
+_PASSWORD_REJECT_FROM = 256 - 256 % len(_PASSWORD_ALPHABET)
+
+# Conversión rol <-> string del claim "role" resuelta con un dict, sin pasar por
+# el descriptor .value ni por la búsqueda de UserRole(...) en cada token.
+_ROLE_STR = {role: role.value for role in UserRole}
+_STR_ROLE = {role.value: role for role in UserRole}
+
+
+def _encode_jwt(claims: dict) -> str:
+    """
+    Firma los claims como JWT compacto.
+    Con ALGORITHM distinto de HS256 delega en jose.
+    """
+    if settings.ALGORITHM != "HS256":
+        return jwt.encode(claims, _JWT_KEY, algorithm=settings.ALGORITHM)
+
+    payload = json.dumps(claims, separators=(",", ":")).encode("utf-8")
+    signing_input = _JWT_HEADER_B64 + b"." + _b64url(payload)
+    mac = _HS256_BASE.copy()
+    mac.update(signing_input)
+    return (signing_input + b"." + _b64url(mac.digest())).decode("ascii")
+
+
+def _encode_password(password: str) -> bytes:
+    """
+    Codifica una contraseña nueva para bcrypt.
+    Más de 72 bytes se rechaza con 400 en lugar de truncarse.
+    """
+    encoded = password.encode("utf-8")
+    if len(encoded) > _BCRYPT_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Password too long (max {_BCRYPT_MAX_BYTES} bytes)",
+        )
+    return encoded
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifica que una contraseña en texto plano coincida con el hash.
+    Una contraseña de más de 72 bytes o un hash vacío/mal formado retornan False,
+    tras verificar contra un hash de relleno para no abrir un oráculo de tiempo.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    encoded = plain_password.encode("utf-8")
+    if (
+        len(encoded) > _BCRYPT_MAX_BYTES
+        or not hashed_password
+        or not _BCRYPT_HASH_RE.fullmatch(hashed_password)
+    ):
+        bcrypt.checkpw(encoded[:_BCRYPT_MAX_BYTES], _dummy_hash())
+        return False
+    return bcrypt.checkpw(encoded, hashed_password.encode("utf-8"))
 
 
 def get_password_hash(password: str) -> str:
     """
     Genera un hash de una contraseña.
     """
-    return pwd_context.hash(password)
+    return bcrypt.hashpw(
+        _encode_password(password),
+        bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS),
+    ).decode("utf-8")
+
+
+def start_bcrypt_executor() -> None:
+    """
+    Con BCRYPT_EXECUTOR=process cambia el pool de hilos por uno de procesos (uno
+    por núcleo), para que las ráfagas de login usen todos los núcleos aunque el
+    GIL no se libere. Se llama en el startup de FastAPI y no al importar, para no
+    crear procesos desde los propios workers; se usa "spawn" para no heredar el
+    event loop ni las conexiones del proceso padre.
+    """
+    global _BCRYPT_EXECUTOR
+
+    if settings.BCRYPT_EXECUTOR != "process" or isinstance(_BCRYPT_EXECUTOR, ProcessPoolExecutor):
+        return
+    thread_pool = _BCRYPT_EXECUTOR
+    _BCRYPT_EXECUTOR = ProcessPoolExecutor(
+        max_workers=os.cpu_count() or 1,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+    thread_pool.shutdown(wait=False)
+
+
+def shutdown_bcrypt_executor() -> None:
+    """Libera el pool de bcrypt (hilos o procesos). Se llama en el shutdown de FastAPI."""
+    _BCRYPT_EXECUTOR.shutdown(wait=True)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    Indica si un hash bcrypt (ya verificado) fue generado con un costo distinto
+    de settings.BCRYPT_ROUNDS. Se consulta solo tras un login exitoso, no en
+    cada verificación.
+    """
+    return int(hashed_password[4:6]) != settings.BCRYPT_ROUNDS
+
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Versión async de verify_password: ejecuta bcrypt en el pool dedicado.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        _BCRYPT_EXECUTOR, verify_password, plain_password, hashed_password
+    )
+
+
+async def aget_password_hash(password: str) -> str:
+    """
+    Versión async de get_password_hash: ejecuta bcrypt en el pool dedicado.
+    """
+    # La longitud se valida antes de despachar para que el 400 se lance aquí
+    _encode_password(password)
+    return await asyncio.get_running_loop().run_in_executor(
+        _BCRYPT_EXECUTOR, get_password_hash, password
+    )
 
 
 def generate_random_password(length: int = 12) -> str:
@@ -36,74 +227,115 @@ def generate_random_password(length: int = 12) -> str:
     Returns:
         Contraseña generada aleatoriamente con mayúsculas, minúsculas, números y símbolos
     """
-    # Definir los caracteres a usar
-    lowercase = string.ascii_lowercase
-    uppercase = string.ascii_uppercase
-    digits = string.digits
-    symbols = "!@#$%&*"
+    length = max(length, len(_PASSWORD_CLASSES))
+    alphabet_size = len(_PASSWORD_ALPHABET)
 
-    # Asegurar que la contraseña tenga al menos un carácter de cada tipo
-    password = [
-        secrets.choice(lowercase),
-        secrets.choice(uppercase),
-        secrets.choice(digits),
-        secrets.choice(symbols),
-    ]
-
-    # Rellenar el resto de la contraseña con caracteres aleatorios
-    all_characters = lowercase + uppercase + digits + symbols
-    password += [secrets.choice(all_characters) for _ in range(length - 4)]
+    # Un solo os.urandom por tanda; los bytes >= _PASSWORD_REJECT_FROM se descartan
+    # para que el módulo no sesgue el alfabeto
+    chars = []
+    while len(chars) < length:
+        chars.extend(
+            _PASSWORD_ALPHABET[byte % alphabet_size]
+            for byte in os.urandom(length * 2)
+            if byte < _PASSWORD_REJECT_FROM
+        )
+    del chars[length:]
 
-    # Mezclar la contraseña
-    secrets.SystemRandom().shuffle(password)
+    # Asegurar al menos un carácter de cada tipo, en posiciones aleatorias distintas
+    positions = list(range(length))
+    for i, charset in enumerate(_PASSWORD_CLASSES):
+        j = i + secrets.randbelow(length - i)
+        positions[i], positions[j] = positions[j], positions[i]
+        chars[positions[i]] = charset[secrets.randbelow(len(charset))]
 
-    return ''.join(password)
+    return "".join(chars)
 
 
 def create_access_token(user_id: int, business_id: int, role: UserRole) -> str:
     """
     Crea un access token JWT.
     """
-    expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode = {
-        "user_id": user_id,
-        "business_id": business_id,
-        "role": role.value,
-        "exp": expire,
-        "type": "access",
-    }
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    claims = _ACCESS_TOKEN_TEMPLATE.copy()
+    claims["user_id"] = user_id
+    claims["business_id"] = business_id
+    claims["role"] = _ROLE_STR[role]
+    claims["exp"] = int(time.time()) + _ACCESS_TOKEN_SECONDS
+    return _encode_jwt(claims)
 
 
 def create_refresh_token(user_id: int, business_id: int, role: UserRole) -> str:
     """
     Crea un refresh token JWT.
     """
-    expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode = {
-        "user_id": user_id,
-        "business_id": business_id,
-        "role": role.value,
-        "exp": expire,
-        "type": "refresh",
-    }
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    claims = _REFRESH_TOKEN_TEMPLATE.copy()
+    claims["user_id"] = user_id
+    claims["business_id"] = business_id
+    claims["role"] = _ROLE_STR[role]
+    claims["exp"] = int(time.time()) + _REFRESH_TOKEN_SECONDS
+    return _encode_jwt(claims)
+
+
+def _purge_token_buckets(current_bucket: int) -> None:
+    """
+    Descarta los baldes de la caché de tokens cuya ventana ya empezó.
+    Corre a lo sumo una vez por balde de tiempo.
+    """
+    global _purged_through_bucket
+
+    with _TOKEN_CACHE_LOCK:
+        for bucket in [b for b in _TOKEN_BUCKETS if b <= current_bucket]:
+            for token in _TOKEN_BUCKETS.pop(bucket):
+                _TOKEN_CACHE.pop(token, None)
+        _purged_through_bucket = current_bucket
 
 
 def decode_token(token: str) -> Optional[TokenPayload]:
     """
     Decodifica y valida un token JWT.
+
+    El resultado se cachea por token durante TOKEN_CACHE_TTL_SECONDS, sin superar
+    nunca el "exp" del propio token.
     """
+    now = time.time()
+    current_bucket = int(now // _TOKEN_BUCKET_SECONDS)
+    if current_bucket > _purged_through_bucket:
+        _purge_token_buckets(current_bucket)
+
+    cached = _TOKEN_CACHE.get(token, _MISS)
+    if cached is not _MISS:
+        return cached
+
+    expires_at = now + settings.TOKEN_CACHE_TTL_SECONDS
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        # Chequeo estructural barato antes de la criptografía: tres segmentos y,
+        # con HS256, exactamente el header que emite este servidor
+        parts = token.split(".")
+        if len(parts) != 3 or (settings.ALGORITHM == "HS256" and parts[0] != _JWT_HEADER):
+            raise JWTError("Estructura de token inválida")
+        payload = jwt.decode(token, _JWT_KEY, algorithms=[settings.ALGORITHM])
         token_data = TokenPayload(
             user_id=payload.get("user_id"),
             business_id=payload.get("business_id"),
-            role=UserRole(payload.get("role")),
+            role=_STR_ROLE[payload.get("role")],
             exp=payload.get("exp"),
+            token_type=payload.get("t", _LEGACY_TOKEN_TYPES.get(payload.get("type"), TOKEN_TYPE_ACCESS)),
         )
-        return token_data
-    except JWTError:
-        return None
+        if token_data.exp is not None:
+            expires_at = min(expires_at, token_data.exp)
+    except (JWTError, KeyError):
+        # KeyError: token bien firmado pero con un rol que ya no existe
+        token_data = None
+
+    # Solo se cachea si su balde no es el actual (se descartaría de inmediato)
+    bucket = int(expires_at // _TOKEN_BUCKET_SECONDS)
+    if bucket > current_bucket:
+        with _TOKEN_CACHE_LOCK:
+            if len(_TOKEN_CACHE) >= settings.TOKEN_CACHE_MAXSIZE and _TOKEN_BUCKETS:
+                # Caché llena: se libera el balde que vence primero
+                for stale in _TOKEN_BUCKETS.pop(min(_TOKEN_BUCKETS)):
+                    _TOKEN_CACHE.pop(stale, None)
+            if token not in _TOKEN_CACHE:
+                _TOKEN_BUCKETS.setdefault(bucket, []).append(token)
+            _TOKEN_CACHE[token] = token_data
+
+    return token_data